@@ -0,0 +1,71 @@
+"""
+Background Leader for Mualleem Platform
+Under gunicorn every worker process runs the app's startup. Work that must
+happen once per host (the ingestion workers, the dependency prober, warming the
+live collection) runs only in the worker holding an exclusive lock on
+BACKGROUND_LOCK_PATH. The lock is released when that process exits, crashed or
+recycled, and another worker takes over on its next retry.
+"""
+
+import asyncio
+import os
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows: gunicorn is unavailable too, so there is a single process
+    fcntl = None
+
+BACKGROUND_LOCK_PATH = os.getenv("BACKGROUND_LOCK_PATH", "./data/background.lock")
+LEADER_RETRY_SECONDS = float(os.getenv("LEADER_RETRY_SECONDS", "5"))
+
+
+class BackgroundLeader:
+    """Cross-process election of the one worker that runs the host's background work"""
+
+    def __init__(self, lock_path: str = BACKGROUND_LOCK_PATH, retry_interval: float = LEADER_RETRY_SECONDS):
+        """
+        Args:
+            lock_path: Lock file shared by the worker processes
+            retry_interval: Seconds between attempts while another process leads
+        """
+        self.lock_path = lock_path
+        self.retry_interval = retry_interval
+        self.is_leader = False
+        self._file = None
+
+    def try_acquire(self) -> bool:
+        """Take the lock if no other process holds it; True if this process leads"""
+        if self.is_leader:
+            return True
+        if fcntl is None:
+            self.is_leader = True
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        self.is_leader = True
+        print(f"✓ Process {os.getpid()} runs the background work")
+        return True
+
+    async def run(self, on_elected: Callable[[], None]):
+        """Retry until this process leads, then call on_elected once"""
+        while not self.try_acquire():
+            await asyncio.sleep(self.retry_interval)
+        on_elected()
+
+    def release(self):
+        """Give up the lead (closing the file drops the lock)"""
+        self.is_leader = False
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# Singleton instance; the lock is taken by the app's startup, not at import time
+background_leader = BackgroundLeader()
@@ -0,0 +1,8 @@
+"""
+Offline benchmark suite for Mualleem AI Tutor
+Runs without Requesty.ai or Qdrant Cloud: embeddings come from a deterministic
+hashed n-gram stub and vectors go to an in-memory local Qdrant.
+
+Run from the backend directory, e.g.:
+    python -m benchmarks.retrieval_benchmark --pages 50 --output benchmark_results.json
+"""
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Chunker microbenchmark
+Measures text_chunker.chunk_pages throughput on synthetic textbooks of growing
+size. Characters/second should stay flat as the book grows (the pass is
+linear), and the overhead over tokenizing the text once should stay small.
+
+Usage (from the backend directory):
+    python -m benchmarks.chunker_benchmark --pages 100 1000 5000 --output chunker_results.json
+    python -m benchmarks.chunker_benchmark --word-tokens   # offline, no tokenizer download
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from text_chunker import (
+    CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS, PAGE_SEPARATOR,
+    chunk_pages, default_count_tokens,
+)
+from embedding_batcher import get_encoding
+from benchmarks.synthetic_corpus import generate_pages
+
+
+def best_of(repeats: int, fn: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(page_counts: List[int], count_tokens: Callable[[str], int], repeats: int) -> Dict:
+    """Time chunking against a single tokenization pass for each book size"""
+    results = []
+    for num_pages in page_counts:
+        pages = list(enumerate(generate_pages(num_pages, sections_per_page=6), start=1))
+        characters = sum(len(text) for _, text in pages) + len(PAGE_SEPARATOR) * (len(pages) - 1)
+
+        tokenize_seconds = best_of(repeats, lambda: [count_tokens(text) for _, text in pages])
+        chunks = []
+
+        def chunk_book():
+            chunks[:] = chunk_pages(pages, count_tokens=count_tokens)
+
+        chunk_seconds = best_of(repeats, chunk_book)
+
+        results.append({
+            "pages": num_pages,
+            "characters": characters,
+            "chunks": len(chunks),
+            "avg_chunk_tokens": round(sum(c.tokens for c in chunks) / len(chunks), 1),
+            "tokenize_seconds": round(tokenize_seconds, 4),
+            "chunk_seconds": round(chunk_seconds, 4),
+            "chars_per_second": round(characters / chunk_seconds),
+            "overhead_vs_tokenize": round(chunk_seconds / tokenize_seconds, 2),
+        })
+        print(f"  pages={num_pages:<6} {results[-1]['chars_per_second']:>12,} chars/s  "
+              f"{len(chunks):>6} chunks  x{results[-1]['overhead_vs_tokenize']} of one tokenize pass")
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "config": {"max_tokens": CHUNK_MAX_TOKENS, "overlap_tokens": CHUNK_OVERLAP_TOKENS,
+                   "min_tokens": CHUNK_MIN_TOKENS, "repeats": repeats},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunker throughput benchmark")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--word-tokens", action="store_true",
+                        help="Count whitespace-separated words instead of tokenizer tokens")
+    parser.add_argument("--output", default="chunker_results.json")
+    args = parser.parse_args()
+
+    count_tokens = (lambda text: len(text.split())) if args.word_tokens else default_count_tokens
+    print("✂️  Chunking synthetic textbooks")
+    report = run_benchmark(args.pages, count_tokens, args.repeats)
+    report["config"]["tokenizer"] = "words" if args.word_tokens else get_encoding().name
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
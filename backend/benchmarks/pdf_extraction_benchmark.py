@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+PDF extraction scaling benchmark
+Measures pages/second of pdf_extraction.extract_pages on a synthetic textbook as
+the number of worker processes grows.
+
+Usage (from the backend directory):
+    python -m benchmarks.pdf_extraction_benchmark --pages 300 --output extraction_results.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from pdf_extraction import extract_pages
+from benchmarks.synthetic_corpus import generate_pages, write_pdf
+
+
+def worker_counts(max_workers: int) -> List[int]:
+    """1, 2, 4, ... up to max_workers (always including max_workers)"""
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def run_benchmark(pages: int, max_workers: int, pages_per_task: int, repeats: int) -> Dict:
+    """Time extraction of the same PDF at increasing worker counts"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = write_pdf(generate_pages(pages, sections_per_page=6),
+                             str(Path(tmp_dir) / "synthetic.pdf"))
+        reference = None
+        results = []
+
+        for workers in worker_counts(max_workers):
+            # Warm the pool so process start-up is not billed to the first run
+            extract_pages(pdf_path, workers=workers, pages_per_task=pages_per_task)
+
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                extracted = extract_pages(pdf_path, workers=workers, pages_per_task=pages_per_task)
+                best = min(best, time.perf_counter() - start)
+
+            if reference is None:
+                reference = extracted
+            assert extracted == reference, "page order/content changed with parallelism"
+
+            results.append({
+                "workers": workers,
+                "seconds": round(best, 4),
+                "pages_per_second": round(pages / best, 2),
+                "speedup": round(results[0]["seconds"] / best, 2) if results else 1.0,
+            })
+            print(f"  workers={workers:<3} {results[-1]['pages_per_second']:>9.1f} pages/s "
+                  f"(x{results[-1]['speedup']})")
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "config": {"pages": pages, "pages_per_task": pages_per_task, "repeats": repeats,
+                   "cpu_count": os.cpu_count()},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF extraction scaling benchmark")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pages-per-task", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="extraction_results.json")
+    args = parser.parse_args()
+
+    print(f"📄 Extracting a {args.pages}-page synthetic textbook")
+    report = run_benchmark(args.pages, args.max_workers, args.pages_per_task, args.repeats)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
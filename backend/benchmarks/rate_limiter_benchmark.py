@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Rate limiter microbenchmark
+Feeds a stream of distinct clients through the sliding-window limiter and the
+per-IP timestamp lists main.py used before, reporting time per check and
+traced memory at checkpoints. The limiter's memory should level off at
+RATE_LIMIT_MAX_CLIENTS (or the number of clients active within two windows)
+while the old dictionary keeps growing.
+
+Usage (from the backend directory):
+    python -m benchmarks.rate_limiter_benchmark --clients 1000000 --output rate_limiter_results.json
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from rate_limiter import RATE_LIMIT, RATE_WINDOW, SlidingWindowLimiter
+
+
+class LegacyLimiter:
+    """The list-per-IP check from main.py before the sliding-window limiter"""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.request_counts = defaultdict(list)
+
+    def check(self, key: str, now: float) -> bool:
+        self.request_counts[key] = [t for t in self.request_counts[key] if now - t < self.window]
+        if len(self.request_counts[key]) >= self.limit:
+            return False
+        self.request_counts[key].append(now)
+        return True
+
+
+def run(make_check: Callable[[], Callable[[str, float], object]], clients: int,
+        requests_per_second: float, checkpoints: List[int]) -> List[Dict]:
+    """
+    One request per distinct client, arriving at `requests_per_second` (simulated
+    clock). Runs twice on fresh limiters: once timed, once under tracemalloc
+    (which would distort the timings).
+    """
+    keys = lambda: (f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}#{i}" for i in range(1, clients + 1))
+    rows = {n: {"clients": n} for n in checkpoints}
+
+    check = make_check()
+    last_time, last_count = time.perf_counter(), 0
+    for i, key in enumerate(keys(), start=1):
+        check(key, i / requests_per_second)
+        if i in rows:
+            now = time.perf_counter()
+            rows[i]["us_per_check"] = round((now - last_time) * 1e6 / (i - last_count), 2)
+            last_time, last_count = now, i
+
+    check = make_check()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for i, key in enumerate(keys(), start=1):
+        check(key, i / requests_per_second)
+        if i in rows:
+            rows[i]["traced_mb"] = round((tracemalloc.get_traced_memory()[0] - baseline) / 1e6, 1)
+    tracemalloc.stop()
+
+    for row in rows.values():
+        print(f"    {row['clients']:>9,} clients  {row['traced_mb']:>8} MB  {row['us_per_check']:>6} us/check")
+    return list(rows.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate limiter memory and latency benchmark")
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    parser.add_argument("--requests-per-second", type=float, default=2000.0,
+                        help="Arrival rate of the simulated clients")
+    parser.add_argument("--max-clients", type=int, default=100_000)
+    parser.add_argument("--skip-legacy", action="store_true", help="Only run the new limiter")
+    parser.add_argument("--output", default="rate_limiter_results.json")
+    args = parser.parse_args()
+
+    checkpoints = sorted({min(args.clients, n) for n in (10_000, 100_000, 250_000, 500_000, args.clients)})
+    report = {"timestamp": datetime.now().isoformat(),
+              "config": {"clients": args.clients, "requests_per_second": args.requests_per_second,
+                         "max_clients": args.max_clients, "limit": RATE_LIMIT, "window": RATE_WINDOW}}
+
+    print(f"🚦 Sliding-window limiter (max_clients={args.max_clients:,})")
+    limiters = []
+
+    def new_limiter():
+        limiters.append(SlidingWindowLimiter(RATE_LIMIT, RATE_WINDOW, max_clients=args.max_clients))
+        return limiters[-1].check
+
+    report["sliding_window"] = run(new_limiter, args.clients, args.requests_per_second, checkpoints)
+    report["sliding_window_tracked"] = len(limiters[-1])
+    print(f"  tracked clients at the end: {len(limiters[-1]):,} (evicted {limiters[-1].evicted:,})")
+
+    if not args.skip_legacy:
+        print("🚦 Legacy per-IP timestamp lists")
+        legacies = []
+
+        def new_legacy():
+            legacies.append(LegacyLimiter(RATE_LIMIT, RATE_WINDOW))
+            return legacies[-1].check
+
+        report["legacy"] = run(new_legacy, args.clients, args.requests_per_second, checkpoints)
+        print(f"  tracked clients at the end: {len(legacies[-1].request_counts):,}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
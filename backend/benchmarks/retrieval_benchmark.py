@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Offline retrieval benchmark for Mualleem AI Tutor
+Indexes a synthetic Arabic curriculum PDF through RAGService.index_pdf and runs
+labeled queries through query_similar_chunks, timing every stage and scoring
+retrieval quality. No network access is needed: without the cached tiktoken
+encoding, chunks are sized in UTF-8 bytes (EMBEDDING_TOKENIZER_FALLBACK,
+recorded as config.tokenizer).
+
+Usage (from the backend directory):
+    python -m benchmarks.retrieval_benchmark --pages 50 --k 3 --output benchmark_results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# Must be set before rag_service is imported: use in-process Qdrant, and size
+# chunks in bytes if the tokenizer cannot be downloaded
+os.environ["QDRANT_URL"] = ":memory:"
+os.environ.setdefault("EMBEDDING_TOKENIZER_FALLBACK", "true")
+
+from rag_service import RAGService  # noqa: E402
+from embedding_batcher import get_encoding  # noqa: E402
+from benchmarks.stub_embedder import HashedNGramEmbedder  # noqa: E402
+from benchmarks.synthetic_corpus import generate_pages, generate_questions, write_pdf  # noqa: E402
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict:
+    """Latency summary in milliseconds"""
+    ms = [v * 1000 for v in values]
+    return {
+        "mean_ms": round(statistics.mean(ms), 3),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+    }
+
+
+def run_benchmark(pages: int, k: int, seed: int, verbose: bool = False) -> Dict:
+    """Index the synthetic corpus and run the labeled queries"""
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    embedder = HashedNGramEmbedder()
+
+    corpus = generate_pages(pages, seed=seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = write_pdf(corpus, str(Path(tmp_dir) / "synthetic.pdf"))
+
+        with quiet:
+            service = RAGService(embedder=embedder)
+            index_start = time.perf_counter()
+            index_result = service.index_pdf(pdf_path, document_name="synthetic.pdf")
+            index_time = time.perf_counter() - index_start
+
+    # Only ask about topics that actually made it into the corpus
+    corpus_text = "\n".join(corpus)
+    questions = [q for q in generate_questions(seed=seed) if q["term"] in corpus_text]
+    embedding_times, search_times = [], []
+    hits, reciprocal_ranks = 0, []
+
+    with quiet:
+        for item in questions:
+            result = service.query_similar_chunks(item["question"], n_results=k)
+            embedding_times.append(result["stage_timings"]["embedding"])
+            search_times.append(result["stage_timings"]["search"])
+
+            rank = next(
+                (i for i, chunk in enumerate(result["context_chunks"], start=1)
+                 if item["term"] in chunk["text"]),
+                None,
+            )
+            if rank is not None:
+                hits += 1
+            reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "config": {"pages": pages, "k": k, "seed": seed, "embedder": "hashed-ngram",
+                   "dimensions": embedder.dimensions, "tokenizer": get_encoding().name},
+        "indexing": {
+            "total_chunks": index_result["total_chunks"],
+            "total_characters": index_result["total_characters"],
+            "total_seconds": round(index_time, 4),
+            "pages_per_second": round(pages / index_time, 2),
+            "stage_timings": index_result["stage_timings"],
+        },
+        "query": {
+            "questions": len(questions),
+            f"hit_rate_at_{k}": round(hits / len(questions), 4),
+            "mrr": round(statistics.mean(reciprocal_ranks), 4),
+            "embedding": summarize(embedding_times),
+            "search": summarize(search_times),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark")
+    parser.add_argument("--pages", type=int, default=50, help="Synthetic textbook pages")
+    parser.add_argument("--k", type=int, default=3, help="Results per query")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--verbose", action="store_true", help="Show RAGService output")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.pages, args.k, args.seed, verbose=args.verbose)
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Response serialization benchmark
+Compares the stdlib JSON encoder FastAPI used before (JSONResponse.render) with
+orjson, and the bytes on the wire uncompressed, gzipped and (when the brotli
+package is installed) Brotli-compressed, for typical /chat and /reviews/recent
+payloads.
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization_benchmark --output serialization_results.json
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+import orjson
+
+from response_compression import brotli, compress_body
+
+ANSWER_SENTENCES = [
+    "لنبدأ بفهم السؤال: المطلوب إيجاد قيمة $x$ في المعادلة $2x + 3 = 11$.",
+    "الخطوة الأولى: نطرح $3$ من طرفي المعادلة فنحصل على $2x = 8$.",
+    "الخطوة الثانية: نقسم الطرفين على $2$ فنجد أن $x = 4$.",
+    "للتحقق من الحل نعوض القيمة في المعادلة الأصلية: $2(4) + 3 = 11$ وهذا صحيح.",
+    "تذكر دائماً أن ما نفعله في طرف من المعادلة يجب أن نفعله في الطرف الآخر.",
+    "مثال إضافي: إذا كانت $\\frac{x}{3} = 5$ فإننا نضرب الطرفين في $3$ لنحصل على $x = 15$.",
+    "نصيحة مفيدة: اكتب كل خطوة في سطر مستقل حتى يسهل عليك مراجعة الحل.",
+]
+
+
+def chat_payload(rng: random.Random, sentences: int) -> dict:
+    """A /chat response with a step-by-step Arabic answer of `sentences` sentences"""
+    answer = "\n\n".join(rng.choice(ANSWER_SENTENCES) for _ in range(sentences))
+    return {
+        "answer": answer,
+        "question": "كيف أحل المعادلة 2x + 3 = 11؟ أرجو الشرح خطوة بخطوة مع التحقق من الحل.",
+        "has_image": False,
+        "context_used": True,
+        "model_used": "openai/gpt-4o-mini",
+        "provider": "Requesty.ai Gateway",
+        "performance_metrics": {
+            "total_time": 3.412,
+            "qdrant_query_time": 0.087,
+            "requesty_api_time": 3.201,
+            "image_processing_time": 0.0,
+        },
+    }
+
+
+def recent_reviews_payload(rng: random.Random, count: int) -> dict:
+    """A /reviews/recent response with `count` reviews"""
+    feedback = [
+        "شرح واضح جداً، شكراً لكم!",
+        "الإجابة صحيحة لكن أتمنى أمثلة أكثر على الكسور.",
+        "ممتاز، ساعدني في فهم الدرس قبل الاختبار.",
+        "الخطوات كانت طويلة قليلاً.",
+    ]
+    reviews = [{
+        "id": f"{rng.getrandbits(128):032x}",
+        "rating": rng.randint(1, 5),
+        "feedback": rng.choice(feedback),
+        "created_at": f"2025-11-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:14:03.512Z",
+        "model_used": rng.choice(["openai/gpt-4o", "openai/gpt-4o-mini"]),
+    } for _ in range(count)]
+    return {"reviews": reviews, "count": len(reviews)}
+
+
+def stdlib_render(content) -> bytes:
+    """What starlette's JSONResponse.render does"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def per_call_us(fn: Callable[[], object], iterations: int) -> float:
+    """Average CPU microseconds per call"""
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) * 1e6 / iterations
+
+
+def measure(name: str, payload: dict, iterations: int) -> Dict:
+    body = orjson.dumps(payload)
+    assert json.loads(body) == json.loads(stdlib_render(payload))
+    result = {
+        "payload": name,
+        "stdlib_us": round(per_call_us(lambda: stdlib_render(payload), iterations), 1),
+        "orjson_us": round(per_call_us(lambda: orjson.dumps(payload), iterations), 1),
+        "bytes": len(body),
+        "ascii_escaped_bytes": len(json.dumps(payload).encode("utf-8")),
+        "gzip_bytes": len(compress_body(body, "gzip")),
+        "gzip_us": round(per_call_us(lambda: compress_body(body, "gzip"), max(iterations // 10, 1)), 1),
+    }
+    if brotli is not None:
+        result["br_bytes"] = len(compress_body(body, "br"))
+        result["br_us"] = round(per_call_us(lambda: compress_body(body, "br"), max(iterations // 10, 1)), 1)
+    result["speedup"] = round(result["stdlib_us"] / result["orjson_us"], 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization and compression benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", default="serialization_results.json")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    payloads = {
+        "chat_short": chat_payload(rng, 6),
+        "chat_long": chat_payload(rng, 60),
+        "reviews_recent_10": recent_reviews_payload(rng, 10),
+        "reviews_recent_100": recent_reviews_payload(rng, 100),
+    }
+
+    print(f"🧮 Serializing {len(payloads)} payloads ({args.iterations} iterations each)"
+          + ("" if brotli is not None else "; brotli not installed, gzip only"))
+    results = []
+    for name, payload in payloads.items():
+        result = measure(name, payload, args.iterations)
+        results.append(result)
+        compressed = f"gzip {result['gzip_bytes']:>6}B"
+        if "br_bytes" in result:
+            compressed += f"  br {result['br_bytes']:>6}B"
+        print(f"  {name:<20} stdlib {result['stdlib_us']:>8}us  orjson {result['orjson_us']:>7}us "
+              f"(x{result['speedup']})  raw {result['bytes']:>6}B  {compressed}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "iterations": args.iterations,
+                   "brotli": brotli is not None, "results": results}, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Server load test: single process vs. the production launcher
+Starts the API the way `main.py` used to (`uvicorn.run(app)`: one process,
+default settings), then with `serve.py` (gunicorn, one tuned uvicorn worker per
+core), and drives each with the same keep-alive HTTP load at several
+concurrency levels. Reports requests/s, latency percentiles and errors.
+
+Both servers start with whatever backend/.env configures. The default path,
+/health, touches no upstream service, so the numbers measure the server itself;
+pass --path to load another endpoint. The load generator shares the CPUs
+with the server: use --url to load a server running on another machine.
+
+Usage (from the backend directory):
+    python -m benchmarks.server_load_benchmark --duration 10 --output server_load_results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+
+from serve import default_workers
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode: str, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "HOST": "127.0.0.1", "PORT": str(port)}
+    if mode == "single":
+        command = [sys.executable, "-c",
+                   f"import uvicorn; from main import app; uvicorn.run(app, host='127.0.0.1', port={port})"]
+    else:
+        env["WEB_CONCURRENCY"] = str(workers)
+        command = [sys.executable, "serve.py"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_up(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server at {url} did not come up within {timeout:.0f}s")
+
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def load(url: str, concurrency: int, duration: float) -> Dict:
+    """`concurrency` clients each sending requests back to back over keep-alive connections"""
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code >= 500:
+                        errors += 1
+                    else:
+                        latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p95_ms": round(quantiles[94] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+    }
+
+
+def run_levels(url: str, levels: List[int], duration: float) -> List[Dict]:
+    rows = []
+    for concurrency in levels:
+        row = asyncio.run(load(url, concurrency, duration))
+        print(f"    c={concurrency:<4} {row['requests_per_second']:>9,.1f} req/s  p50 {row['p50_ms']:>7} ms  "
+              f"p95 {row['p95_ms']:>7} ms  p99 {row['p99_ms']:>7} ms  errors {row['errors']}")
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-process vs. multi-worker server load test")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--concurrency", default="16,64,256", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--workers", type=int, default=None, help="serve.py workers (default: CPU cores)")
+    parser.add_argument("--url", default=None, help="Load an already running server instead")
+    parser.add_argument("--output", default="server_load_results.json")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    workers = args.workers or default_workers()
+    report = {"timestamp": datetime.now().isoformat(), "path": args.path, "duration": args.duration}
+
+    if args.url:
+        print(f"🔥 {args.url}{args.path}")
+        report["external"] = run_levels(f"{args.url}{args.path}", levels, args.duration)
+    else:
+        for mode, label in (("single", "single uvicorn process (previous main.py)"),
+                            ("serve", f"serve.py with {workers} workers")):
+            port = free_port()
+            print(f"🔥 {label}")
+            process = start_server(mode, port, workers)
+            try:
+                wait_until_up(f"http://127.0.0.1:{port}")
+                report[mode] = run_levels(f"http://127.0.0.1:{port}{args.path}", levels, args.duration)
+            finally:
+                stop_server(process)
+        report["workers"] = workers
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Shared-state overhead benchmark
+Per-operation cost of the SQLite WAL store that workers share, next to the
+per-process in-memory limiter and cache it replaces, plus a multi-process run.
+In that run every worker hammers one key, and the total number of allowed
+requests must equal the limit: one worker's worth, not N times the limit.
+
+Usage (from the backend directory):
+    python -m benchmarks.shared_state_benchmark --workers 4 --output shared_state_results.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+from rate_limiter import SlidingWindowLimiter
+from shared_state import MemoryCache, SharedStateStore
+
+REVIEW_STATS = {"total_reviews": 1234, "average_rating": 4.21,
+                "rating_distribution": {"1": 40, "2": 61, "3": 150, "4": 402, "5": 581}}
+
+
+def per_op_us(fn: Callable[[int], object], operations: int) -> float:
+    start = time.perf_counter()
+    for i in range(operations):
+        fn(i)
+    return (time.perf_counter() - start) * 1e6 / operations
+
+
+def single_process(db_path: str, operations: int) -> Dict[str, float]:
+    limiter = SlidingWindowLimiter(limit=10**9, window=60)
+    store = SharedStateStore(db_path)
+    memory_cache = MemoryCache()
+    memory_cache.set("review_stats", REVIEW_STATS, 60)
+    store.set("review_stats", REVIEW_STATS, 60)
+    return {
+        "memory_rate_limit_us": per_op_us(lambda i: limiter.check(f"ip:{i % 5000}"), operations),
+        "sqlite_rate_limit_us": per_op_us(
+            lambda i: store.check_rate_limit(f"ip:{i % 5000}", 10**9, 60), operations),
+        "memory_cache_get_us": per_op_us(lambda i: memory_cache.get("review_stats"), operations),
+        "sqlite_cache_get_us": per_op_us(lambda i: store.get("review_stats"), operations),
+        "memory_cache_set_us": per_op_us(lambda i: memory_cache.set("review_stats", REVIEW_STATS, 60),
+                                         operations),
+        "sqlite_cache_set_us": per_op_us(lambda i: store.set("review_stats", REVIEW_STATS, 60), operations),
+    }
+
+
+def worker(db_path: str, operations: int, limit: int, barrier, results):
+    store = SharedStateStore(db_path)
+    barrier.wait()
+    allowed = 0
+    start = time.perf_counter()
+    for i in range(operations):
+        allowed += store.check_rate_limit("ip:203.0.113.7", limit, 3600).allowed
+        store.check_rate_limit(f"ip:{os.getpid()}:{i % 1000}", 10**9, 60)
+    results.put((allowed, time.perf_counter() - start))
+
+
+def multi_process(db_path: str, workers: int, operations: int, limit: int) -> Dict:
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(db_path, operations, limit, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    checks = workers * operations * 2
+    slowest = max(seconds for _, seconds in outcomes)
+    return {
+        "workers": workers,
+        "checks": checks,
+        "checks_per_second": round(checks / slowest),
+        "us_per_check_per_worker": round(slowest * 1e6 / (operations * 2), 1),
+        "hot_key_limit": limit,
+        "hot_key_allowed": sum(allowed for allowed, _ in outcomes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-state (SQLite WAL) overhead benchmark")
+    parser.add_argument("--operations", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=100, help="Limit for the shared hot key")
+    parser.add_argument("--output", default="shared_state_results.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"🗄  Single process, {args.operations} operations each")
+        single = {name: round(value, 2)
+                  for name, value in single_process(os.path.join(directory, "single.db"), args.operations).items()}
+        for name, value in single.items():
+            print(f"  {name:<24} {value:>8} us")
+
+        print(f"🗄  {args.workers} worker processes sharing one database")
+        multi = multi_process(os.path.join(directory, "multi.db"), args.workers,
+                              args.operations // args.workers, args.limit)
+        print(f"  {multi['checks_per_second']:,} checks/s total, {multi['us_per_check_per_worker']} us/check "
+              f"per worker; hot key allowed {multi['hot_key_allowed']} of limit {multi['hot_key_limit']}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "single_process": single,
+                   "multi_process": multi}, f, indent=2)
+    print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Synthetic Arabic curriculum corpus generator
+Builds seeded, reproducible textbook pages from subject/topic templates and writes
+them to a real PDF so the extraction stage is exercised as well.
+
+Each topic has a unique key term, which doubles as the relevance label for the
+generated questions: a retrieved chunk is relevant if it contains the term.
+"""
+
+import random
+from pathlib import Path
+from typing import Dict, List
+
+SUBJECTS = {
+    "الرياضيات": [
+        "المعادلة التربيعية", "نظرية فيثاغورس", "المتتالية الحسابية", "الدوال الأسية",
+        "المصفوفات", "الاحتمالات الشرطية", "المشتقة الأولى", "التكامل المحدد",
+        "اللوغاريتم الطبيعي", "المثلثات المتشابهة", "الكسور العشرية", "المتباينات الخطية",
+    ],
+    "الفيزياء": [
+        "قانون نيوتن الثاني", "الطاقة الحركية", "الشغل الميكانيكي", "قانون أوم",
+        "الموجات الصوتية", "انكسار الضوء", "الجاذبية الأرضية", "كمية الحركة",
+        "المجال المغناطيسي", "الحرارة النوعية",
+    ],
+    "الكيمياء": [
+        "الجدول الدوري", "الروابط التساهمية", "التفاعلات الحمضية", "الكتلة المولية",
+        "الأكسدة والاختزال", "المحاليل المشبعة", "سرعة التفاعل", "الغازات المثالية",
+    ],
+    "الأحياء": [
+        "الخلية النباتية", "البناء الضوئي", "الجهاز الهضمي", "الوراثة المندلية",
+        "الجهاز العصبي", "التنفس الخلوي", "السلاسل الغذائية", "الانقسام المتساوي",
+    ],
+    "اللغة العربية": [
+        "الجملة الاسمية", "الفعل المضارع", "المفعول به", "البلاغة والتشبيه",
+        "همزة الوصل", "الممنوع من الصرف", "العروض والقافية", "أسلوب الشرط",
+    ],
+}
+
+SENTENCE_TEMPLATES = [
+    "يعد موضوع {term} من الموضوعات الأساسية في مادة {subject}.",
+    "عند دراسة {term} يجب على الطالب أن يفهم المفاهيم السابقة جيداً.",
+    "نستخدم {term} لحل كثير من المسائل في الحياة اليومية.",
+    "مثال، طبق مفهوم {term} على المسألة التالية وبين خطوات الحل.",
+    "لاحظ أن {term} يرتبط ارتباطاً وثيقاً بما درسناه في الوحدة السابقة.",
+    "هل يمكنك أن تشرح {term} بأسلوبك الخاص؟",
+    "تمرين، اكتب ثلاثة أمثلة على {term} من كتابك المدرسي.",
+    "الخلاصة، يساعدنا {term} على فهم الظواهر من حولنا بطريقة منهجية.",
+]
+
+FILLER_SENTENCES = [
+    "اقرأ الفقرة التالية بتمعن ثم أجب عن الأسئلة.",
+    "تذكر أن المراجعة المستمرة أساس التفوق الدراسي.",
+    "ناقش مع زملائك ما تعلمته في هذا الدرس.",
+    "ارسم مخططاً يوضح العلاقة بين المفاهيم.",
+    "راجع التعريفات الواردة في بداية الوحدة.",
+]
+
+QUESTION_TEMPLATES = [
+    "ما هو {term}؟",
+    "اشرح {term} خطوة بخطوة",
+    "أعطني مثالاً على {term}",
+]
+
+
+def _arabic_digits(number: int) -> str:
+    """Render a number with Arabic-Indic digits, as printed in Arabic textbooks"""
+    return str(number).translate(str.maketrans("0123456789", "٠١٢٣٤٥٦٧٨٩"))
+
+
+def generate_pages(num_pages: int, seed: int = 42, sections_per_page: int = 3) -> List[str]:
+    """
+    Generate synthetic textbook pages
+
+    Args:
+        num_pages: Number of pages to generate
+        seed: Random seed (same seed = same corpus)
+        sections_per_page: Topic sections per page
+
+    Returns:
+        List of page texts
+    """
+    rng = random.Random(seed)
+    topics = [(subject, term) for subject, terms in SUBJECTS.items() for term in terms]
+    pages = []
+    lesson = 1
+
+    for _ in range(num_pages):
+        lines = []
+        for _ in range(sections_per_page):
+            subject, term = rng.choice(topics)
+            lines.append(f"الدرس {_arabic_digits(lesson)} - {term}")
+            lesson += 1
+            sentences = rng.sample(SENTENCE_TEMPLATES, k=4) + rng.sample(FILLER_SENTENCES, k=2)
+            rng.shuffle(sentences)
+            for sentence in sentences:
+                lines.append(sentence.format(term=term, subject=subject))
+            lines.append("")
+        pages.append("\n".join(lines).strip())
+
+    return pages
+
+
+def generate_questions(seed: int = 42, per_topic: int = 1) -> List[Dict]:
+    """
+    Generate labeled questions, one group per topic
+
+    Returns:
+        List of {"question", "subject", "term"} dictionaries
+    """
+    rng = random.Random(seed)
+    questions = []
+    for subject, terms in SUBJECTS.items():
+        for term in terms:
+            for template in rng.sample(QUESTION_TEMPLATES, k=per_topic):
+                questions.append({
+                    "question": template.format(term=term),
+                    "subject": subject,
+                    "term": term,
+                })
+    return questions
+
+
+def _hex_string(text: str, codes: Dict[str, int]) -> str:
+    """Encode text with the single-byte code table as a PDF hex string"""
+    return "<" + "".join(f"{codes[ch]:02X}" for ch in text) + ">"
+
+
+def write_pdf(pages: List[str], path: str) -> str:
+    """
+    Write pages to a minimal PDF whose text extracts back as the original Arabic
+
+    The glyphs are not meant to be readable: characters are mapped to single-byte
+    codes of a standard font and a ToUnicode CMap maps them back, which is all
+    pypdf needs to extract the text exactly.
+
+    Args:
+        pages: Page texts
+        path: Output file path
+
+    Returns:
+        The output path
+    """
+    alphabet = sorted({ch for page in pages for ch in page if ch != "\n"} - {" "})
+    if len(alphabet) > 222:
+        raise ValueError("Corpus alphabet too large for a single-byte font encoding")
+    codes = {" ": 0x20}
+    codes.update({ch: 0x21 + i for i, ch in enumerate(alphabet)})
+
+    cmap_lines = [
+        "/CIDInit /ProcSet findresource begin",
+        "12 dict begin",
+        "begincmap",
+        "/CMapName /Synthetic-UCS def",
+        "/CMapType 2 def",
+        "1 begincodespacerange <00> <FF> endcodespacerange",
+    ]
+    mappings = sorted(codes.items(), key=lambda item: item[1])
+    for start in range(0, len(mappings), 100):
+        block = mappings[start:start + 100]
+        cmap_lines.append(f"{len(block)} beginbfchar")
+        for ch, code in block:
+            cmap_lines.append(f"<{code:02X}> <{ord(ch):04X}>")
+        cmap_lines.append("endbfchar")
+    cmap_lines += ["endcmap", "CMapName currentdict /CMap defineresource pop", "end", "end"]
+    cmap = "\n".join(cmap_lines).encode("latin-1")
+
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    def stream(data: bytes) -> bytes:
+        return b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream"
+
+    catalog_id = add(b"")  # filled in once the page tree exists
+    pages_id = add(b"")
+    cmap_id = add(stream(cmap))
+    font_id = add(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        b"/Encoding /WinAnsiEncoding /ToUnicode %d 0 R >>" % cmap_id
+    )
+
+    page_ids = []
+    for page in pages:
+        content = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+        for line in page.split("\n"):
+            content.append(f"{_hex_string(line[::-1], codes)} Tj T*")
+        content.append("ET")
+        content_id = add(stream("\n".join(content).encode("latin-1")))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, content_id)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+
+    Path(path).write_bytes(bytes(output))
+    return path
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Bulk Curriculum Ingestion for Mualleem Platform
+Indexes every PDF under a directory without going through the HTTP API.
+Several books are indexed at once: their page ranges are parsed on the shared
+extraction process pool and their embedding requests go through the service's
+single rate-limited dispatcher, so the books back off together when Requesty.ai
+pushes back. Progress is checkpointed after every book, and re-running the same
+command resumes where an interrupted run stopped. Books get the same document
+names as uploads, and a book whose content is already indexed (uploaded through
+the API, or found under another path) is skipped.
+
+Usage:
+    python bulk_ingest.py /mnt/district_textbooks
+    python bulk_ingest.py /mnt/district_textbooks --books 4 --output bulk_ingest_report.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from document_registry import document_name_for, file_sha256
+from rag_service import rag_service
+
+BULK_INGEST_BOOKS = int(os.getenv("BULK_INGEST_BOOKS", "2"))
+CHECKPOINT_PATH = os.getenv("BULK_INGEST_CHECKPOINT", "./data/bulk_ingest_checkpoint.json")
+
+
+class Checkpoint:
+    """JSON record of finished books, keyed by path and content hash"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f).get("books", {})
+
+    def is_done(self, book_path: str, file_hash: str) -> bool:
+        entry = self.entries.get(book_path)
+        return entry is not None and entry["file_hash"] == file_hash and entry["status"] != "failed"
+
+    def record(self, book_path: str, entry: dict):
+        """Store a book's outcome and rewrite the checkpoint atomically"""
+        with self._lock:
+            self.entries[book_path] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"updated_at": datetime.now().isoformat(), "books": self.entries},
+                          f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+def find_pdfs(root: Path) -> List[Path]:
+    """Every PDF under root, in a stable order"""
+    return sorted(path for path in root.rglob("*") if path.suffix.lower() == ".pdf" and path.is_file())
+
+
+def ingest_book(pdf_path: Path, document_name: str, file_hash: str) -> dict:
+    """Index one book and return its checkpoint entry"""
+    pages = {"total": 0}
+    start = time.perf_counter()
+    try:
+        result = rag_service.index_pdf(
+            str(pdf_path), document_name=document_name, file_hash=file_hash,
+            progress_callback=lambda progress: pages.update(total=progress["pages_total"]),
+        )
+    except Exception as e:
+        print(f"✗ {document_name} failed: {str(e)}")
+        return {"file_hash": file_hash, "document_name": document_name, "status": "failed",
+                "error": str(e), "finished_at": datetime.now().isoformat()}
+
+    seconds = time.perf_counter() - start
+    throughput = result.get("throughput", {})
+    return {
+        "file_hash": file_hash,
+        "document_name": document_name,
+        "status": result["status"],
+        "pages": pages["total"],
+        "chunks": result["total_chunks"],
+        "chunks_added": result["chunks_added"],
+        "embedding_tokens": throughput.get("embedding_tokens", 0),
+        "seconds": round(seconds, 2),
+        "pages_per_second": round(pages["total"] / seconds, 2) if seconds else 0,
+        "chunks_per_second": round(result["chunks_added"] / seconds, 2) if seconds else 0,
+        "tokens_per_second": round(throughput.get("embedding_tokens", 0) / seconds, 2) if seconds else 0,
+        "finished_at": datetime.now().isoformat(),
+    }
+
+
+def ingest_if_changed(pdf_path: Path, key: str, checkpoint: Checkpoint) -> Optional[dict]:
+    """
+    Hash a book and index it unless the checkpoint marks this version as done (then None)
+    
+    Books are named like uploads, and a book whose content is already indexed
+    (uploaded earlier, or found under another path) is not indexed again.
+    """
+    file_hash = file_sha256(str(pdf_path))
+    if checkpoint.is_done(key, file_hash):
+        return None
+    indexed = rag_service.find_live_by_hash(file_hash)
+    if indexed is not None:
+        return {"file_hash": file_hash, "document_name": indexed["document_name"],
+                "status": "already_indexed", "finished_at": datetime.now().isoformat()}
+    return ingest_book(pdf_path, document_name_for(pdf_path.name, file_hash), file_hash)
+
+
+def run(root: Path, books: int, checkpoint: Checkpoint) -> List[dict]:
+    """Index every PDF under root that the checkpoint does not mark as done"""
+    pdf_paths = find_pdfs(root)
+    print(f"📚 {len(pdf_paths)} book(s) found, {books} at a time")
+    finished = []
+    skipped = 0
+    # Books are hashed by the workers, so indexing starts without reading every file first
+    executor = ThreadPoolExecutor(max_workers=books, thread_name_prefix="bulk-ingest")
+    futures = {}
+    for pdf_path in pdf_paths:
+        key = pdf_path.relative_to(root).as_posix()
+        futures[executor.submit(ingest_if_changed, pdf_path, key, checkpoint)] = key
+    try:
+        for done, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            entry = future.result()
+            if entry is None:
+                skipped += 1
+                continue
+            checkpoint.record(key, entry)
+            finished.append({"book": key, **entry})
+            print(f"  [{done}/{len(pdf_paths)}] {key}: {entry['status']}")
+    except KeyboardInterrupt:
+        # Drop the queued books; those already being indexed finish before exit
+        executor.shutdown(wait=False, cancel_futures=True)
+        print("\n⚠ Interrupted; finished books are checkpointed, re-run to resume")
+        raise
+    executor.shutdown()
+    print(f"✓ {skipped} book(s) were already done")
+    return finished
+
+
+def print_summary(finished: List[dict], elapsed: float, stats: Optional[dict] = None):
+    indexed = [entry for entry in finished if entry["status"] not in ("failed", "already_indexed")]
+    print(f"\n{'book':<40} {'pages':>6} {'chunks':>7} {'sec':>8} {'pages/s':>8} {'chunks/s':>9} {'tok/s':>9}")
+    for entry in sorted(indexed, key=lambda e: e["book"]):
+        print(f"{entry['book'][:40]:<40} {entry['pages']:>6} {entry['chunks']:>7} {entry['seconds']:>8} "
+              f"{entry['pages_per_second']:>8} {entry['chunks_per_second']:>9} {entry['tokens_per_second']:>9}")
+
+    failed = sum(1 for entry in finished if entry["status"] == "failed")
+    duplicates = len(finished) - len(indexed) - failed
+    total_pages = sum(entry["pages"] for entry in indexed)
+    print(f"\n✓ {len(indexed)} book(s), {total_pages} pages in {elapsed:.1f}s "
+          f"({total_pages / elapsed if elapsed else 0:.1f} pages/s overall)")
+    if duplicates:
+        print(f"🔁 {duplicates} book(s) were already indexed from the same content")
+    if failed:
+        print(f"✗ {failed} book(s) failed; re-run to retry them")
+    if stats:
+        print(f"  Embedding requests: {stats['requests']}, throttled: {stats['throttled']}, "
+              f"retries: {stats['retries']}, tokens: {stats['tokens']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index every PDF under a directory")
+    parser.add_argument("directory", help="Directory to scan for PDFs (recursively)")
+    parser.add_argument("--books", type=int, default=BULK_INGEST_BOOKS,
+                        help="Books indexed concurrently")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--output", default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    root = Path(args.directory)
+    if not root.is_dir():
+        parser.error(f"not a directory: {root}")
+
+    start = time.perf_counter()
+    finished = run(root, args.books, Checkpoint(args.checkpoint))
+    elapsed = time.perf_counter() - start
+    print_summary(finished, elapsed, rag_service.dispatcher.stats)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "seconds": round(elapsed, 2),
+                       "embedding": rag_service.dispatcher.stats, "books": finished},
+                      f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Blue/Green Collection Versions for Mualleem Platform
+The service reads and writes through a Qdrant alias (QDRANT_COLLECTION_NAME)
+that points at one of several versioned collections ({name}_v1, {name}_v2, ...).
+A reindex builds a new version in the background, warms it, and then moves the
+alias in a single atomic update; the previous version is kept so a rollback is
+just another alias switch.
+
+A collection from before versioning (a plain collection named like the alias)
+is migrated by copying its points into a new version, which then goes live;
+the plain collection is only dropped once the copy is complete.
+
+Usage:
+    python collection_versions.py list
+    python collection_versions.py migrate
+    python collection_versions.py build --max-tokens 300 --switch
+    python collection_versions.py build --quantization int8
+    python collection_versions.py switch 3
+    python collection_versions.py rollback
+    python collection_versions.py prune --keep 2
+"""
+
+import argparse
+import re
+import time
+from functools import partial
+from typing import List, Optional, Tuple
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation, PayloadSchemaType,
+    PointStruct, QuantizationSearchParams, ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    SearchParams, VectorParams,
+)
+
+# Payload fields filtered on per document while re-indexing
+PAYLOAD_INDEX_FIELDS = ("document", "document_version")
+WARMUP_QUERIES = 32
+COPY_BATCH_SIZE = 256  # points per scroll/upsert while migrating a legacy collection
+GREEN_TIMEOUT = 600.0  # seconds to wait for a new version's indexing to finish
+
+
+def version_name(alias: str, version: int) -> str:
+    return f"{alias}_v{version}"
+
+
+def list_versions(client: QdrantClient, alias: str) -> List[Tuple[int, str]]:
+    """Versioned collections behind an alias, oldest first"""
+    pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+    versions = []
+    for collection in client.get_collections().collections:
+        match = pattern.match(collection.name)
+        if match:
+            versions.append((int(match.group(1)), collection.name))
+    return sorted(versions)
+
+
+def alias_target(client: QdrantClient, alias: str) -> Optional[str]:
+    """Collection the alias points at, or None"""
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return None
+
+
+def is_legacy_collection(client: QdrantClient, alias: str) -> bool:
+    """True if `alias` is still a plain collection from before versioning"""
+    return any(collection.name == alias for collection in client.get_collections().collections)
+
+
+def create_version(client: QdrantClient, alias: str, vectors_config: VectorParams,
+                   quantization_config=None, payload_indexes: bool = True) -> str:
+    """Create the next, empty version collection (the alias is not moved)"""
+    versions = list_versions(client, alias)
+    name = version_name(alias, versions[-1][0] + 1 if versions else 1)
+    client.create_collection(collection_name=name, vectors_config=vectors_config,
+                             quantization_config=quantization_config)
+    if payload_indexes:
+        for field_name in PAYLOAD_INDEX_FIELDS:
+            client.create_payload_index(collection_name=name, field_name=field_name,
+                                        field_schema=PayloadSchemaType.KEYWORD)
+    print(f"✓ Created collection version: {name}")
+    return name
+
+
+def switch_alias(client: QdrantClient, alias: str, collection_name: str):
+    """
+    Point the alias at a collection in one atomic update
+
+    Raises:
+        RuntimeError: If `alias` is still a legacy plain collection (Qdrant cannot
+                      have both; migrate_legacy_collection copies it first)
+    """
+    if is_legacy_collection(client, alias):
+        raise RuntimeError(f"{alias} is a plain collection; run `python collection_versions.py migrate` first")
+
+    operations = []
+    if alias_target(client, alias) is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(CreateAliasOperation(
+        create_alias=CreateAlias(collection_name=collection_name, alias_name=alias)
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    print(f"✓ Alias {alias} now points at {collection_name}")
+
+
+def ensure_alias(client: QdrantClient, alias: str, vectors_config: VectorParams,
+                 payload_indexes: bool = True) -> Optional[str]:
+    """
+    Make sure the alias resolves to a collection, creating version 1 if needed
+
+    Returns:
+        The collection behind the alias, or None for a legacy plain collection
+        (it keeps serving until the first switch)
+    """
+    target = alias_target(client, alias)
+    if target is not None:
+        return target
+    if is_legacy_collection(client, alias):
+        print(f"⚠ Warning: {alias} is a plain collection; `python collection_versions.py migrate` "
+              f"copies it into a version behind an alias")
+        return None
+    name = create_version(client, alias, vectors_config, payload_indexes=payload_indexes)
+    switch_alias(client, alias, name)
+    return name
+
+
+def migrate_legacy_collection(client: QdrantClient, alias: str, payload_indexes: bool = True) -> str:
+    """
+    Copy a legacy plain collection into a new version and put the alias in its place
+
+    Points are copied with their ids, vectors and payloads. The plain collection
+    is deleted only after the copy holds as many points, so its data is never
+    lost; between that delete and the alias creation the name briefly does not
+    resolve. Run it while no ingestion is writing to the collection.
+
+    Returns:
+        The version collection now behind the alias
+
+    Raises:
+        RuntimeError: If the copy ends up with a different number of points
+                      (the legacy collection is left as it was)
+    """
+    config = client.get_collection(alias).config
+    name = create_version(client, alias, config.params.vectors, config.quantization_config,
+                          payload_indexes=payload_indexes)
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name=alias, limit=COPY_BATCH_SIZE, offset=offset,
+                                       with_payload=True, with_vectors=True)
+        if points:
+            client.upsert(collection_name=name, wait=True, points=[
+                PointStruct(id=point.id, vector=point.vector, payload=point.payload) for point in points
+            ])
+        if offset is None:
+            break
+
+    expected = client.count(collection_name=alias, exact=True).count
+    copied = client.count(collection_name=name, exact=True).count
+    if copied != expected:
+        raise RuntimeError(f"copied {copied} of {expected} points from {alias} into {name}; "
+                           f"{alias} was left unchanged")
+    print(f"✓ Copied {copied} points from legacy collection {alias} into {name}")
+    client.delete_collection(collection_name=alias)
+    switch_alias(client, alias, name)
+    return name
+
+
+def count_documents(client: QdrantClient, collection_name: str) -> int:
+    """Number of distinct documents with points in a collection"""
+    documents = set()
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name=collection_name, limit=1000, offset=offset,
+                                       with_payload=["document"], with_vectors=False)
+        documents.update((point.payload or {}).get("document") for point in points)
+        if offset is None:
+            return len(documents)
+
+
+def previous_version(client: QdrantClient, alias: str) -> Optional[str]:
+    """Newest version older than the one the alias points at"""
+    current = alias_target(client, alias)
+    versions = list_versions(client, alias)
+    current_number = next((number for number, name in versions if name == current), None)
+    older = [name for number, name in versions if current_number is None or number < current_number]
+    return older[-1] if older else None
+
+
+def wait_until_green(client: QdrantClient, collection_name: str, timeout: float = GREEN_TIMEOUT) -> bool:
+    """Wait for the optimizer to finish building the index of a collection"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if str(client.get_collection(collection_name).status).lower().endswith("green"):
+            return True
+        time.sleep(2.0)
+    return False
+
+
+def warm_collection(client: QdrantClient, collection_name: str, queries: int = WARMUP_QUERIES) -> float:
+    """
+    Run searches against a collection so its index and vectors are paged in
+
+    Uses vectors already stored in the collection as queries, so warming costs
+    no embedding requests.
+
+    Returns:
+        Average query time in seconds over the warm-up queries
+    """
+    points, _ = client.scroll(collection_name=collection_name, limit=queries, with_vectors=True,
+                              with_payload=False)
+    if not points:
+        return 0.0
+    quantized = client.get_collection(collection_name).config.quantization_config is not None
+    params = SearchParams(quantization=QuantizationSearchParams(rescore=True)) if quantized else None
+    start = time.perf_counter()
+    for point in points:
+        client.query_points(collection_name=collection_name, query=point.vector, limit=5,
+                            search_params=params, with_payload=False)
+    return (time.perf_counter() - start) / len(points)
+
+
+def prune_versions(client: QdrantClient, alias: str, keep: int) -> List[str]:
+    """Delete all but the newest `keep` versions, never the live one"""
+    current = alias_target(client, alias)
+    versions = [name for _, name in list_versions(client, alias)]
+    doomed = [name for name in (versions[:-keep] if keep > 0 else versions) if name != current]
+    for name in doomed:
+        client.delete_collection(collection_name=name)
+        print(f"✓ Deleted collection version: {name}")
+    return doomed
+
+
+def build_version(rag_service, chunker, quantization_config=None, switch: bool = False,
+                  allow_fewer_points: bool = False) -> dict:
+    """
+    Build a new version from the extracted-text cache, warm it, and optionally switch
+
+    Documents indexed into the live version while the build runs are caught up
+    before the switch. The switch is refused if a document could not be rebuilt
+    (no cached text), or if the new version holds fewer documents, or fewer
+    points, than the live one; larger chunks legitimately make fewer points,
+    which allow_fewer_points accepts. A legacy plain collection is migrated
+    first, so the live data is always a version that can be rolled back to.
+
+    Raises:
+        RuntimeError: If the extracted-text cache is disabled
+    """
+    from document_registry import DocumentRegistry
+    from rag_service import QDRANT_LOCAL, RAGService
+    from rebuild_index import rebuild
+
+    if rag_service.text_cache is None:
+        raise RuntimeError("the extracted-text cache is disabled (TEXT_CACHE_ENABLED=false)")
+
+    client, alias = rag_service.client, rag_service.collection_name
+    if is_legacy_collection(client, alias):
+        migrate_legacy_collection(client, alias, payload_indexes=not QDRANT_LOCAL)
+    name = create_version(client, alias, rag_service.vectors_config(), quantization_config,
+                          payload_indexes=not QDRANT_LOCAL)
+    # Shares the live service's connection, caches and embedding rate limit
+    target = RAGService(embedder=rag_service.embedder, embedding_store=rag_service.embedding_store,
+                        collection_name=name, registry=DocumentRegistry(":memory:"),
+                        text_cache=rag_service.text_cache, client=client,
+                        dispatcher=rag_service.dispatcher)
+
+    built = {}
+    missing = set()
+    for _ in range(3):
+        pending = [document for document in rag_service.registry.all()
+                   if built.get(document["document_name"]) != document["file_hash"]
+                   and document["document_name"] not in missing]
+        if not pending:
+            break
+        print(f"🔁 Building {name}: {len(pending)} document(s)")
+        for document, result in zip(pending, rebuild(target, pending, chunker)):
+            if result["status"] == "missing_text":
+                missing.add(document["document_name"])
+            else:
+                built[document["document_name"]] = document["file_hash"]
+
+    if not wait_until_green(client, name):
+        print(f"⚠ Warning: {name} is still optimizing; warming anyway")
+    average = warm_collection(client, name)
+    print(f"✓ Warmed {name} ({average * 1000:.1f} ms/query)")
+
+    live = alias_target(client, alias)
+    live_points = client.count(collection_name=live, exact=True).count
+    points = client.count(collection_name=name, exact=True).count
+    live_documents, documents = count_documents(client, live), count_documents(client, name)
+    problems = []
+    if missing:
+        problems.append(f"no cached text for {', '.join(sorted(missing))}")
+    if documents < live_documents:
+        problems.append(f"{documents} documents, {live} has {live_documents}")
+    if points < live_points and not allow_fewer_points:
+        problems.append(f"{points} points, {live} has {live_points}")
+
+    switched = switch and not problems
+    if switched:
+        switch_alias(client, alias, name)
+    elif switch:
+        print(f"✗ Not switching to {name}: {'; '.join(problems)}")
+    return {"collection": name, "documents": documents, "points": points,
+            "warm_query_ms": round(average * 1000, 2), "switched": switched, "problems": problems}
+
+
+def main():
+    from rag_service import rag_service
+    from text_chunker import CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS, chunk_pages
+
+    parser = argparse.ArgumentParser(description="Manage blue/green collection versions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="Show versions and the live one")
+    subparsers.add_parser("migrate", help="Copy a legacy plain collection into a version behind the alias")
+    build_parser = subparsers.add_parser("build", help="Build a new version from cached text")
+    build_parser.add_argument("--max-tokens", type=int, default=CHUNK_MAX_TOKENS)
+    build_parser.add_argument("--overlap-tokens", type=int, default=CHUNK_OVERLAP_TOKENS)
+    build_parser.add_argument("--min-tokens", type=int, default=CHUNK_MIN_TOKENS)
+    build_parser.add_argument("--quantization", choices=["none", "int8"], default="none")
+    build_parser.add_argument("--switch", action="store_true", help="Switch the alias once warm")
+    build_parser.add_argument("--allow-fewer-points", action="store_true",
+                              help="Switch even if the new version has fewer points (e.g. larger chunks)")
+    switch_parser = subparsers.add_parser("switch", help="Point the alias at a version")
+    switch_parser.add_argument("version", help="Version number or collection name")
+    subparsers.add_parser("rollback", help="Point the alias back at the previous version")
+    prune_parser = subparsers.add_parser("prune", help="Delete old versions")
+    prune_parser.add_argument("--keep", type=int, default=2)
+    args = parser.parse_args()
+
+    client, alias = rag_service.client, rag_service.collection_name
+
+    if args.command == "migrate":
+        if not is_legacy_collection(client, alias):
+            parser.error(f"{alias} is already an alias")
+        migrate_legacy_collection(client, alias)
+    elif args.command == "build":
+        if rag_service.text_cache is None:
+            parser.error("the extracted-text cache is disabled (TEXT_CACHE_ENABLED=false)")
+        quantization = None
+        if args.quantization == "int8":
+            quantization = ScalarQuantization(scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=0.99, always_ram=True))
+        chunker = partial(chunk_pages, max_tokens=args.max_tokens,
+                          overlap_tokens=args.overlap_tokens, min_tokens=args.min_tokens)
+        result = build_version(rag_service, chunker, quantization, switch=args.switch,
+                               allow_fewer_points=args.allow_fewer_points)
+        print(f"✓ Built {result['collection']} with {result['documents']} document(s)"
+              + ("" if result["switched"] or result["problems"] else
+                 f"; run `switch {result['collection']}` to go live"))
+        if not args.switch:
+            for problem in result["problems"]:
+                print(f"⚠ Warning: switching would lose data: {problem}")
+    elif args.command == "switch":
+        name = version_name(alias, int(args.version)) if args.version.isdigit() else args.version
+        switch_alias(client, alias, name)
+    elif args.command == "rollback":
+        name = previous_version(client, alias)
+        if name is None:
+            parser.error("no previous version to roll back to")
+        switch_alias(client, alias, name)
+    elif args.command == "prune":
+        prune_versions(client, alias, args.keep)
+
+    current = alias_target(client, alias)
+    for _, name in list_versions(client, alias):
+        points = client.count(collection_name=name, exact=False).count
+        print(f"  {'*' if name == current else ' '} {name}: ~{points} points")
+
+
+if __name__ == "__main__":
+    main()
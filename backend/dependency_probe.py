@@ -0,0 +1,116 @@
+"""
+Dependency Probes for Mualleem Platform
+A background task checks each external dependency (Qdrant, Requesty.ai,
+Supabase) on a fixed interval and keeps the latest status and latency. /ready
+and /stats answer from that snapshot, so polling them costs no upstream calls.
+Under several workers only one process probes (see background_leader.py); it
+publishes each round to a shared cache and the others read it from there.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+PROBE_INTERVAL_SECONDS = float(os.getenv("PROBE_INTERVAL_SECONDS", "10"))
+PROBE_TIMEOUT_SECONDS = float(os.getenv("PROBE_TIMEOUT_SECONDS", "5"))
+PROBE_CACHE_KEY = "dependency_probe"
+
+
+class DependencyProber:
+    """Runs named probe callables concurrently every `interval` seconds"""
+
+    def __init__(self, probes: Dict[str, Callable[[], Any]], required: Iterable[str] = (),
+                 interval: float = PROBE_INTERVAL_SECONDS, timeout: float = PROBE_TIMEOUT_SECONDS,
+                 cache=None):
+        """
+        Args:
+            probes: Dependency name -> blocking callable that raises if the
+                    dependency is unhealthy; a returned dict is kept as details
+            required: Dependencies that must be up for the service to be ready
+            interval: Seconds between probe rounds
+            timeout: Seconds before a probe counts as failed
+            cache: Optional cache (see shared_state.create_cache) each round is
+                   published to, for processes that do not probe themselves
+        """
+        self.probes = probes
+        self.required = set(required)
+        self.interval = interval
+        self.timeout = timeout
+        self.cache = cache
+        self.results: Dict[str, dict] = {}
+        self.snapshot: Optional[dict] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start probing in the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    async def probe_all(self) -> dict:
+        """Run one round of probes and publish a new snapshot"""
+        results = await asyncio.gather(*(self._probe(name, probe) for name, probe in self.probes.items()))
+        self.results = dict(zip(self.probes, results))
+        ready = all(self.results[name]["status"] == "up" for name in self.required if name in self.results)
+        degraded = [name for name, result in self.results.items() if result["status"] != "up"]
+        self.snapshot = {
+            "status": ("ready" if not degraded else "degraded") if ready else "not_ready",
+            "ready": ready,
+            "checked_at": datetime.now().isoformat(),
+            "dependencies": {
+                name: {key: value for key, value in result.items() if key != "details"}
+                for name, result in self.results.items()
+            },
+        }
+        if self.cache is not None:
+            # Outlives a missed round or two, not a prober that has stopped
+            self.cache.set(PROBE_CACHE_KEY, {"results": self.results, "snapshot": self.snapshot},
+                           ttl=3 * (self.interval + self.timeout))
+        return self.snapshot
+
+    def refresh(self):
+        """In a process that does not probe, load the round last published to the cache"""
+        if self._task is not None or self.cache is None:
+            return
+        published = self.cache.get(PROBE_CACHE_KEY)
+        if published is None:
+            self.results, self.snapshot = {}, None
+        else:
+            self.results, self.snapshot = published["results"], published["snapshot"]
+
+    async def _probe(self, name: str, probe: Callable[[], Any]) -> dict:
+        """Run a probe in a worker thread; a probe still running from the last round is not restarted"""
+        def timed():
+            start = time.perf_counter()
+            details = probe()
+            return details, time.perf_counter() - start
+
+        future = self._inflight.get(name)
+        if future is None or future.done():
+            future = self._inflight[name] = asyncio.ensure_future(run_in_threadpool(timed))
+        done, _ = await asyncio.wait({future}, timeout=self.timeout)
+        checked_at = datetime.now().isoformat()
+        if not done:
+            return {"status": "down", "latency_ms": None, "checked_at": checked_at,
+                    "error": f"no response within {self.timeout:g}s"}
+        try:
+            details, seconds = future.result()
+        except Exception as e:
+            return {"status": "down", "latency_ms": None, "checked_at": checked_at,
+                    "error": str(e) or type(e).__name__}
+        return {"status": "up", "latency_ms": round(seconds * 1000, 1), "checked_at": checked_at,
+                "error": None, "details": details if isinstance(details, dict) else None}
@@ -0,0 +1,111 @@
+"""
+Document Registry for Mualleem Platform
+Local SQLite record of which version (file content hash) of each document is
+indexed, so re-uploading an unchanged file is answered without touching the PDF
+or Qdrant Cloud
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+DOCUMENT_REGISTRY_DB = os.getenv("DOCUMENT_REGISTRY_DB", "./data/documents.db")
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """Content hash of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_name_for(filename: str, file_hash: str) -> str:
+    """
+    Name of a new document: the file's stem plus the start of its content hash,
+    so two books sharing a filename stay apart and the same book gets the same
+    name however it arrives (upload or bulk ingest)
+    """
+    return f"{Path(filename).stem}-{file_hash[:12]}"
+
+
+def chunk_sha256(text: str) -> str:
+    """Content hash of a chunk of text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DocumentRegistry:
+    """Maps document name -> indexed version and size"""
+
+    def __init__(self, db_path: str = DOCUMENT_REGISTRY_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The database, opened on first use rather than when the service is imported (callers hold _lock)"""
+        if self._db is None:
+            if self.db_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    document_name TEXT PRIMARY KEY,
+                    file_hash TEXT NOT NULL,
+                    total_chunks INTEGER NOT NULL,
+                    total_characters INTEGER NOT NULL,
+                    indexed_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_file_hash ON documents(file_hash)")
+            conn.commit()
+            self._db = conn
+        return self._db
+
+    def get(self, document_name: str) -> Optional[dict]:
+        """Indexed version of a document, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE document_name = ?", (document_name,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def find_by_hash(self, file_hash: str) -> Optional[dict]:
+        """Any document indexed from a file with this content hash, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE file_hash = ? LIMIT 1", (file_hash,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def all(self) -> List[dict]:
+        """Every indexed document, by name"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM documents ORDER BY document_name").fetchall()
+        return [dict(row) for row in rows]
+
+    def record(self, document_name: str, file_hash: str, total_chunks: int, total_characters: int):
+        """Record the version of a document that is now indexed"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents "
+                "(document_name, file_hash, total_chunks, total_characters, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (document_name, file_hash, total_chunks, total_characters, datetime.now().isoformat())
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Forget every document (the collection was emptied)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM documents")
+            self._conn.commit()
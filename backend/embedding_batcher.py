@@ -0,0 +1,122 @@
+"""
+Token-Aware Embedding Batching for Mualleem Platform
+Packs chunks into embedding requests by token count instead of a fixed number
+of chunks. Arabic text tokenizes densely, so a fixed batch size either overshoots
+the provider's per-request token limit or wastes round trips.
+
+tiktoken downloads its encoding on first use (or reads TIKTOKEN_CACHE_DIR). If
+it cannot, indexing fails rather than silently re-chunking every document: chunk
+boundaries, and so chunk hashes, depend on the tokenizer. Offline runs such as
+the benchmarks set EMBEDDING_TOKENIZER_FALLBACK=true to count UTF-8 bytes as
+tokens instead: never fewer than the real count, so every limit still holds, at
+the price of smaller chunks and batches.
+"""
+
+import os
+from typing import Iterable, Iterator, List, Tuple, Union
+
+import tiktoken
+
+# text-embedding-3-* models use the cl100k_base tokenizer
+EMBEDDING_ENCODING = os.getenv("EMBEDDING_ENCODING", "cl100k_base")
+# Provider limits: 8191 tokens per input, 300k tokens and 2048 inputs per request
+EMBEDDING_MAX_TOKENS_PER_INPUT = int(os.getenv("EMBEDDING_MAX_TOKENS_PER_INPUT", "8191"))
+EMBEDDING_MAX_TOKENS_PER_REQUEST = int(os.getenv("EMBEDDING_MAX_TOKENS_PER_REQUEST", "100000"))
+EMBEDDING_MAX_BATCH_ITEMS = int(os.getenv("EMBEDDING_MAX_BATCH_ITEMS", "256"))
+# Offline runs only: chunks sized in bytes do not match an index built with tiktoken
+EMBEDDING_TOKENIZER_FALLBACK = os.getenv("EMBEDDING_TOKENIZER_FALLBACK", "false").lower() == "true"
+
+_encoding = None
+
+
+class ByteEncoding:
+    """Offline stand-in for a tiktoken encoding: one token per UTF-8 byte"""
+
+    name = "utf-8-bytes"
+
+    def encode(self, text: str, disallowed_special=()) -> List[int]:
+        return list(text.encode("utf-8"))
+
+    def decode(self, tokens: List[int]) -> str:
+        return bytes(tokens).decode("utf-8", errors="replace")
+
+
+def get_encoding():
+    """
+    Load the tokenizer once per process
+
+    Raises:
+        RuntimeError: If tiktoken cannot load it and EMBEDDING_TOKENIZER_FALLBACK
+                      is off (the next call tries again)
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding(EMBEDDING_ENCODING)
+        except Exception as e:
+            if not EMBEDDING_TOKENIZER_FALLBACK:
+                print(f"✗ Could not load the {EMBEDDING_ENCODING} tokenizer: {str(e)}")
+                raise RuntimeError(
+                    f"{EMBEDDING_ENCODING} tokenizer unavailable; provide TIKTOKEN_CACHE_DIR or network "
+                    f"access (EMBEDDING_TOKENIZER_FALLBACK=true counts bytes, for offline runs only)"
+                ) from e
+            print(f"⚠ Warning: could not load the {EMBEDDING_ENCODING} tokenizer "
+                  f"({e.__class__.__name__}); counting UTF-8 bytes as tokens")
+            _encoding = ByteEncoding()
+    return _encoding
+
+
+def truncate_to_tokens(text: str, tokens: List[int], max_tokens: int) -> str:
+    """Cut text down to its first max_tokens tokens"""
+    truncated = get_encoding().decode(tokens[:max_tokens])
+    # A cut inside a multi-byte character decodes to a replacement character
+    return truncated.rstrip("�")
+
+
+def token_batches(texts: Iterable[Union[str, Tuple[str, int]]],
+                  max_tokens: int = EMBEDDING_MAX_TOKENS_PER_REQUEST,
+                  max_items: int = EMBEDDING_MAX_BATCH_ITEMS,
+                  max_input_tokens: int = EMBEDDING_MAX_TOKENS_PER_INPUT) -> Iterator[List[str]]:
+    """
+    Group texts into batches bounded by total tokens and item count
+
+    Inputs longer than max_input_tokens are truncated with a warning, so the
+    vector always describes exactly the text that gets stored.
+
+    Args:
+        texts: Texts to embed, in order; a (text, token_count) pair (e.g. a
+               chunk and its TextChunk.tokens) is not tokenized again
+        max_tokens: Token ceiling per request
+        max_items: Item ceiling per request
+        max_input_tokens: Token ceiling per single input
+
+    Yields:
+        Batches of texts, order preserved
+    """
+    encoding = get_encoding()
+    batch: List[str] = []
+    batch_tokens = 0
+
+    for item in texts:
+        if isinstance(item, str):
+            text, token_count = item, None
+        else:
+            text, token_count = item
+        if token_count is None or token_count > max_input_tokens:
+            tokens = encoding.encode(text, disallowed_special=())
+            token_count = len(tokens)
+            if token_count > max_input_tokens:
+                print(f"⚠ Warning: embedding input of {token_count} tokens exceeds "
+                      f"{max_input_tokens}; truncating")
+                text = truncate_to_tokens(text, tokens, max_input_tokens)
+                token_count = max_input_tokens
+
+        if batch and (batch_tokens + token_count > max_tokens or len(batch) >= max_items):
+            yield batch
+            batch, batch_tokens = [], 0
+
+        batch.append(text)
+        batch_tokens += token_count
+
+    if batch:
+        yield batch
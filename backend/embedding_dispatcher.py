@@ -0,0 +1,169 @@
+"""
+Concurrent Embedding Dispatcher for Mualleem Platform
+Sends embedding batches to Requesty.ai concurrently under an AIMD concurrency
+limit: the limit grows by one after a full window of successful requests and is
+halved on 429s, 5xx responses and connection errors, which are retried with
+exponential backoff. Results are returned in submission order.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import openai
+
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "8"))
+EMBEDDING_INITIAL_CONCURRENCY = int(os.getenv("EMBEDDING_INITIAL_CONCURRENCY", "2"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+BACKOFF_BASE = 0.5  # seconds, doubled on every retry
+BACKOFF_MAX = 30.0
+
+
+class EmbeddedBatch(NamedTuple):
+    texts: List[str]
+    embeddings: List[List[float]]
+    tokens: int
+    seconds: float
+
+
+def retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Seconds to wait before retrying a failed request, or None if it must not be retried
+
+    Retries 429s (honouring Retry-After), 5xx responses, timeouts and connection errors.
+    """
+    if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+        pass
+    elif isinstance(error, openai.RateLimitError):
+        retry_after = error.response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    elif not (isinstance(error, openai.APIStatusError) and error.status_code >= 500):
+        return None
+
+    delay = min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)  # jitter so workers don't retry in lockstep
+
+
+class AIMDLimiter:
+    """Concurrency limit with additive increase / multiplicative decrease"""
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self.in_flight = 0
+        self._successes = 0
+        self._generation = 0  # bumped on every decrease
+        self._condition = threading.Condition()
+
+    def acquire(self) -> int:
+        """Wait for a free slot; returns the limit generation the request started in"""
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+            return self._generation
+
+    def release(self, generation: int, throttled: bool):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                # Requests sent before the last decrease carry no new information,
+                # so a burst of concurrent 429s only halves the limit once
+                if generation == self._generation:
+                    self.limit = max(self.minimum, self.limit // 2)
+                    self._generation += 1
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self._successes = 0
+            self._condition.notify_all()
+
+
+class EmbeddingDispatcher:
+    """
+    Shared, rate-limit-aware dispatcher for embedding batches
+
+    One instance is shared by every ingestion in the process, so concurrent
+    uploads back off together when the provider pushes back.
+    """
+
+    def __init__(self, embed_fn: Callable[[List[str]], Tuple[List[List[float]], int]],
+                 max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+                 initial_concurrency: int = EMBEDDING_INITIAL_CONCURRENCY,
+                 max_retries: int = EMBEDDING_MAX_RETRIES):
+        """
+        Args:
+            embed_fn: Callable returning (embeddings, tokens_used) for a batch of texts;
+                      it should not retry on its own
+            max_concurrency: Upper bound for concurrent requests
+            initial_concurrency: Starting concurrency
+            max_retries: Retries per batch before the error is raised
+        """
+        self.embed_fn = embed_fn
+        self.max_retries = max_retries
+        self.limiter = AIMDLimiter(initial_concurrency, max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                            thread_name_prefix="embedding-dispatch")
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0, "tokens": 0}
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _embed_with_retry(self, texts: List[str]) -> EmbeddedBatch:
+        attempt = 0
+        while True:
+            generation = self.limiter.acquire()
+            start = time.perf_counter()
+            try:
+                embeddings, tokens = self.embed_fn(texts)
+            except Exception as e:
+                delay = retry_delay(e, attempt)
+                self.limiter.release(generation, throttled=delay is not None)
+                self._count(requests=1, throttled=int(delay is not None))
+                if delay is None or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self._count(retries=1)
+                print(f"⚠ Embedding request throttled ({e.__class__.__name__}), "
+                      f"retry {attempt}/{self.max_retries} in {delay:.1f}s, "
+                      f"concurrency now {self.limiter.limit}")
+                time.sleep(delay)
+                continue
+
+            self.limiter.release(generation, throttled=False)
+            self._count(requests=1, tokens=tokens)
+            return EmbeddedBatch(texts, embeddings, tokens, time.perf_counter() - start)
+
+    def map(self, batches: Iterable[List[str]]) -> Iterator[EmbeddedBatch]:
+        """
+        Embed batches concurrently, yielding results in the order the batches arrive
+
+        Completed-but-unconsumed results are bounded to twice the maximum
+        concurrency, so a slow consumer does not make results pile up in memory.
+        """
+        pending = deque()
+        max_pending = self.limiter.maximum * 2
+        try:
+            for batch in batches:
+                while pending and (pending[0].done() or len(pending) >= max_pending):
+                    yield pending.popleft().result()
+                pending.append(self._executor.submit(self._embed_with_retry, batch))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
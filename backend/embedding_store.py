@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Embedding Store for Mualleem Platform
+Persists embeddings on disk keyed by sha256(model, dimensions, text) so unchanged
+chunks are never sent to Requesty.ai twice.
+
+Layout (one directory per model/dimension pair):
+    vectors.f32   fixed-size float32 records, read through a memory map
+                  (vectors.<n>.f32 after the n-th compaction)
+    index.db      SQLite table mapping key -> record slot and last-used time,
+                  plus the current file generation
+    store.lock    held by writers (appends, compaction) across processes
+
+Usage:
+    python embedding_store.py stats
+    python embedding_store.py compact --max-mb 500
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", "./data/embedding_store")
+EMBEDDING_STORE_ENABLED = os.getenv("EMBEDDING_STORE_ENABLED", "true").lower() == "true"
+
+SQLITE_MAX_VARIABLES = 900  # stay under SQLite's bound-parameter limit
+
+
+def content_key(model: str, dimensions: int, text: str) -> str:
+    """Content address of one embedding"""
+    return hashlib.sha256(f"{model}\0{dimensions}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Append-only vector file plus SQLite index
+
+    Safe to share between threads and processes. Compaction writes the kept
+    records to a new file and bumps the generation in the index; other
+    processes notice the new generation on their next lookup and remap.
+    """
+
+    def __init__(self, model: str, dimensions: int, base_dir: str = EMBEDDING_STORE_DIR):
+        self.model = model
+        self.dimensions = dimensions
+        self.record_size = dimensions * 4
+        slug = model.replace("/", "_")
+        self.directory = Path(base_dir) / f"{slug}-{dimensions}"
+        self.index_path = self.directory / "index.db"
+        self.lock_path = self.directory / "store.lock"
+
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._mapped_generation = -1
+        self._mapped_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The index, opened (and the directory created) on first use rather than at import (callers hold _lock)"""
+        if self._db is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.index_path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    slot INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    generation INTEGER NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO meta (id, generation) VALUES (0, 0)")
+            conn.commit()
+            generation = conn.execute("SELECT generation FROM meta").fetchone()[0]
+            self._vectors_path(generation).touch(exist_ok=True)
+            self._db = conn
+        return self._db
+
+    def _key(self, text: str) -> str:
+        return content_key(self.model, self.dimensions, text)
+
+    def _vectors_path(self, generation: int) -> Path:
+        # Generation 0 keeps the original name, so existing stores stay readable
+        return self.directory / ("vectors.f32" if generation == 0 else f"vectors.{generation}.f32")
+
+    def _generation(self) -> int:
+        return self._conn.execute("SELECT generation FROM meta").fetchone()[0]
+
+    @contextmanager
+    def _store_lock(self):
+        """Exclusive across processes: appends and compaction must not interleave"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def _lookup(self, keys: Sequence[str]) -> Tuple[Dict[str, int], int]:
+        """Slots of the stored keys and the file generation they refer to, from one snapshot"""
+        slots: Dict[str, int] = {}
+        self._conn.execute("BEGIN")
+        try:
+            generation = self._generation()
+            for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                chunk = keys[start:start + SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                slots.update(self._conn.execute(
+                    f"SELECT key, slot FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+        finally:
+            self._conn.commit()
+        return slots, generation
+
+    def _read(self, slot: int, generation: int) -> List[float]:
+        """Read one record through the memory map, remapping if the file grew or was compacted"""
+        end = (slot + 1) * self.record_size
+        if self._mmap is None or generation != self._mapped_generation or end > self._mapped_size:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            with open(self._vectors_path(generation), "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_generation = generation
+            self._mapped_size = len(self._mmap)
+        return array("f", self._mmap[end - self.record_size:end]).tolist()
+
+    def get_many(self, texts: Sequence[str]) -> Dict[int, List[float]]:
+        """
+        Look up stored embeddings
+
+        Returns:
+            Mapping of position in `texts` to vector, for the texts that are stored
+        """
+        keys = [self._key(text) for text in texts]
+        found: Dict[int, List[float]] = {}
+
+        with self._lock:
+            unique_keys = list(dict.fromkeys(keys))
+            for attempt in range(3):
+                slots, generation = self._lookup(unique_keys)
+                try:
+                    for position, key in enumerate(keys):
+                        if key in slots:
+                            found[position] = self._read(slots[key], generation)
+                    break
+                except FileNotFoundError:
+                    # Another process compacted the store (and removed this
+                    # generation's file) after the lookup: look up again
+                    found.clear()
+                    if attempt == 2:
+                        raise
+
+            if slots:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in slots]
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Store embeddings for texts that are not stored yet"""
+        with self._lock, self._store_lock():
+            keys = [self._key(text) for text in texts]
+            existing = set()
+            for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                chunk = keys[start:start + SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                existing.update(row[0] for row in self._conn.execute(
+                    f"SELECT key FROM embeddings WHERE key IN ({placeholders})", chunk
+                ))
+
+            now = time.time()
+            rows = []
+            # Stable while the store lock is held: compaction takes it too
+            with open(self._vectors_path(self._generation()), "ab") as f:
+                f.seek(0, os.SEEK_END)
+                slot, partial = divmod(f.tell(), self.record_size)
+                if partial:
+                    # A crash mid-append left part of a record that no key points
+                    # at; drop it so new records start on a record boundary
+                    f.truncate(slot * self.record_size)
+                for key, vector in zip(keys, vectors):
+                    if key in existing or len(vector) != self.dimensions:
+                        continue
+                    f.write(array("f", vector).tobytes())
+                    rows.append((key, slot, now))
+                    existing.add(key)
+                    slot += 1
+
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, slot, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Size report for the store"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            generation = self._generation()
+        vector_bytes = self._vectors_path(generation).stat().st_size
+        index_bytes = sum(
+            path.stat().st_size for path in self.directory.glob("index.db*") if path.exists()
+        )
+        return {
+            "model": self.model,
+            "dimensions": self.dimensions,
+            "entries": entries,
+            "vector_file_mb": round(vector_bytes / 1024 / 1024, 2),
+            "index_mb": round(index_bytes / 1024 / 1024, 2),
+            "dead_records": vector_bytes // self.record_size - entries,
+            "generation": generation,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def compact(self, max_bytes: Optional[int] = None) -> dict:
+        """
+        Rewrite the vector file keeping the most recently used entries
+
+        Args:
+            max_bytes: Size budget for the vector file; None keeps every live
+                       entry and only drops dead records
+
+        Returns:
+            Dictionary with kept and evicted entry counts
+        """
+        keep_limit = -1 if max_bytes is None else max_bytes // self.record_size
+        with self._lock, self._store_lock():
+            # One write transaction from choosing the keep set to the new slots:
+            # get_many in other processes can't move last_used in between, so the
+            # keys that survive are exactly the ones copied
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                generation = self._generation()
+                rows = self._conn.execute(
+                    "SELECT key, slot FROM embeddings ORDER BY last_used DESC LIMIT ?", (keep_limit,)
+                ).fetchall()
+                kept = {key for key, _ in rows}
+                evicted = [key for (key,) in self._conn.execute("SELECT key FROM embeddings")
+                           if key not in kept]
+
+                old_path, new_path = self._vectors_path(generation), self._vectors_path(generation + 1)
+                with open(old_path, "rb") as src, open(new_path, "wb") as dst:
+                    for _, slot in rows:
+                        src.seek(slot * self.record_size)
+                        dst.write(src.read(self.record_size))
+
+                # New slots and the generation that points at their file change together
+                for start in range(0, len(evicted), SQLITE_MAX_VARIABLES):
+                    chunk = evicted[start:start + SQLITE_MAX_VARIABLES]
+                    placeholders = ",".join("?" * len(chunk))
+                    self._conn.execute(f"DELETE FROM embeddings WHERE key IN ({placeholders})", chunk)
+                self._conn.executemany(
+                    "UPDATE embeddings SET slot = ? WHERE key = ?",
+                    [(new_slot, key) for new_slot, (key, _) in enumerate(rows)]
+                )
+                self._conn.execute("UPDATE meta SET generation = ?", (generation + 1,))
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            # Processes still mapping the old file keep its data until they remap
+            os.remove(old_path)
+            self._conn.execute("VACUUM")
+
+        return {"kept": len(rows), "evicted": len(evicted)}
+
+
+def main():
+    from rag_service import EMBEDDING_DIMENSIONS, EMBEDDING_MODEL
+
+    parser = argparse.ArgumentParser(description="Manage the local embedding store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show store size")
+    compact_parser = subparsers.add_parser("compact", help="Evict least recently used embeddings")
+    compact_parser.add_argument("--max-mb", type=float, default=None,
+                                help="Vector file budget in MB (default: only drop dead records)")
+    args = parser.parse_args()
+
+    store = EmbeddingStore(EMBEDDING_MODEL, EMBEDDING_DIMENSIONS)
+    if args.command == "compact":
+        max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+        result = store.compact(max_bytes)
+        print(f"✓ Compacted store: kept {result['kept']}, evicted {result['evicted']}")
+
+    for key, value in store.stats().items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
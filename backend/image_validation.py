@@ -0,0 +1,193 @@
+"""
+Image Validation for Mualleem Platform
+Reads an uploaded image in chunks up to a size limit, identifies its real format
+from the magic bytes (the filename and Content-Type are client-supplied), and
+reads its dimensions from the header as soon as enough bytes have arrived. An
+upload that is too large, is not a PNG/JPEG/GIF/WEBP, or declares more pixels
+than MAX_IMAGE_PIXELS is rejected before the rest of it is read, so a small
+file that decodes to a huge bitmap (a decompression bomb) never reaches a decoder.
+"""
+
+import os
+import struct
+from typing import NamedTuple, Optional, Tuple
+
+from fastapi import UploadFile
+
+from upload_storage import UploadTooLarge
+
+MAX_IMAGE_MB = float(os.getenv("MAX_IMAGE_MB", "10"))
+MAX_IMAGE_BYTES = int(MAX_IMAGE_MB * 1024 * 1024)
+# A 48 MP phone photo fits; a 50000x50000 bomb does not
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", str(50_000_000)))
+IMAGE_CHUNK_SIZE = 64 * 1024  # bytes per read
+
+# JPEG start-of-frame markers (they carry the dimensions); C4, C8 and CC are not frames
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class InvalidImage(Exception):
+    """The upload is not a well-formed image"""
+
+
+class UnsupportedImageType(InvalidImage):
+    """The content is not PNG, JPEG, GIF or WEBP (whatever the filename says)"""
+
+
+class ImageDimensionsTooLarge(InvalidImage):
+    """The header declares more pixels than allowed"""
+
+    def __init__(self, width: int, height: int, max_pixels: int):
+        super().__init__(f"{width}x{height} image exceeds {max_pixels} pixels")
+        self.width = width
+        self.height = height
+        self.max_pixels = max_pixels
+
+
+class ValidatedImage(NamedTuple):
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """MIME type from the first 12 bytes, or None if not a supported image"""
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def image_dimensions(mime_type: str, data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    (width, height) from the start of an image
+
+    Args:
+        mime_type: Type returned by sniff_image_type
+        data: The image's first bytes (all of them, if the header is long)
+
+    Returns:
+        (width, height), or None if `data` ends before the dimensions
+
+    Raises:
+        InvalidImage: If the header is malformed
+    """
+    if mime_type == "image/png":
+        if len(data) < 24:
+            return None
+        if data[12:16] != b"IHDR":
+            raise InvalidImage("PNG does not start with an IHDR chunk")
+        return struct.unpack(">II", data[16:24])
+    if mime_type == "image/gif":
+        if len(data) < 10:
+            return None
+        return struct.unpack("<HH", data[6:10])
+    if mime_type == "image/webp":
+        return _webp_dimensions(data)
+    if mime_type == "image/jpeg":
+        return _jpeg_dimensions(data)
+    raise UnsupportedImageType(mime_type)
+
+
+def _webp_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    chunk = data[12:16]
+    if len(data) < (25 if chunk == b"VP8L" else 30):
+        return None
+    if chunk == b"VP8X":  # extended: 24-bit canvas size minus one
+        return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    if chunk == b"VP8 ":  # lossy: 14-bit sizes after the key frame start code
+        if data[23:26] != b"\x9d\x01\x2a":
+            raise InvalidImage("WEBP VP8 frame has no start code")
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":  # lossless: 14-bit sizes minus one, packed after the signature
+        if data[20] != 0x2F:
+            raise InvalidImage("WEBP VP8L has no signature")
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    raise InvalidImage(f"unknown WEBP chunk {chunk!r}")
+
+
+def _jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """Walk the marker segments (EXIF and other APPn data come first) to the frame header"""
+    offset = 2
+    while True:
+        # Markers may be padded with extra 0xFF bytes
+        while offset < len(data) and data[offset] == 0xFF:
+            offset += 1
+        if offset + 3 > len(data):
+            return None
+        marker = data[offset]
+        if data[offset - 1] != 0xFF:
+            raise InvalidImage("JPEG segment does not start with a marker")
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # no length field
+            offset += 1
+            continue
+        if marker in (0xD9, 0xDA):
+            raise InvalidImage("JPEG has no frame header before its image data")
+        (length,) = struct.unpack(">H", data[offset + 1:offset + 3])
+        if marker in _JPEG_SOF_MARKERS:
+            if offset + 8 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[offset + 4:offset + 8])
+            return width, height
+        offset += 1 + length
+
+
+async def read_image(upload: UploadFile, max_bytes: int = MAX_IMAGE_BYTES,
+                     max_pixels: int = MAX_IMAGE_PIXELS) -> ValidatedImage:
+    """
+    Read and validate an uploaded image
+
+    The upload is read IMAGE_CHUNK_SIZE bytes at a time. The format is checked
+    on the first chunk and the dimensions as soon as the header is in, so a bad
+    upload is rejected after reading only its start (or max_bytes).
+
+    Args:
+        upload: The uploaded file
+        max_bytes: Size limit
+        max_pixels: Limit on width * height
+
+    Returns:
+        ValidatedImage with the content, sniffed MIME type and dimensions
+
+    Raises:
+        UploadTooLarge: If the upload is larger than max_bytes
+        UnsupportedImageType: If the content is not PNG, JPEG, GIF or WEBP
+        ImageDimensionsTooLarge: If the image has more than max_pixels pixels
+        InvalidImage: If the header is malformed or truncated
+    """
+    # Starlette knows the size of the spooled upload: reject without reading it
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+    data = bytearray()
+    mime_type = None
+    dimensions = None
+    while True:
+        chunk = await upload.read(IMAGE_CHUNK_SIZE)
+        if not chunk:
+            break
+        data += chunk
+        if len(data) > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        if mime_type is None and len(data) >= 12:
+            mime_type = sniff_image_type(bytes(data[:12]))
+            if mime_type is None:
+                raise UnsupportedImageType("unrecognized image signature")
+        if mime_type is not None and dimensions is None:
+            dimensions = image_dimensions(mime_type, data)
+            if dimensions is not None and dimensions[0] * dimensions[1] > max_pixels:
+                raise ImageDimensionsTooLarge(dimensions[0], dimensions[1], max_pixels)
+    if mime_type is None:
+        raise UnsupportedImageType("file too short to be an image")
+    if dimensions is None:
+        raise InvalidImage("image ends before its dimensions")
+    if 0 in dimensions:
+        raise InvalidImage("image has zero width or height")
+    return ValidatedImage(bytes(data), mime_type, dimensions[0], dimensions[1])
@@ -0,0 +1,319 @@
+"""
+Background Ingestion Jobs for Mualleem Platform
+Persists curriculum indexing jobs in a local SQLite queue and processes them on a
+worker pool, so /upload-curriculum returns immediately and jobs survive restarts.
+A running job is leased to the process running it, which renews the lease while
+it works; only a job whose lease has expired (its process died) is re-queued.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Optional
+
+from rag_service import rag_service
+
+JOBS_DB_PATH = os.getenv("INGESTION_JOBS_DB", "./data/ingestion_jobs.db")
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+MAX_JOB_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+INGESTION_LEASE_SECONDS = float(os.getenv("INGESTION_LEASE_SECONDS", "60"))
+POLL_INTERVAL = 1.0  # seconds between queue checks when idle
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class IngestionJobQueue:
+    """
+    Persistent job queue with a thread worker pool for PDF indexing
+
+    Jobs are rows in a SQLite table that several processes may share. A job is
+    claimed in one BEGIN IMMEDIATE transaction and leased to this queue's owner
+    id; a heartbeat thread renews the leases every third of lease_seconds. A job
+    left RUNNING by a process that died is re-queued once its lease expires,
+    until it reaches MAX_JOB_ATTEMPTS. Jobs interrupted by a graceful stop are
+    handed back at once and keep their attempt.
+    """
+
+    def __init__(self, index_fn: Callable[..., dict], db_path: str = JOBS_DB_PATH,
+                 workers: int = INGESTION_WORKERS, lease_seconds: float = INGESTION_LEASE_SECONDS):
+        """
+        Args:
+            index_fn: Indexing function with the signature of RAGService.index_pdf
+            db_path: Path to the SQLite database file
+            workers: Number of worker threads
+            lease_seconds: How long a claimed job stays leased without a heartbeat
+        """
+        self.index_fn = index_fn
+        self.db_path = db_path
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._init_db()
+
+    def _connect(self, autocommit: bool = False) -> sqlite3.Connection:
+        # Autocommit mode is for transactions opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None if autocommit else "")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        """Create the jobs table if it doesn't exist"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    file_path TEXT NOT NULL,
+                    document_name TEXT NOT NULL,
+                    file_hash TEXT,
+                    status TEXT NOT NULL,
+                    progress TEXT NOT NULL DEFAULT '{}',
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    updated_at TEXT NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires_at REAL
+                )
+            """)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "file_hash" not in columns:  # databases created before uploads were hashed
+                conn.execute("ALTER TABLE jobs ADD COLUMN file_hash TEXT")
+            if "lease_owner" not in columns:  # databases created before jobs were leased
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_owner TEXT")
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires_at REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_file_hash ON jobs(file_hash)")
+
+    def start(self):
+        """Start the worker threads and the lease heartbeat"""
+        if self._threads:
+            return
+
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"ingestion-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="ingestion-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        print(f"✓ Started {self.workers} ingestion worker(s)")
+
+    def stop(self, timeout: float = 5.0):
+        """Signal workers to stop after their current job, and hand back jobs still running after timeout"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        self._release_leases()
+
+    def _release_leases(self):
+        """
+        Re-queue the jobs this queue still holds without counting the attempt
+
+        A worker recycled by gunicorn (max_requests) or stopped for a deploy did
+        not fail its job; only a lease that expires (the process died while
+        indexing) counts toward MAX_JOB_ATTEMPTS. The interrupted thread's later
+        updates are dropped, as it no longer holds the lease.
+        """
+        with self._connect() as conn:
+            released = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = MAX(attempts - 1, 0), updated_at = ?, "
+                "lease_owner = NULL, lease_expires_at = NULL WHERE lease_owner = ? AND status = ?",
+                (QUEUED, datetime.now().isoformat(), self.owner, RUNNING)
+            ).rowcount
+        if released:
+            print(f"✓ Handed back {released} unfinished ingestion job(s)")
+
+    def submit(self, file_path: str, document_name: str, file_hash: Optional[str] = None) -> str:
+        """
+        Queue a PDF for indexing
+
+        Args:
+            file_path: Path to the stored PDF
+            document_name: Name the document is indexed under
+            file_hash: sha256 of the file, if already computed during upload
+
+        Returns:
+            The new job id
+        """
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, file_path, document_name, file_hash, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, file_path, document_name, file_hash, QUEUED, now, now)
+            )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return the public view of a job, or None if unknown"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "job_id": row["id"],
+            "document_name": row["document_name"],
+            "status": row["status"],
+            "progress": json.loads(row["progress"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def find_active(self, file_hash: str, document_name: Optional[str] = None) -> Optional[dict]:
+        """
+        Job id and document name of a queued or running job for a file with this hash, or None
+
+        A job for document_name, if given, is preferred over jobs indexing the
+        same file as other documents.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, document_name FROM jobs WHERE file_hash = ? AND status IN (?, ?) "
+                "ORDER BY document_name = ? DESC, created_at LIMIT 1",
+                (file_hash, QUEUED, RUNNING, document_name)
+            ).fetchone()
+        return {"job_id": row["id"], "document_name": row["document_name"]} if row else None
+
+    def _claim_next(self) -> Optional[sqlite3.Row]:
+        """
+        Atomically move the oldest queued job to RUNNING, leased to this queue
+
+        BEGIN IMMEDIATE takes the database's write lock before reading, so no
+        other thread or process can claim the same job. Expired leases are
+        recovered in the same transaction. A job waits while another job for the
+        same document is running: two concurrent runs would each delete the
+        other's chunks as stale.
+        """
+        conn = self._connect(autocommit=True)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._recover_expired(conn)
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND document_name NOT IN "
+                    "(SELECT document_name FROM jobs WHERE status = ?) ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING)
+                ).fetchone()
+                if row is not None:
+                    now = datetime.now().isoformat()
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, updated_at = ?, "
+                        "lease_owner = ?, lease_expires_at = ? WHERE id = ?",
+                        (RUNNING, now, now, self.owner, time.time() + self.lease_seconds, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        return row
+
+    def _recover_expired(self, conn: sqlite3.Connection):
+        """Fail or re-queue RUNNING jobs whose lease has expired (rows without a lease predate leases)"""
+        now = datetime.now().isoformat()
+        expired = "status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)"
+        conn.execute(
+            f"UPDATE jobs SET status = ?, error = ?, finished_at = ?, updated_at = ?, lease_owner = NULL "
+            f"WHERE {expired} AND attempts >= ?",
+            (FAILED, "تم إيقاف المهمة بعد عدة محاولات فاشلة", now, now, RUNNING, time.time(), MAX_JOB_ATTEMPTS)
+        )
+        recovered = conn.execute(
+            f"UPDATE jobs SET status = ?, updated_at = ?, lease_owner = NULL, lease_expires_at = NULL "
+            f"WHERE {expired}",
+            (QUEUED, now, RUNNING, time.time())
+        ).rowcount
+        if recovered:
+            print(f"✓ Re-queued {recovered} interrupted ingestion job(s)")
+
+    def _heartbeat_loop(self):
+        """Renew the leases of this queue's running jobs until stopped"""
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "UPDATE jobs SET lease_expires_at = ? WHERE lease_owner = ? AND status = ?",
+                        (time.time() + self.lease_seconds, self.owner, RUNNING)
+                    )
+            except sqlite3.Error as e:
+                print(f"⚠ Warning: ingestion lease renewal failed: {str(e)}")
+
+    def _update(self, job_id: str, **fields) -> bool:
+        """
+        Update a job this queue holds the lease of (a job lost to another process is left alone)
+
+        Returns:
+            False if the lease is no longer held and nothing was updated
+        """
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            return conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ? AND lease_owner = ?",
+                                (*fields.values(), job_id, self.owner)).rowcount > 0
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            job = self._claim_next()
+            if job is None:
+                self._wakeup.wait(POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job: sqlite3.Row):
+        job_id = job["id"]
+        start_time = time.time()
+        print(f"📥 Ingestion job {job_id} started: {job['document_name']}")
+
+        try:
+            result = self.index_fn(
+                job["file_path"],
+                document_name=job["document_name"],
+                file_hash=job["file_hash"],
+                progress_callback=lambda progress: self._update(job_id, progress=json.dumps(progress)),
+            )
+            result["processing_time_seconds"] = round(time.time() - start_time, 3)
+            completed = self._update(
+                job_id,
+                status=COMPLETED,
+                result=json.dumps(result, ensure_ascii=False),
+                finished_at=datetime.now().isoformat(),
+            )
+            if completed:
+                print(f"✓ Ingestion job {job_id} completed in {result['processing_time_seconds']}s")
+            else:
+                print(f"⚠ Ingestion job {job_id} finished after its lease was given up; left to its new owner")
+        except Exception as e:
+            if self._update(job_id, status=FAILED, error=str(e), finished_at=datetime.now().isoformat()):
+                print(f"✗ Ingestion job {job_id} failed: {str(e)}")
+
+
+# Singleton instance
+ingestion_queue = IngestionJobQueue(index_fn=rag_service.index_pdf)
@@ -1,45 +1,148 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, ORJSONResponse, Response
 import os
-import shutil
+import base64
 from pathlib import Path
 from dotenv import load_dotenv
-from rag_service import rag_service, get_openai_client, SYSTEM_PROMPT
-from collections import defaultdict
+from rag_service import rag_service, requesty_client, get_openai_client, SYSTEM_PROMPT
+import math
 import time
 import logging
 from performance_monitor import perf_monitor, monitor_endpoint
+from ingestion_jobs import ingestion_queue
+from document_registry import document_name_for
+from rate_limiter import client_key
+from shared_state import create_cache, create_rate_limiter
+from response_compression import CompressionMiddleware
+from upload_storage import MAX_UPLOAD_BYTES, MAX_UPLOAD_MB, BodySizeLimitMiddleware, UploadTooLarge, store_upload
+from image_validation import (
+    MAX_IMAGE_BYTES, MAX_IMAGE_MB, ImageDimensionsTooLarge, InvalidImage, UnsupportedImageType, ValidatedImage, read_image,
+)
+from service_clients import CLIENT_RETRY_SECONDS, LazyClient, ServiceUnavailable, initialize_clients
+from dependency_probe import PROBE_TIMEOUT_SECONDS, DependencyProber
+from upstream_connections import WARMUP_ENABLED, KeepAlivePinger, connection_metrics, pool_stats, warm_up
+from background_leader import background_leader
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+import asyncio
 from typing import Optional
 from pydantic import BaseModel, Field
-from supabase import create_client, Client
 
 load_dotenv()
 
-app = FastAPI(title="Mualleem API", version="1.0.0")
-
-# Initialize Supabase client
-supabase_url = os.getenv("VITE_SUPABASE_URL")
-supabase_key = os.getenv("VITE_SUPABASE_SUPABASE_ANON_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def create_supabase_client():
+    """Supabase client for reviews (the package is imported here: it is slow to import)"""
+    from supabase import create_client
+    
+    supabase_url = os.getenv("VITE_SUPABASE_URL")
+    supabase_key = os.getenv("VITE_SUPABASE_SUPABASE_ANON_KEY")
+    return create_client(supabase_url, supabase_key)
+
+# Created on first use or by the startup below, not at import time
+supabase_client = LazyClient("Supabase", create_supabase_client)
+
+def probe_qdrant() -> dict:
+    """Collection stats double as the Qdrant health check (and feed /stats)"""
+    stats = rag_service.get_collection_stats()
+    if stats["status"] == "error":
+        raise RuntimeError(stats["error"])
+    return stats
+
+def probe_requesty():
+    """List models: authenticated, but costs no tokens"""
+    get_openai_client().with_options(max_retries=0, timeout=PROBE_TIMEOUT_SECONDS).models.list()
+
+def probe_supabase():
+    supabase_client.get().table("reviews").select("id").limit(1).execute()
+
+# Dependencies the service cannot answer questions without
+READY_REQUIRED = [name.strip() for name in os.getenv("READY_REQUIRED", "Qdrant,Requesty.ai").split(",")]
+
+# Probes run in the background leader only; other workers read its results
+dependency_prober = DependencyProber(
+    {"Qdrant": probe_qdrant, "Requesty.ai": probe_requesty, "Supabase": probe_supabase},
+    required=READY_REQUIRED,
+    cache=create_cache(),
+)
+
+keepalive_pinger = KeepAlivePinger(rag_service)
+warmup_state = {"done": not WARMUP_ENABLED, "steps": {}}
+
+async def start_services(leader: bool):
+    """Connect to all services concurrently, then warm connections and caches"""
+    await initialize_clients([rag_service.connection, requesty_client, supabase_client])
+    if WARMUP_ENABLED:
+        # Every worker warms its own connections; the leader also warms what they share
+        warmup_state["steps"] = await run_in_threadpool(warm_up, rag_service, leader)
+        warmup_state["done"] = True
+    keepalive_pinger.start()
+
+def start_background_work():
+    """Once per host: probe the dependencies and run the ingestion jobs"""
+    dependency_prober.start()
+    # Start background ingestion workers (jobs of a dead leader are re-queued
+    # once their leases expire)
+    ingestion_queue.start()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start background work without waiting for external services
+    
+    Qdrant, Requesty.ai and Supabase are connected concurrently in the
+    background, so the server accepts requests immediately. Until a service is
+    up, endpoints that need it answer 503 (search degrades to no context) and
+    the connection is retried on later requests. Under gunicorn, one worker
+    (the background leader) also runs the prober and the ingestion jobs; if it
+    exits, another worker takes over.
+    """
+    leader = background_leader.try_acquire()
+    startup = asyncio.create_task(start_services(leader))
+    election = asyncio.create_task(background_leader.run(start_background_work))
+    yield
+    startup.cancel()
+    election.cancel()
+    dependency_prober.stop()
+    keepalive_pinger.stop()
+    ingestion_queue.stop()
+    background_leader.release()
+    # Save performance report on shutdown
+    try:
+        perf_monitor.save_report("performance_report.json")
+        logger.info("Performance report saved successfully")
+    except Exception as e:
+        logger.error(f"Failed to save performance report: {e}")
+
+# orjson: several times faster than the stdlib encoder and writes Arabic as raw
+# UTF-8 (no \uXXXX escapes)
+app = FastAPI(title="Mualleem API", version="1.0.0", lifespan=lifespan,
+              default_response_class=ORJSONResponse)
+
 # Image upload configuration
 ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
-# Simple rate limiting - temporary for development
-request_counts = defaultdict(list)
-RATE_LIMIT = 60  # requests per minute
-RATE_WINDOW = 60  # seconds
+# Per-client rate limit (RATE_LIMIT requests per RATE_WINDOW seconds) and
+# response cache; shared by all workers with SHARED_STATE_BACKEND=sqlite
+rate_limiter = create_rate_limiter()
+response_cache = create_cache()
+REVIEW_STATS_TTL = float(os.getenv("REVIEW_STATS_TTL", "30"))  # seconds
 
 # Ensure data directory exists
 DATA_DIR = Path("./data")
 DATA_DIR.mkdir(exist_ok=True)
 
+# Oversized uploads are cut off while the body arrives, before multipart parsing
+# (inside CORS, so browsers can read the 413)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/upload-curriculum": MAX_UPLOAD_BYTES, "/chat": MAX_IMAGE_BYTES},
+)
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
@@ -58,13 +161,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def validate_image_file(file: UploadFile):
+# Brotli or gzip for responses over COMPRESSION_MIN_BYTES (large /chat answers)
+app.add_middleware(CompressionMiddleware)
+
+async def validate_image_file(file: UploadFile) -> ValidatedImage:
     """
-    Validate image file type and size
+    Validate image file type, size and dimensions
     
     Args:
         file: Uploaded file to validate
         
+    Returns:
+        ValidatedImage with the content and the type sniffed from it
+        
     Raises:
         HTTPException: With appropriate status codes for validation errors
     """
@@ -82,29 +191,39 @@ def validate_image_file(file: UploadFile):
             detail="نوع الملف غير مدعوم. يرجى استخدام PNG, JPG, GIF, أو WEBP"
         )
     
-    # Check file size by reading content
+    # Read in chunks, stopping at the size limit or a bad header
     try:
-        file_content = file.file.read()
-        if len(file_content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail="حجم الملف كبير جداً. الحد الأقصى 10 ميجابايت"
-            )
-        
-        # Reset file pointer for later processing
-        file.file.seek(0)
-        return True
-        
-    except Exception as e:
+        return await read_image(file)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"حجم الملف كبير جداً. الحد الأقصى {MAX_IMAGE_MB:g} ميجابايت"
+        )
+    except ImageDimensionsTooLarge as e:
+        logger.warning(f"Rejected image {file.filename}: {str(e)}")
+        raise HTTPException(
+            status_code=413,
+            detail="أبعاد الصورة كبيرة جداً"
+        )
+    except UnsupportedImageType:
+        # Content that is not an image, whatever its name
+        raise HTTPException(
+            status_code=422,
+            detail="نوع الملف غير مدعوم. يرجى استخدام PNG, JPG, GIF, أو WEBP"
+        )
+    except InvalidImage as e:
         logger.error(f"Error validating file {file.filename}: {str(e)}")
         raise HTTPException(
             status_code=422,
             detail="خطأ في قراءة الملف. يرجى التأكد من صحة الملف"
         )
 
-def check_rate_limit(request: Request):
+async def check_rate_limit(request: Request):
     """
-    Simple rate limiting check
+    Rate limiting check, keyed by RATE_LIMIT_KEYS (ip, session and/or user)
+    
+    Runs in the threadpool: with the shared SQLite backend the check may wait
+    (briefly, see RATE_LIMIT_BUSY_TIMEOUT) for another worker's transaction.
     
     Args:
         request: FastAPI request object
@@ -112,28 +231,29 @@ def check_rate_limit(request: Request):
     Raises:
         HTTPException: If rate limit is exceeded
     """
-    client_ip = request.client.host
-    now = time.time()
-    
-    # Clean old requests
-    request_counts[client_ip] = [
-        req_time for req_time in request_counts[client_ip]
-        if now - req_time < RATE_WINDOW
-    ]
-    
-    if len(request_counts[client_ip]) >= RATE_LIMIT:
+    result = await run_in_threadpool(rate_limiter.check, client_key(request))
+    if not result.allowed:
         raise HTTPException(
             status_code=429,
-            detail="تم تجاوز عدد الطلبات المسموح. يرجى المحاولة لاحقاً"
+            detail="تم تجاوز عدد الطلبات المسموح. يرجى المحاولة لاحقاً",
+            headers={"Retry-After": str(math.ceil(result.retry_after))}
         )
-    
-    request_counts[client_ip].append(now)
+
+@app.exception_handler(ServiceUnavailable)
+async def service_unavailable_handler(request: Request, exc: ServiceUnavailable):
+    """An external service is down: ask the client to retry later"""
+    logger.warning(f"{exc.service} unavailable: {exc.reason}")
+    return ORJSONResponse(
+        status_code=503,
+        content={"detail": "الخدمة غير متاحة مؤقتاً. يرجى المحاولة لاحقاً", "service": exc.service},
+        headers={"Retry-After": str(int(CLIENT_RETRY_SECONDS))}
+    )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Global exception handler for better error reporting"""
     logger.error(f"خطأ غير متوقع: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "حدث خطأ في الخادم. يرجى المحاولة لاحقاً"}
     )
@@ -144,55 +264,157 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "Mualleem Backend"}
+    services = [client.status() for client in (rag_service.connection, requesty_client, supabase_client)]
+    degraded = [service["service"] for service in services if service["error"] is not None]
+    return {
+        "status": "degraded" if degraded else "healthy",
+        "service": "Mualleem Backend",
+        "unavailable": degraded
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Per-dependency status and latency from the background prober
+    Returns 503 until the required dependencies are up and warm-up has finished;
+    answering never calls them.
+    """
+    dependency_prober.refresh()
+    snapshot = dependency_prober.snapshot
+    if snapshot is None:
+        return ORJSONResponse(status_code=503, content={"status": "starting", "ready": False})
+    if not warmup_state["done"]:
+        return ORJSONResponse(status_code=503, content={**snapshot, "status": "warming_up", "ready": False})
+    return ORJSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+
+@app.get("/stats/connections")
+async def get_connection_stats():
+    """
+    Upstream connection reuse: requests vs. newly opened connections per service,
+    and the shared Requesty.ai connection pool
+    """
+    return {
+        "upstreams": connection_metrics.snapshot(),
+        "requesty_pool": pool_stats(),
+        "warmup": warmup_state["steps"]
+    }
 
 @app.get("/stats")
 async def get_stats():
     """
     Get statistics about the indexed curriculum
+    Served from the latest Qdrant probe (see checked_at), not a live call.
     """
-    stats = rag_service.get_collection_stats()
-    return stats
-
-@app.post("/upload-curriculum")
+    dependency_prober.refresh()
+    qdrant = dependency_prober.results.get("Qdrant")
+    if qdrant is None:
+        # No probe has finished yet
+        return rag_service.get_collection_stats()
+    if qdrant["status"] != "up":
+        return {
+            "collection_name": rag_service.collection_name,
+            "error": qdrant["error"],
+            "status": "error",
+            "checked_at": qdrant["checked_at"]
+        }
+    return {**qdrant["details"], "checked_at": qdrant["checked_at"]}
+
+def duplicate_upload(response: Response, filename: str, document_id: str, duplicate_of: str) -> dict:
+    """409 body for a file whose content is already indexed or queued as another document"""
+    response.status_code = 409
+    return {
+        "message": "محتوى هذا الملف مفهرس مسبقاً كمستند آخر",
+        "filename": filename,
+        "document_name": document_id,
+        "duplicate_of": duplicate_of,
+        "status": "duplicate"
+    }
+
+@app.post("/upload-curriculum", status_code=202)
 @monitor_endpoint("/upload-curriculum")
-async def upload_curriculum(file: UploadFile = File(...)):
+async def upload_curriculum(response: Response, file: UploadFile = File(...),
+                            document_id: Optional[str] = Form(None)):
     """
-    Upload and index a PDF textbook for RAG
+    Upload a PDF textbook and queue it for background RAG indexing
+    Returns a job id immediately; poll /jobs/{job_id} for progress.
+    A file that is already indexed (same content) is not processed again.
+    
+    Each upload is a new document unless document_id (the document_name of an
+    earlier upload) says which document it is a new version of; that version's
+    chunks are then replaced. Two books with the same filename stay apart. A
+    document_id whose file content is already indexed or queued as a different
+    document gets 409, naming that document in duplicate_of.
     """
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="يجب أن يكون الملف بصيغة PDF")
+    if document_id is not None and not document_id.strip():
+        raise HTTPException(status_code=400, detail="معرّف المستند فارغ")
     
     try:
         start_time = time.time()
         perf_monitor.log_system_resources()
         
-        # Save uploaded file
-        file_path = DATA_DIR / file.filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Stream the upload to DATA_DIR/<sha256>.pdf, hashing it on the way
+        stored = await store_upload(file, DATA_DIR, suffix=".pdf")
         
         file_save_time = time.time()
-        logger.info(f"PERFORMANCE: File save took {file_save_time - start_time:.3f}s")
+        logger.info(f"PERFORMANCE: File save took {file_save_time - start_time:.3f}s "
+                    f"({stored.size} bytes)")
         
-        # Index the PDF using RAG service
-        result = rag_service.index_pdf(str(file_path), document_name=file.filename)
+        requested_name = document_id.strip() if document_id else None
+        
+        # The registry may list versions the live collection lacks (after a rollback)
+        indexed = await run_in_threadpool(rag_service.find_live_by_hash, stored.sha256, requested_name)
+        if indexed is not None and requested_name not in (None, indexed["document_name"]):
+            return duplicate_upload(response, file.filename, requested_name, indexed["document_name"])
+        if indexed is not None:
+            response.status_code = 200
+            return {
+                "message": "هذا المنهج مفهرس مسبقاً",
+                "filename": file.filename,
+                "document_name": indexed["document_name"],
+                "status": "already_indexed",
+                "indexed_at": indexed["indexed_at"]
+            }
         
-        total_time = time.time()
-        logger.info(f"PERFORMANCE: PDF indexing took {total_time - file_save_time:.3f}s")
-        logger.info(f"PERFORMANCE: Total upload+index took {total_time - start_time:.3f}s")
+        # Join the job already processing the same file, unless it indexes it
+        # as another document than the one requested
+        active = ingestion_queue.find_active(stored.sha256, requested_name)
+        if active is not None and requested_name not in (None, active["document_name"]):
+            return duplicate_upload(response, file.filename, requested_name, active["document_name"])
+        if active is not None:
+            job_id, document_name = active["job_id"], active["document_name"]
+        else:
+            # A new document is named after the file and its content, so it cannot
+            # replace another book that happens to share the filename
+            document_name = requested_name or document_name_for(file.filename, stored.sha256)
+            job_id = ingestion_queue.submit(str(stored.path), document_name=document_name, file_hash=stored.sha256)
         
         return {
-            "message": "تم رفع المنهج وفهرسته بنجاح",
+            "message": "تم رفع المنهج وجاري فهرسته في الخلفية",
             "filename": file.filename,
-            "total_chunks": result["total_chunks"],
-            "total_characters": result["total_characters"],
-            "status": "indexed",
-            "processing_time_seconds": round(total_time - start_time, 3)
+            "document_name": document_name,
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}"
         }
+    except ServiceUnavailable:
+        raise
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"حجم الملف يتجاوز الحد المسموح ({MAX_UPLOAD_MB:g} ميجابايت)")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"خطأ في معالجة الملف: {str(e)}")
 
+@app.get("/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """
+    Get status and progress (pages, chunks, embedded batches) of an ingestion job
+    """
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="المهمة غير موجودة")
+    return job
+
 @app.post("/chat")
 @monitor_endpoint("/chat")
 async def chat(
@@ -208,14 +430,13 @@ async def chat(
     perf_monitor.log_system_resources()
     
     # Check rate limit
-    check_rate_limit(request)
+    await check_rate_limit(request)
     
     if not question and not image:
         raise HTTPException(status_code=400, detail="يجب إرسال سؤال أو صورة")
     
     # Validate image if provided
-    if image:
-        validate_image_file(image)
+    validated_image = await validate_image_file(image) if image else None
     
     try:
         # Step 1: Query Qdrant for relevant context
@@ -240,18 +461,11 @@ async def chat(
         if image:
             image_start = time.time()
             try:
-                # Save image temporarily
-                image_path = DATA_DIR / f"temp_{image.filename}"
-                with open(image_path, "wb") as buffer:
-                    shutil.copyfileobj(image.file, buffer)
-                
-                # Read image as base64
-                import base64
-                with open(image_path, "rb") as img_file:
-                    image_data = base64.b64encode(img_file.read()).decode('utf-8')
+                # Already read and validated: encode it, no temporary file
+                image_data = base64.b64encode(validated_image.data).decode('ascii')
                 
-                # Determine image type
-                image_type = "image/jpeg" if image.filename.lower().endswith(('.jpg', '.jpeg')) else "image/png"
+                # Type sniffed from the content, not the filename
+                image_type = validated_image.mime_type
                 
                 image_processing_time = time.time() - image_start
                 logger.info(f"PERFORMANCE: Image processing took {image_processing_time:.3f}s")
@@ -275,12 +489,6 @@ async def chat(
                     }
                 ]
             })
-            
-            # Clean up temp file
-            try:
-                os.remove(image_path)
-            except:
-                pass  # Ignore cleanup errors
         else:
             messages.append({"role": "user", "content": question})
         
@@ -317,8 +525,9 @@ async def chat(
             }
         }
         
-    except HTTPException:
-        # Re-raise HTTPExceptions (already have proper status codes)
+    except (HTTPException, ServiceUnavailable):
+        # Re-raise HTTPExceptions (already have proper status codes); a service
+        # outage becomes a 503
         raise
     except Exception as e:
         logger.error(f"Unexpected error in chat endpoint: {str(e)}")
@@ -361,12 +570,13 @@ async def submit_review(review: ReviewSubmission):
         }
 
         # Insert into Supabase
-        result = supabase.table("reviews").insert(review_data).execute()
+        result = supabase_client.get().table("reviews").insert(review_data).execute()
 
         if not result.data:
             raise HTTPException(status_code=500, detail="فشل في حفظ التقييم")
 
         review_record = result.data[0]
+        response_cache.delete("review_stats")
 
         return ReviewResponse(
             id=review_record["id"],
@@ -376,7 +586,7 @@ async def submit_review(review: ReviewSubmission):
             message="تم إرسال التقييم بنجاح. شكراً لملاحظاتك!"
         )
 
-    except HTTPException:
+    except (HTTPException, ServiceUnavailable):
         raise
     except Exception as e:
         logger.error(f"Error submitting review: {str(e)}")
@@ -386,38 +596,28 @@ async def submit_review(review: ReviewSubmission):
 async def get_review_stats():
     """
     Get aggregated statistics about reviews
-    Returns total reviews, average rating, and rating distribution
+    Returns total reviews, average rating, and rating distribution, computed
+    by the get_review_stats() database function from per-rating counters.
+    Cached for REVIEW_STATS_TTL seconds (cleared when a review is submitted).
     """
+    cached = response_cache.get("review_stats")
+    if cached is not None:
+        return cached
     try:
-        # Get all reviews
-        result = supabase.table("reviews").select("rating").execute()
-
-        if not result.data:
-            return {
-                "total_reviews": 0,
-                "average_rating": 0,
-                "rating_distribution": {str(i): 0 for i in range(1, 6)}
-            }
-
-        reviews = result.data
-        total_reviews = len(reviews)
-
-        # Calculate average rating
-        total_rating = sum(r["rating"] for r in reviews)
-        average_rating = round(total_rating / total_reviews, 2) if total_reviews > 0 else 0
-
-        # Calculate rating distribution
-        rating_distribution = {str(i): 0 for i in range(1, 6)}
-        for review in reviews:
-            rating_str = str(review["rating"])
-            rating_distribution[rating_str] += 1
-
-        return {
-            "total_reviews": total_reviews,
-            "average_rating": average_rating,
-            "rating_distribution": rating_distribution
+        # One row aggregated in Postgres (see the get_review_stats migration)
+        result = supabase_client.get().rpc("get_review_stats").execute()
+        row = result.data[0]
+
+        stats = {
+            "total_reviews": int(row["total_reviews"]),
+            "average_rating": float(row["average_rating"]),
+            "rating_distribution": {str(i): int(row["rating_distribution"].get(str(i), 0)) for i in range(1, 6)}
         }
+        response_cache.set("review_stats", stats, REVIEW_STATS_TTL)
+        return stats
 
+    except ServiceUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error fetching review stats: {str(e)}")
         raise HTTPException(status_code=500, detail=f"خطأ في جلب إحصائيات التقييمات: {str(e)}")
@@ -429,7 +629,7 @@ async def get_recent_reviews(limit: int = 10):
     Returns the most recent reviews that include text feedback
     """
     try:
-        result = supabase.table("reviews") \
+        result = supabase_client.get().table("reviews") \
             .select("id, rating, feedback, created_at, model_used") \
             .not_.is_("feedback", "null") \
             .order("created_at", desc=True) \
@@ -441,19 +641,15 @@ async def get_recent_reviews(limit: int = 10):
             "count": len(result.data)
         }
 
+    except ServiceUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error fetching recent reviews: {str(e)}")
         raise HTTPException(status_code=500, detail=f"خطأ في جلب التقييمات الأخيرة: {str(e)}")
 
-@app.on_event("shutdown")
-async def save_performance_report():
-    """Save performance report on shutdown"""
-    try:
-        perf_monitor.save_report("performance_report.json")
-        logger.info("Performance report saved successfully")
-    except Exception as e:
-        logger.error(f"Failed to save performance report: {e}")
-
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Hand over to the production launcher in a fresh interpreter: its workers
+    # must import this module (and read its settings) after the fork
+    import sys
+    launcher = os.path.join(os.path.dirname(os.path.abspath(__file__)), "serve.py")
+    os.execv(sys.executable, [sys.executable, launcher])
@@ -0,0 +1,123 @@
+"""
+Parallel PDF Text Extraction for Mualleem Platform
+Splits a PDF into page ranges and extracts them across a process pool, each
+worker opening its own PdfReader. Kept free of service imports so worker
+processes start fast and never touch Qdrant or Requesty.ai.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from pypdf import PdfReader
+
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0")) or (os.cpu_count() or 1)
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Return the shared extraction pool, created on first use
+
+    The pool is sized once (at least PDF_EXTRACT_WORKERS); callers asking for
+    fewer workers just keep fewer tasks in flight. Workers are started from a
+    fork server (spawn where unavailable): forking the multithreaded server
+    could copy locks held by its other threads and deadlock the child.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=max(workers, PDF_EXTRACT_WORKERS),
+                                        mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def extract_page_range(pdf_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """
+    Extract text from pages [start, end) of a PDF (runs inside a worker process)
+
+    Returns:
+        List of (page_number, text) tuples, page numbers starting at 1
+    """
+    reader = PdfReader(pdf_path)
+    return [
+        (page_index + 1, reader.pages[page_index].extract_text() or "")
+        for page_index in range(start, end)
+    ]
+
+
+def count_pages(pdf_path: str) -> int:
+    """Number of pages in a PDF"""
+    return len(PdfReader(pdf_path).pages)
+
+
+def iter_pages(pdf_path: str, workers: Optional[int] = None,
+               pages_per_task: int = PAGES_PER_TASK,
+               page_callback: Optional[Callable[[int, int], None]] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Stream the pages of a PDF in order, extracting ranges in parallel
+
+    At most two ranges per worker are in flight, so a huge PDF never has all of its
+    text in memory at once.
+
+    Args:
+        pdf_path: Path to the PDF file
+        workers: Worker processes (defaults to PDF_EXTRACT_WORKERS); 1 = in-process
+        pages_per_task: Pages handed to a worker per task
+        page_callback: Optional callable receiving (pages_done, pages_total)
+
+    Yields:
+        (page_number, text) tuples in page order, page numbers starting at 1
+    """
+    workers = workers or PDF_EXTRACT_WORKERS
+    total_pages = count_pages(pdf_path)
+    ranges = [
+        (start, min(start + pages_per_task, total_pages))
+        for start in range(0, total_pages, pages_per_task)
+    ]
+
+    if workers <= 1 or len(ranges) <= 1:
+        reader = PdfReader(pdf_path)
+        for page_index, page in enumerate(reader.pages):
+            yield page_index + 1, page.extract_text() or ""
+            if page_callback is not None:
+                page_callback(page_index + 1, total_pages)
+        return
+
+    pool = _get_pool(workers)
+    pending = deque()
+    next_range = 0
+    try:
+        while pending or next_range < len(ranges):
+            while next_range < len(ranges) and len(pending) < workers * 2:
+                start, end = ranges[next_range]
+                pending.append(pool.submit(extract_page_range, pdf_path, start, end))
+                next_range += 1
+
+            for page in pending.popleft().result():
+                yield page
+            if page_callback is not None:
+                page_callback(ranges[next_range - len(pending) - 1][1], total_pages)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def extract_pages(pdf_path: str, workers: Optional[int] = None,
+                  pages_per_task: int = PAGES_PER_TASK,
+                  page_callback: Optional[Callable[[int, int], None]] = None) -> List[Tuple[int, str]]:
+    """
+    Extract every page of a PDF, in parallel when it spans several page ranges
+
+    Returns:
+        List of (page_number, text) tuples in page order
+    """
+    return list(iter_pages(pdf_path, workers=workers, pages_per_task=pages_per_task,
+                           page_callback=page_callback))
@@ -6,6 +6,7 @@ from pypdf import PdfReader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from openai import OpenAI
 from dotenv import load_dotenv
+from upstream_connections import shared_http_client, upstream_timeout
 
 load_dotenv()
 
@@ -18,7 +19,10 @@ class RAGEngine:
             default_headers={
                 "HTTP-Referer": os.getenv("SITE_URL", "http://localhost:3000"),
                 "X-Title": os.getenv("SITE_NAME", "Mualleem"),
-            }
+            },
+            # Same connection pool as rag_service's client
+            http_client=shared_http_client(),
+            timeout=upstream_timeout(),
         )
         
         # Initialize Qdrant Cloud client
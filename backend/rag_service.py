@@ -4,156 +4,437 @@ Handles PDF loading, text chunking, embedding generation, and Qdrant Cloud stora
 """
 
 import os
-from typing import List, Optional
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from pathlib import Path
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from pypdf import PdfReader
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, SearchParams, PayloadSchemaType,
+    Filter, FieldCondition, MatchValue, FilterSelector, SetPayload, SetPayloadOperation,
+)
 from openai import OpenAI
 from dotenv import load_dotenv
+from pdf_extraction import iter_pages
+from streaming_pipeline import prefetch
+from embedding_batcher import token_batches
+from text_chunker import TextChunk, chunk_pages
+from text_cache import TEXT_CACHE_ENABLED, ExtractedTextCache
+from collection_versions import (
+    PAYLOAD_INDEX_FIELDS, alias_target, create_version, ensure_alias, is_legacy_collection,
+    migrate_legacy_collection, switch_alias,
+)
+from embedding_store import EMBEDDING_STORE_ENABLED, EmbeddingStore
+from document_registry import DOCUMENT_REGISTRY_DB, DocumentRegistry, chunk_sha256, file_sha256
+from embedding_dispatcher import EmbeddingDispatcher
+from service_clients import LazyClient
+from upstream_connections import connection_metrics, shared_http_client, upstream_limits, upstream_timeout
 
 load_dotenv()
 
-# Initialize OpenAI client with Requesty.ai gateway
-try:
+
+def _create_openai_client() -> OpenAI:
+    """
+    OpenAI-compatible client for the Requesty.ai gateway
+    
+    Raises:
+        ValueError: If REQUESTY_API_KEY is not set, so the client reports as not ready
+    """
     requesty_api_key = os.getenv("REQUESTY_API_KEY")
     requesty_base_url = os.getenv("REQUESTY_BASE_URL", "https://router.requesty.ai/v1")
     site_url = os.getenv("SITE_URL", "http://localhost:3000")
     site_name = os.getenv("SITE_NAME", "Mualleem")
     
-    if requesty_api_key:
-        openai_client = OpenAI(
-            api_key=requesty_api_key,
-            base_url=requesty_base_url,
-            default_headers={
-                "HTTP-Referer": site_url,
-                "X-Title": site_name
-            }
-        )
-        print(f"✓ Initialized Requesty.ai client with base URL: {requesty_base_url}")
-    else:
-        openai_client = None
-        print("⚠ Warning: REQUESTY_API_KEY not set in .env file")
-except Exception as e:
-    print(f"✗ Error: Could not initialize Requesty.ai client: {e}")
-    openai_client = None
+    if not requesty_api_key:
+        raise ValueError("REQUESTY_API_KEY not set in .env file")
+    
+    client = OpenAI(
+        api_key=requesty_api_key,
+        base_url=requesty_base_url,
+        default_headers={
+            "HTTP-Referer": site_url,
+            "X-Title": site_name
+        },
+        # One tuned connection pool for every OpenAI-compatible client
+        http_client=shared_http_client(),
+        timeout=upstream_timeout(),
+    )
+    print(f"✓ Initialized Requesty.ai client with base URL: {requesty_base_url}")
+    return client
+
+
+# Created on first use (or by the app's startup), not at import time
+requesty_client = LazyClient("Requesty.ai", _create_openai_client)
 
 # Qdrant Cloud Configuration
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "curriculum_textbooks")
+QDRANT_LOCAL = QDRANT_URL == ":memory:"  # in-process Qdrant for offline runs and benchmarks
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", "10"))  # seconds per request
+
+# Embedding model configuration
+EMBEDDING_MODEL = "openai/text-embedding-3-large"  # Requesty format: provider/model
+EMBEDDING_DIMENSIONS = 3072
+
+# Search tuning defaults (per-request values override these)
+SEARCH_HNSW_EF = int(os.getenv("QDRANT_HNSW_EF", "0")) or None  # None = collection default
+SEARCH_EXACT = os.getenv("QDRANT_EXACT_SEARCH", "false").lower() == "true"
+SEARCH_SCORE_THRESHOLD = float(os.getenv("QDRANT_SCORE_THRESHOLD", "0")) or None
+
+RETAG_BATCH_SIZE = 256  # payload updates per batch_update_points call
+QDRANT_UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "128"))
+QDRANT_UPSERT_RETRIES = int(os.getenv("QDRANT_UPSERT_RETRIES", "4"))
+# Point ids are uuid5(namespace, document/chunk hash/occurrence), so re-running an
+# interrupted ingestion overwrites its own points instead of duplicating them
+POINT_ID_NAMESPACE = uuid.UUID("5f0c8a4e-2d0b-4f57-9a53-6d2b8c1e7a10")
 
 # Text chunking parameters
 CHUNK_SIZE = 1000  # characters per chunk
 CHUNK_OVERLAP = 200  # overlap between chunks for context continuity
 
 
+class _SerializedClient:
+    """Serializes calls into the in-process Qdrant, which is not thread-safe"""
+    
+    def __init__(self, client: QdrantClient):
+        self._client = client
+        self._lock = threading.RLock()
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+        
+        def call(*args, **kwargs):
+            with self._lock:
+                return attribute(*args, **kwargs)
+        return call
+
+
+# Indexing locks by (collection, document name), created on first use
+_document_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_document_locks_guard = threading.Lock()
+
+
+def _document_lock(collection_name: str, document_name: str) -> threading.Lock:
+    """Lock serializing the indexing runs of one document in one collection"""
+    with _document_locks_guard:
+        return _document_locks.setdefault((collection_name, document_name), threading.Lock())
+
+
+def point_id(document_name: str, chunk_hash: str, occurrence: int = 0) -> str:
+    """Deterministic Qdrant point id for the n-th occurrence of a chunk in a document"""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{document_name}/{chunk_hash}/{occurrence}"))
+
+
+def chunk_position(chunk_index: int, chunk: TextChunk) -> dict:
+    """Payload fields locating a chunk in its document"""
+    return {
+        "chunk_index": chunk_index,
+        "page_start": chunk.page_start,
+        "page_end": chunk.page_end,
+        "char_start": chunk.start,
+        "char_end": chunk.end,
+    }
+
+
+def _is_transient_qdrant_error(error: Exception) -> bool:
+    """Timeouts, connection errors, 429s and 5xx responses are worth retrying"""
+    if isinstance(error, ResponseHandlingException):
+        return True
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
 class RAGService:
     """
     Service class for Retrieval-Augmented Generation operations using Qdrant Cloud
     """
     
-    def __init__(self):
-        """Initialize Qdrant Cloud client and collection"""
-        if not QDRANT_URL or not QDRANT_API_KEY:
+    def __init__(self, embedder: Optional[Callable[[List[str]], List[List[float]]]] = None,
+                 embedding_store: Optional[EmbeddingStore] = None,
+                 collection_name: str = COLLECTION_NAME,
+                 registry: Optional[DocumentRegistry] = None,
+                 text_cache: Optional[ExtractedTextCache] = None,
+                 client: Optional[QdrantClient] = None,
+                 dispatcher: Optional[EmbeddingDispatcher] = None,
+                 connect: bool = True):
+        """
+        Initialize Qdrant Cloud client and collection
+        
+        Args:
+            embedder: Optional callable replacing the Requesty.ai embedding call
+                      (used by the offline benchmarks with a deterministic stub)
+            embedding_store: Optional embedding store; defaults to the on-disk store
+                             when EMBEDDING_STORE_ENABLED and no embedder is injected
+            collection_name: Qdrant collection to index into and search; the configured
+                             QDRANT_COLLECTION_NAME is an alias over versioned collections
+            registry: Optional document registry; defaults to the on-disk registry
+            text_cache: Optional extracted-text cache; defaults to the on-disk cache
+                        when TEXT_CACHE_ENABLED (not with the in-memory Qdrant)
+            client: Optional Qdrant client to share instead of opening a new connection
+            dispatcher: Optional embedding dispatcher to share (and its rate limit)
+            connect: Connect to Qdrant now; with False the connection is made on
+                     first use of `client` (or by the app's startup)
+        """
+        self.embedder = embedder
+        if embedding_store is None and embedder is None and EMBEDDING_STORE_ENABLED:
+            embedding_store = EmbeddingStore(EMBEDDING_MODEL, EMBEDDING_DIMENSIONS)
+        self.embedding_store = embedding_store
+        self.collection_name = collection_name
+        self.uses_alias = collection_name == COLLECTION_NAME
+        if registry is None:
+            # An in-memory collection must not be paired with a persistent registry
+            registry = DocumentRegistry(":memory:" if QDRANT_LOCAL else DOCUMENT_REGISTRY_DB)
+        self.registry = registry
+        if text_cache is None and TEXT_CACHE_ENABLED and not QDRANT_LOCAL:
+            text_cache = ExtractedTextCache()
+        self.text_cache = text_cache
+        self.dispatcher = dispatcher or EmbeddingDispatcher(
+            lambda texts: self.generate_embeddings_with_usage(texts, max_retries=0)
+        )
+        
+        self._injected_client = client
+        self.connection = LazyClient("Qdrant", self._connect)
+        if connect:
+            self.connection.get()
+    
+    @property
+    def client(self) -> QdrantClient:
+        """
+        The Qdrant client, connecting on first use
+        
+        Raises:
+            ServiceUnavailable: If Qdrant cannot be reached (retried after an interval)
+        """
+        return self.connection.get()
+    
+    def _connect(self) -> QdrantClient:
+        """Open the Qdrant connection and make sure the collection exists"""
+        if not QDRANT_URL or not (QDRANT_API_KEY or QDRANT_LOCAL):
             raise ValueError("QDRANT_URL and QDRANT_API_KEY must be set in .env file")
         
         try:
-            self.client = QdrantClient(
-                url=QDRANT_URL,
-                api_key=QDRANT_API_KEY,
-            )
-            print(f"✓ Connected to Qdrant Cloud: {QDRANT_URL}")
+            if self._injected_client is not None:
+                client = self._injected_client
+            elif QDRANT_LOCAL:
+                client = _SerializedClient(QdrantClient(location=":memory:"))
+                print("✓ Using in-memory local Qdrant")
+            else:
+                client = QdrantClient(
+                    url=QDRANT_URL,
+                    api_key=QDRANT_API_KEY,
+                    timeout=QDRANT_TIMEOUT,
+                    limits=upstream_limits(),
+                    event_hooks=connection_metrics.event_hooks("Qdrant"),
+                )
+                print(f"✓ Connected to Qdrant Cloud: {QDRANT_URL}")
             
             # Ensure collection exists
-            self._ensure_collection_exists()
+            self._ensure_collection_exists(client)
+            return client
             
         except Exception as e:
             print(f"✗ Error connecting to Qdrant Cloud: {e}")
             raise
     
-    def _ensure_collection_exists(self):
-        """Create collection if it doesn't exist"""
+    def vectors_config(self) -> VectorParams:
+        """Vector settings for new collections"""
+        return VectorParams(size=EMBEDDING_DIMENSIONS, distance=Distance.COSINE)
+    
+    def _ensure_collection_exists(self, client: QdrantClient):
+        """Create collection (or, for the alias, its first version) if it doesn't exist"""
+        # Keyword indexes for the per-document filters used by re-indexing
+        # (the in-memory client filters without them)
+        payload_indexes = not QDRANT_LOCAL
         try:
-            collections = self.client.get_collections().collections
-            collection_names = [collection.name for collection in collections]
+            if self.uses_alias:
+                target = ensure_alias(client, self.collection_name, self.vectors_config(),
+                                      payload_indexes=payload_indexes)
+                print(f"✓ Using collection: {self.collection_name} -> {target or 'legacy collection'}")
+                return
             
-            if COLLECTION_NAME not in collection_names:
-                self.client.create_collection(
-                    collection_name=COLLECTION_NAME,
-                    vectors_config=VectorParams(
-                        size=3072,  # text-embedding-3-large dimension
-                        distance=Distance.COSINE
-                    ),
+            if not client.collection_exists(self.collection_name):
+                client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config=self.vectors_config(),
                 )
-                print(f"✓ Created new collection: {COLLECTION_NAME}")
+                print(f"✓ Created new collection: {self.collection_name}")
             else:
-                print(f"✓ Using existing collection: {COLLECTION_NAME}")
+                print(f"✓ Using existing collection: {self.collection_name}")
+            
+            for field_name in PAYLOAD_INDEX_FIELDS if payload_indexes else ():
+                client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=PayloadSchemaType.KEYWORD,
+                )
         except Exception as e:
             print(f"✗ Error ensuring collection exists: {e}")
             raise
     
-    def load_pdf(self, pdf_path: str) -> str:
+    def iter_document_pages(self, pdf_path: str, file_hash: Optional[str] = None,
+                            page_callback: Optional[Callable[[int, int], None]] = None
+                            ) -> Iterator[Tuple[int, str]]:
         """
-        Load and extract text from a PDF file
+        Stream the pages of a PDF, from the extracted-text cache when possible
+        
+        On a cache miss the PDF is extracted in parallel across CPU cores and,
+        once every page has been read, the result is added to the cache.
+        
+        Args:
+            pdf_path: Path to the PDF file (not read on a cache hit)
+            file_hash: sha256 of the file (computed if needed)
+            page_callback: Optional callable receiving (pages_done, pages_total)
+            
+        Yields:
+            (page_number, text) tuples in page order, including empty pages
+        """
+        if self.text_cache is None:
+            yield from iter_pages(pdf_path, page_callback=page_callback)
+            return
+        
+        if file_hash is None:
+            file_hash = file_sha256(pdf_path)
+        cached = self.text_cache.get(file_hash)
+        if cached is not None:
+            print(f"✓ Using cached text for {Path(pdf_path).name} ({len(cached['pages'])} pages)")
+            for done, page in enumerate(cached["pages"], start=1):
+                if page_callback is not None:
+                    page_callback(done, len(cached["pages"]))
+                yield page
+            return
+        
+        pages = []
+        for page in iter_pages(pdf_path, page_callback=page_callback):
+            pages.append(page)
+            yield page
+        self.text_cache.put(file_hash, pages, source=str(pdf_path))
+    
+    def load_pdf_pages(self, pdf_path: str,
+                       page_callback: Optional[Callable[[int, int], None]] = None,
+                       file_hash: Optional[str] = None) -> List[Tuple[int, str]]:
+        """
+        Extract text from every page of a PDF, in parallel across CPU cores
         
         Args:
             pdf_path: Path to the PDF file
+            page_callback: Optional callable receiving (pages_done, pages_total)
+            file_hash: sha256 of the file, if known (used for the text cache)
             
         Returns:
-            Extracted text content
+            List of (page_number, text) tuples in page order, empty pages skipped
         """
         try:
-            reader = PdfReader(pdf_path)
-            text_content = []
-            
-            for page_num, page in enumerate(reader.pages, start=1):
-                text = page.extract_text()
-                if text.strip():
-                    text_content.append(text)
-                    print(f"✓ Extracted page {page_num}/{len(reader.pages)}")
-            
-            full_text = "\n\n".join(text_content)
-            print(f"✓ Successfully loaded PDF: {len(full_text)} characters")
-            return full_text
+            pages = list(self.iter_document_pages(pdf_path, file_hash, page_callback=page_callback))
+            non_empty = [(page_num, text) for page_num, text in pages if text.strip()]
+            print(f"✓ Extracted {len(non_empty)}/{len(pages)} pages with text")
+            return non_empty
             
         except Exception as e:
             print(f"✗ Error loading PDF: {str(e)}")
             raise
     
-    def split_text_into_chunks(self, text: str, chunk_size: int = CHUNK_SIZE, 
-                               overlap: int = CHUNK_OVERLAP) -> List[str]:
+    def load_pdf(self, pdf_path: str,
+                 page_callback: Optional[Callable[[int, int], None]] = None) -> str:
         """
-        Split text into overlapping chunks for better context preservation
+        Load and extract text from a PDF file
         
         Args:
-            text: Input text to split
+            pdf_path: Path to the PDF file
+            page_callback: Optional callable receiving (pages_done, pages_total)
+            
+        Returns:
+            Extracted text content
+        """
+        pages = self.load_pdf_pages(pdf_path, page_callback=page_callback)
+        full_text = "\n\n".join(text for _, text in pages)
+        print(f"✓ Successfully loaded PDF: {len(full_text)} characters")
+        return full_text
+    
+    def iter_text_chunks(self, pieces: Iterable[str], chunk_size: int = CHUNK_SIZE,
+                         overlap: int = CHUNK_OVERLAP) -> Iterator[str]:
+        """
+        Split a stream of text pieces (e.g. pages) into overlapping chunks
+        
+        Pieces are joined with blank lines, as load_pdf does. Only the text that
+        the next chunk can still reach is buffered, so memory does not grow with
+        the size of the document. Each chunk starts `overlap` characters before
+        the point where the previous one was actually cut, so shortening a chunk
+        at a sentence boundary neither drops nor duplicates text.
+        
+        Args:
+            pieces: Iterable of text pieces
             chunk_size: Maximum size of each chunk
             overlap: Number of characters to overlap between chunks
             
-        Returns:
-            List of text chunks
+        Yields:
+            Non-empty text chunks
         """
-        chunks = []
+        buffer = ""
+        base = 0  # absolute offset of buffer[0]
         start = 0
-        text_length = len(text)
+        previous_end = 0  # absolute offset where the previous chunk was cut
         
-        while start < text_length:
-            end = start + chunk_size
-            chunk = text[start:end]
-            
+        def cut(final: bool) -> Tuple[str, int]:
+            """Next chunk and the absolute offset where it was cut"""
+            offset = start - base
+            chunk = buffer[offset:offset + chunk_size]
             # Try to break at sentence boundaries for Arabic text
-            if end < text_length:
+            if not final or offset + chunk_size < len(buffer):
                 # Look for Arabic sentence endings (. ؟ ! .)
+                # Only delimiters past the previous cut, or the chunk would repeat it
+                floor = max(0, previous_end - start)
                 for delimiter in ['.\n', '؟\n', '!\n', '. ', '؟ ', '! ']:
-                    last_delimiter = chunk.rfind(delimiter)
+                    last_delimiter = chunk.rfind(delimiter, floor)
                     if last_delimiter != -1:
-                        chunk = text[start:start + last_delimiter + len(delimiter)]
+                        chunk = chunk[:last_delimiter + len(delimiter)]
                         break
-            
-            chunks.append(chunk.strip())
-            start += chunk_size - overlap
+            return chunk.strip(), start + len(chunk)
         
+        def advance(cut_end: int) -> int:
+            nonlocal previous_end
+            previous_end = cut_end
+            # Overlap with the text that was actually emitted; a chunk cut
+            # shorter than the overlap is not overlapped, so start always moves on
+            return cut_end - overlap if cut_end - overlap > start else cut_end
+        
+        for piece in pieces:
+            buffer += ("\n\n" if buffer or base else "") + piece
+            # A chunk is final only once text beyond its end has arrived
+            while start - base + chunk_size < len(buffer):
+                chunk, cut_end = cut(final=False)
+                if chunk:
+                    yield chunk
+                start = advance(cut_end)
+            buffer = buffer[start - base:]
+            base = start
+        
+        while start - base < len(buffer):
+            chunk, cut_end = cut(final=True)
+            if chunk:
+                yield chunk
+            start = advance(cut_end)
+    
+    def split_text_into_chunks(self, text: str, chunk_size: int = CHUNK_SIZE, 
+                               overlap: int = CHUNK_OVERLAP) -> List[str]:
+        """
+        Split text into overlapping chunks for better context preservation
+        
+        Args:
+            text: Input text to split
+            chunk_size: Maximum size of each chunk
+            overlap: Number of characters to overlap between chunks
+            
+        Returns:
+            List of text chunks
+        """
+        chunks = list(self.iter_text_chunks([text], chunk_size=chunk_size, overlap=overlap))
         print(f"✓ Split text into {len(chunks)} chunks")
         return chunks
     
@@ -171,123 +452,433 @@ class RAGService:
         Returns:
             List of embedding vectors
         """
-        if openai_client is None:
-            raise ValueError("Requesty.ai client not initialized. Please set REQUESTY_API_KEY in .env file")
+        embeddings, _ = self.generate_embeddings_with_usage(texts)
+        return embeddings
+    
+    def generate_embeddings_with_usage(self, texts: List[str],
+                                       max_retries: Optional[int] = None) -> Tuple[List[List[float]], int]:
+        """
+        Generate embeddings and report the tokens billed for them
+        
+        Args:
+            texts: List of text chunks to embed
+            max_retries: Override the client's own retry count (the embedding
+                         dispatcher passes 0 and handles retries itself)
+            
+        Returns:
+            Tuple of (embedding vectors, tokens used; 0 when unknown)
+        """
+        if self.embedding_store is None:
+            return self._request_embeddings(texts, max_retries)
+        
+        # Only texts the store has never seen go to Requesty.ai
+        embeddings = self.embedding_store.get_many(texts)
+        missing = [i for i in range(len(texts)) if i not in embeddings]
+        tokens = 0
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            new_embeddings, tokens = self._request_embeddings(missing_texts, max_retries)
+            self.embedding_store.put_many(missing_texts, new_embeddings)
+            embeddings.update(zip(missing, new_embeddings))
+        
+        return [embeddings[i] for i in range(len(texts))], tokens
+    
+    def _request_embeddings(self, texts: List[str],
+                            max_retries: Optional[int] = None) -> Tuple[List[List[float]], int]:
+        """Call the embedding provider (or the injected embedder) directly"""
+        if self.embedder is not None:
+            return self.embedder(texts), 0
+        
+        openai_client = get_openai_client()
         
         try:
-            response = openai_client.embeddings.create(
-                model="openai/text-embedding-3-large",  # Requesty format: provider/model
+            client = openai_client if max_retries is None else openai_client.with_options(max_retries=max_retries)
+            response = client.embeddings.create(
+                model=EMBEDDING_MODEL,
                 input=texts,
             )
             
             embeddings = [item.embedding for item in response.data]
-            print(f"✓ Generated {len(embeddings)} embeddings via Requesty.ai using openai/text-embedding-3-large")
-            return embeddings
+            tokens = response.usage.total_tokens if response.usage else 0
+            print(f"✓ Generated {len(embeddings)} embeddings via Requesty.ai using {EMBEDDING_MODEL}")
+            return embeddings, tokens
             
         except Exception as e:
             print(f"✗ Error generating embeddings: {str(e)}")
             raise
     
-    def index_pdf(self, pdf_path: str, document_name: Optional[str] = None) -> dict:
+    def index_pdf(self, pdf_path: str, document_name: Optional[str] = None,
+                  progress_callback: Optional[Callable[[dict], None]] = None,
+                  file_hash: Optional[str] = None, force: bool = False,
+                  chunker: Callable[[Iterable[Tuple[int, str]]], Iterator[TextChunk]] = chunk_pages) -> dict:
         """
         Complete pipeline: Load PDF, chunk, embed, and store in Qdrant Cloud
         
+        Re-indexing a document is incremental: the new chunk set is diffed against
+        the stored one by content hash, only new chunks are embedded and upserted,
+        and stale chunks are deleted. An unchanged file is skipped outright. Runs
+        for the same document (in this process) wait for each other.
+        
         Args:
             pdf_path: Path to the PDF file
             document_name: Optional name for the document (defaults to filename)
+            progress_callback: Optional callable receiving a progress snapshot
+                               (stage, pages, chunks, embedded batches) after each step
+            file_hash: sha256 of the file if already known (computed otherwise)
+            force: Re-chunk even if this version of the file is already indexed
+                   (e.g. after changing the chunker settings)
+            chunker: Callable turning (page_number, text) pairs into TextChunks
             
         Returns:
-            Dictionary with indexing statistics
+            Dictionary with indexing statistics and per-stage timings (seconds)
         """
         if document_name is None:
             document_name = Path(pdf_path).stem
+        if file_hash is None:
+            file_hash = file_sha256(pdf_path)
+        
+        # Two runs for one document would delete each other's points as stale
+        with _document_lock(self.collection_name, document_name):
+            return self._index_document(pdf_path, document_name, file_hash, force,
+                                        progress_callback, chunker)
+    
+    def _index_document(self, pdf_path: str, document_name: str, file_hash: str, force: bool,
+                        progress_callback: Optional[Callable[[dict], None]],
+                        chunker: Callable[[Iterable[Tuple[int, str]]], Iterator[TextChunk]]) -> dict:
+        """index_pdf for a named and hashed document, under the document's lock"""
+        indexed = self.registry.get(document_name)
+        if indexed is not None and indexed["file_hash"] == file_hash and not force \
+                and self.is_version_live(indexed):
+            print(f"✓ {document_name} is unchanged since {indexed['indexed_at']}, skipping")
+            return {
+                "document_name": document_name,
+                "document_version": file_hash,
+                "total_chunks": indexed["total_chunks"],
+                "total_characters": indexed["total_characters"],
+                "chunks_added": 0,
+                "chunks_unchanged": indexed["total_chunks"],
+                "chunks_removed": 0,
+                "status": "unchanged"
+            }
         
         print(f"\n📚 Starting indexing for: {document_name}")
+        stage_timings = {"extraction": 0.0, "chunking": 0.0, "embedding": 0.0, "upsert": 0.0}
+        progress = {"stage": "indexing", "pages_done": 0, "pages_total": 0,
+                    "chunks_done": 0, "batches_done": 0}
+        totals = {"characters": 0, "chunks": 0, "tokens": 0, "added": 0}
         
-        # Step 1: Load PDF
-        text = self.load_pdf(pdf_path)
+        def report(**updates):
+            progress.update(updates)
+            if progress_callback is not None:
+                progress_callback(dict(progress))
         
-        # Step 2: Split into chunks
-        chunks = self.split_text_into_chunks(text)
+        # Chunks already stored for this document, by content hash
+        existing = self._stored_chunk_ids(document_name)
+        stored_count = sum(len(point_ids) for point_ids in existing.values())
+        # Ids of stored points, kept or not: a new chunk must not take one of them
+        taken_ids = {str(stored_id) for point_ids in existing.values() for stored_id in point_ids}
+        unchanged = []  # (position payload, point id) of chunks that can stay as they are
+        pending_chunks = deque()  # (position payload, point id, chunk_hash) of chunks sent for embedding
+        occurrences = Counter()
         
-        # Step 3: Generate embeddings (batch processing for efficiency)
-        batch_size = 100
-        all_embeddings = []
+        # Stage 1: pages stream out of the text cache, or out of the PDF as their
+        # ranges are extracted
+        def pages():
+            pages = self.iter_document_pages(
+                pdf_path, file_hash,
+                page_callback=lambda done, total: report(pages_done=done, pages_total=total)
+            )
+            while True:
+                stage_start = time.perf_counter()
+                page = next(pages, None)
+                stage_timings["extraction"] += time.perf_counter() - stage_start
+                if page is None:
+                    return
+                if page[1].strip():
+                    totals["characters"] += len(page[1])
+                    yield page
         
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
-            embeddings = self.generate_embeddings(batch)
-            all_embeddings.extend(embeddings)
-            print(f"  Processed batch {i//batch_size + 1}/{(len(chunks)-1)//batch_size + 1}")
+        # Stage 2: chunks are cut from the page stream at sentence boundaries; chunks
+        # already stored are kept as they are, the rest are packed into token-sized batches
+        def new_chunks():
+            for chunk_index, text_chunk in enumerate(chunker(pages())):
+                totals["chunks"] += 1
+                chunk = text_chunk.text
+                position = chunk_position(chunk_index, text_chunk)
+                chunk_hash = chunk_sha256(chunk)
+                stored_ids = existing.get(chunk_hash)
+                if stored_ids:
+                    # A chunk repeated within the document is stored once per occurrence
+                    unchanged.append((position, stored_ids.pop()))
+                    continue
+                # The occurrence numbers of kept copies can be any, so skip those in use
+                occurrence = occurrences[chunk_hash]
+                while point_id(document_name, chunk_hash, occurrence) in taken_ids:
+                    occurrence += 1
+                occurrences[chunk_hash] = occurrence + 1
+                new_point_id = point_id(document_name, chunk_hash, occurrence)
+                taken_ids.add(new_point_id)
+                pending_chunks.append((position, new_point_id, chunk_hash))
+                # The chunker has counted its tokens already
+                yield chunk, text_chunk.tokens
         
-        # Step 4: Store in Qdrant Cloud
-        # Get current max ID to avoid conflicts
-        try:
-            collection_info = self.client.get_collection(COLLECTION_NAME)
-            current_count = collection_info.points_count
-        except:
-            current_count = 0
-        
-        points = [
-            PointStruct(
-                id=current_count + i,
-                vector=all_embeddings[i],
-                payload={
-                    "text": chunks[i],
-                    "document": document_name,
-                    "chunk_index": i,
-                    "chunk_size": len(chunks[i])
-                }
-            )
-            for i in range(len(chunks))
-        ]
+        def chunk_batches():
+            batches = token_batches(new_chunks())
+            producer_time = 0.0
+            while True:
+                stage_start = time.perf_counter()
+                batch = next(batches, None)
+                producer_time += time.perf_counter() - stage_start
+                # Producer time includes pulling pages, which is billed to extraction
+                stage_timings["chunking"] = producer_time - stage_timings["extraction"]
+                if batch is None:
+                    return
+                yield batch
         
-        self.client.upsert(
-            collection_name=COLLECTION_NAME,
-            points=points
+        # Stage 3: batches are embedded concurrently under an adaptive rate limit
+        index_start = time.perf_counter()
+        batches = prefetch(chunk_batches(), name="ingest-chunk")
+        embedded = self.dispatcher.map(batches)
+        
+        # Stage 4: each embedded batch is upserted as soon as it arrives (in order);
+        # upserts are not awaited, the final cleanup below is
+        for batch_number, (batch, embeddings, tokens, seconds) in enumerate(embedded, start=1):
+            stage_timings["embedding"] += seconds
+            totals["tokens"] += tokens
+            stage_start = time.perf_counter()
+            points = []
+            for chunk, embedding in zip(batch, embeddings):
+                position, chunk_point_id, chunk_hash = pending_chunks.popleft()
+                points.append(PointStruct(
+                    id=chunk_point_id,
+                    vector=embedding,
+                    payload={
+                        "text": chunk,
+                        "document": document_name,
+                        "document_version": file_hash,
+                        "chunk_hash": chunk_hash,
+                        "chunk_size": len(chunk),
+                        **position
+                    }
+                ))
+            for start in range(0, len(points), QDRANT_UPSERT_BATCH_SIZE):
+                self._upsert(points[start:start + QDRANT_UPSERT_BATCH_SIZE], wait=False)
+            totals["added"] += len(batch)
+            stage_timings["upsert"] += time.perf_counter() - stage_start
+            print(f"  Indexed batch {batch_number} ({totals['added']} new chunks so far)")
+            report(chunks_done=totals["added"], batches_done=batch_number)
+        
+        # Unchanged chunks move to the new version (their position may have shifted),
+        # then everything still tagged with an older version is stale
+        report(stage="cleanup")
+        stage_start = time.perf_counter()
+        self._retag_chunks(unchanged, file_hash)
+        removed = stored_count - len(unchanged)
+        # Updates are applied in order, so once this delete is acknowledged every
+        # earlier un-awaited upsert has been applied as well
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(filter=Filter(
+                must=[FieldCondition(key="document", match=MatchValue(value=document_name))],
+                must_not=[FieldCondition(key="document_version", match=MatchValue(value=file_hash))]
+            )),
+            wait=True
         )
+        stage_timings["upsert"] += time.perf_counter() - stage_start
+        
+        index_time = time.perf_counter() - index_start
+        self.registry.record(document_name, file_hash, totals["chunks"], totals["characters"])
+        report(stage="done")
         
-        print(f"✓ Successfully indexed {len(chunks)} chunks to Qdrant Cloud\n")
+        print(f"✓ Successfully indexed {document_name}: {totals['added']} new, "
+              f"{len(unchanged)} unchanged, {removed} removed chunks\n")
         
         return {
             "document_name": document_name,
-            "total_chunks": len(chunks),
-            "total_characters": len(text),
-            "status": "indexed"
+            "document_version": file_hash,
+            "total_chunks": totals["chunks"],
+            "total_characters": totals["characters"],
+            "chunks_added": totals["added"],
+            "chunks_unchanged": len(unchanged),
+            "chunks_removed": removed,
+            "status": "indexed",
+            "stage_timings": {stage: round(t, 4) for stage, t in stage_timings.items()},
+            "throughput": {
+                "chunks_per_second": round(totals["added"] / index_time, 2) if index_time else 0,
+                "tokens_per_second": round(totals["tokens"] / index_time, 2) if index_time else 0,
+                "embedding_tokens": totals["tokens"],
+                "embedding_concurrency": self.dispatcher.limiter.limit
+            }
         }
     
-    def query_similar_chunks(self, query: str, n_results: int = 5) -> dict:
+    def is_version_live(self, indexed: dict) -> bool:
+        """
+        True if the collection holds the chunks of a registry entry
+        
+        The registry records what was indexed, not into which collection version:
+        after a rollback or switch to an older version, a document indexed since
+        is in the registry but not behind the alias.
+        """
+        if indexed["total_chunks"] == 0:
+            return True
+        return self.client.count(
+            collection_name=self.collection_name,
+            count_filter=Filter(must=[
+                FieldCondition(key="document", match=MatchValue(value=indexed["document_name"])),
+                FieldCondition(key="document_version", match=MatchValue(value=indexed["file_hash"])),
+            ]),
+            exact=True,
+        ).count > 0
+    
+    def find_live_by_hash(self, file_hash: str, document_name: Optional[str] = None) -> Optional[dict]:
+        """
+        Registry entry of a document indexed from this file content and live in the collection, or None
+        
+        Args:
+            file_hash: sha256 of the file
+            document_name: Document to prefer when the same content is indexed under several names
+        """
+        preferred = self.registry.get(document_name) if document_name else None
+        if preferred is not None and preferred["file_hash"] == file_hash and self.is_version_live(preferred):
+            return preferred
+        indexed = self.registry.find_by_hash(file_hash)
+        if indexed is not None and self.is_version_live(indexed):
+            return indexed
+        return None
+    
+    def _stored_chunk_ids(self, document_name: str) -> Dict[Optional[str], list]:
+        """Point ids of a document's stored chunks, grouped by chunk content hash"""
+        existing: Dict[Optional[str], list] = {}
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(
+                    must=[FieldCondition(key="document", match=MatchValue(value=document_name))]
+                ),
+                with_payload=["chunk_hash"],
+                with_vectors=False,
+                limit=1000,
+                offset=offset,
+            )
+            for point in points:
+                existing.setdefault((point.payload or {}).get("chunk_hash"), []).append(point.id)
+            if offset is None:
+                return existing
+    
+    def _upsert(self, points: List[PointStruct], wait: bool = True):
+        """
+        Upsert points, retrying transient failures with exponential backoff
+        
+        Point ids are deterministic, so a retried upsert that had in fact been
+        applied just overwrites the same points.
+        """
+        for attempt in range(QDRANT_UPSERT_RETRIES + 1):
+            try:
+                return self.client.upsert(collection_name=self.collection_name, points=points, wait=wait)
+            except Exception as e:
+                if attempt >= QDRANT_UPSERT_RETRIES or not _is_transient_qdrant_error(e):
+                    raise
+                delay = min(0.5 * (2 ** attempt), 10.0)
+                print(f"⚠ Qdrant upsert failed ({e.__class__.__name__}), "
+                      f"retry {attempt + 1}/{QDRANT_UPSERT_RETRIES} in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def _retag_chunks(self, chunks: List[Tuple[dict, Union[int, str]]], document_version: str):
+        """Point unchanged chunks at the new document version and chunk position"""
+        operations = [
+            SetPayloadOperation(set_payload=SetPayload(
+                payload={**position, "document_version": document_version},
+                points=[chunk_point_id],
+            ))
+            for position, chunk_point_id in chunks
+        ]
+        for start in range(0, len(operations), RETAG_BATCH_SIZE):
+            self.client.batch_update_points(
+                collection_name=self.collection_name,
+                update_operations=operations[start:start + RETAG_BATCH_SIZE],
+            )
+    
+    def search_by_vector(self, query_vector: List[float], n_results: int = 5,
+                         hnsw_ef: Optional[int] = None, exact: Optional[bool] = None,
+                         score_threshold: Optional[float] = None,
+                         with_payload: Union[bool, List[str]] = True):
+        """
+        Run a vector search against Qdrant Cloud with explicit search parameters
+        
+        Args:
+            query_vector: Embedding of the query
+            n_results: Number of points to retrieve
+            hnsw_ef: HNSW beam size (higher = better recall, slower); None uses the default
+            exact: Bypass the HNSW index and do a full scan; None uses the default
+            score_threshold: Drop hits scoring below this value; None uses the default
+            with_payload: True for the full payload, or a list of payload fields to return
+            
+        Returns:
+            List of scored points
+        """
+        hnsw_ef = hnsw_ef if hnsw_ef is not None else SEARCH_HNSW_EF
+        exact = exact if exact is not None else SEARCH_EXACT
+        score_threshold = score_threshold if score_threshold is not None else SEARCH_SCORE_THRESHOLD
+        
+        response = self.client.query_points(
+            collection_name=self.collection_name,
+            query=query_vector,
+            limit=n_results,
+            search_params=SearchParams(hnsw_ef=hnsw_ef, exact=exact),
+            score_threshold=score_threshold,
+            with_payload=with_payload,
+        )
+        return response.points
+    
+    def query_similar_chunks(self, query: str, n_results: int = 5,
+                             hnsw_ef: Optional[int] = None, exact: Optional[bool] = None,
+                             score_threshold: Optional[float] = None,
+                             with_payload: Union[bool, List[str]] = True) -> dict:
         """
         Query Qdrant Cloud for similar text chunks based on the question
         
         Args:
             query: User's question
             n_results: Number of similar chunks to retrieve
+            hnsw_ef: HNSW beam size override (see search_by_vector)
+            exact: Exact (brute-force) search override
+            score_threshold: Minimum similarity score for returned chunks
+            with_payload: True for the full payload, or a list of payload fields to return
             
         Returns:
             Dictionary containing relevant context chunks
         """
         try:
             # Generate embedding for the query
+            stage_start = time.perf_counter()
             query_embedding = self.generate_embeddings([query])[0]
+            embedding_time = time.perf_counter() - stage_start
             
             # Query Qdrant Cloud using query_points API (correct modern API)
-            response = self.client.query_points(
-                collection_name=COLLECTION_NAME,
-                query=query_embedding,
-                limit=n_results,
-                with_payload=True,
+            stage_start = time.perf_counter()
+            points = self.search_by_vector(
+                query_embedding,
+                n_results=n_results,
+                hnsw_ef=hnsw_ef,
+                exact=exact,
+                score_threshold=score_threshold,
+                with_payload=with_payload,
             )
+            search_time = time.perf_counter() - stage_start
             
             # Format results - query_points returns QueryResponse with points attribute
             context_chunks = []
-            for hit in response.points:
+            for hit in points:
+                payload = hit.payload or {}
                 context_chunks.append({
-                    "text": hit.payload["text"],
+                    "text": payload.get("text", ""),
                     "metadata": {
-                        "document": hit.payload.get("document", "unknown"),
-                        "chunk_index": hit.payload.get("chunk_index", 0),
-                        "chunk_size": hit.payload.get("chunk_size", 0)
+                        "document": payload.get("document", "unknown"),
+                        "chunk_index": payload.get("chunk_index", 0),
+                        "chunk_size": payload.get("chunk_size", 0),
+                        "page_start": payload.get("page_start"),
+                        "page_end": payload.get("page_end")
                     },
                     "score": hit.score
                 })
@@ -297,7 +888,11 @@ class RAGService:
             return {
                 "query": query,
                 "context_chunks": context_chunks,
-                "total_results": len(context_chunks)
+                "total_results": len(context_chunks),
+                "stage_timings": {
+                    "embedding": round(embedding_time, 4),
+                    "search": round(search_time, 4)
+                }
             }
             
         except Exception as e:
@@ -317,9 +912,10 @@ class RAGService:
             Dictionary with collection statistics
         """
         try:
-            collection_info = self.client.get_collection(COLLECTION_NAME)
+            collection_info = self.client.get_collection(self.collection_name)
             return {
-                "collection_name": COLLECTION_NAME,
+                "collection_name": self.collection_name,
+                "active_version": alias_target(self.client, self.collection_name) if self.uses_alias else None,
                 "total_chunks": collection_info.points_count,
                 "vector_size": collection_info.config.params.vectors.size,
                 "status": "active",
@@ -327,31 +923,50 @@ class RAGService:
             }
         except Exception as e:
             return {
-                "collection_name": COLLECTION_NAME,
+                "collection_name": self.collection_name,
                 "error": str(e),
                 "status": "error"
             }
     
     def clear_collection(self):
-        """Clear all documents from the collection"""
+        """
+        Clear all documents from the collection
+        
+        For the alias, a new empty version goes live and the old one is kept
+        (roll back with `python collection_versions.py rollback`); a legacy
+        plain collection is first migrated into a version, so it is kept too.
+        """
         try:
-            self.client.delete_collection(collection_name=COLLECTION_NAME)
-            self._ensure_collection_exists()
-            print(f"✓ Cleared collection: {COLLECTION_NAME}")
+            if self.uses_alias:
+                if is_legacy_collection(self.client, self.collection_name):
+                    migrate_legacy_collection(self.client, self.collection_name,
+                                              payload_indexes=not QDRANT_LOCAL)
+                previous = alias_target(self.client, self.collection_name)
+                empty = create_version(self.client, self.collection_name, self.vectors_config(),
+                                       payload_indexes=not QDRANT_LOCAL)
+                switch_alias(self.client, self.collection_name, empty)
+                if previous:
+                    print(f"✓ Previous version {previous} kept for rollback")
+            else:
+                self.client.delete_collection(collection_name=self.collection_name)
+                self._ensure_collection_exists(self.client)
+            self.registry.clear()
+            print(f"✓ Cleared collection: {self.collection_name}")
         except Exception as e:
             print(f"✗ Error clearing collection: {str(e)}")
             raise
 
 
-# Singleton instance
-rag_service = RAGService()
+# Singleton instance; connects to Qdrant on first use, so importing this module
+# does no network I/O
+rag_service = RAGService(connect=False)
 
 
 def get_openai_client() -> OpenAI:
     """
     Get the configured OpenAI-compatible client instance used via Requesty.ai.
     
-    This client is initialized at module import time using:
+    The client is created on first use from:
       - REQUESTY_API_KEY
       - REQUESTY_BASE_URL (default: https://router.requesty.ai/v1)
     
@@ -359,8 +974,11 @@ def get_openai_client() -> OpenAI:
     
     Returns:
         OpenAI client (Requesty.ai gateway)
+        
+    Raises:
+        ServiceUnavailable: If REQUESTY_API_KEY is not set or the client could not be created
     """
-    return openai_client
+    return requesty_client.get()
 
 
 # System prompt for the AI tutor
@@ -0,0 +1,142 @@
+"""
+Rate Limiter for Mualleem Platform
+Sliding-window counter limiter: each client keeps only the request counts of the
+current and previous fixed windows, and the previous count is weighted by how
+much of it still overlaps the sliding window. A check is O(1) in time and
+memory per client. Clients live in an LRU map that drops idle clients and is
+capped at a maximum size, so memory stays bounded however many distinct
+clients (NAT'd school networks, mobile IPs) show up.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+RATE_LIMIT = int(os.getenv("RATE_LIMIT", "60"))  # requests per window
+RATE_WINDOW = float(os.getenv("RATE_WINDOW", "60"))  # seconds
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+# Identifiers tried in order; the first one present on the request is the key
+RATE_LIMIT_KEYS = [key.strip() for key in os.getenv("RATE_LIMIT_KEYS", "ip").split(",") if key.strip()]
+SESSION_HEADER = os.getenv("RATE_LIMIT_SESSION_HEADER", "X-Session-ID")
+USER_HEADER = os.getenv("RATE_LIMIT_USER_HEADER", "X-User-ID")
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float  # seconds until a request would be allowed (0 if allowed)
+
+
+def advance_window(start: float, current: int, previous: int, now: float,
+                   window: float) -> Tuple[float, int, int]:
+    """Roll a client's (start, current, previous) forward to the window containing `now`"""
+    elapsed_windows = int((now - start) // window)
+    if elapsed_windows <= 0:
+        return start, current, previous
+    return start + elapsed_windows * window, 0, current if elapsed_windows == 1 else 0
+
+
+def evaluate(start: float, current: int, previous: int, now: float, limit: int,
+             window: float) -> RateLimitResult:
+    """Decide one request against up-to-date window counts (the caller counts it if allowed)"""
+    # Share of the previous window still inside the sliding window
+    weight = 1.0 - (now - start) / window
+    estimate = previous * weight + current
+    if estimate + 1 <= limit:
+        return RateLimitResult(True, max(int(limit - estimate - 1), 0), 0.0)
+    if current < limit:
+        # Wait for enough of the previous window to slide out
+        needed = previous - (limit - 1 - current)
+        return RateLimitResult(False, 0, max(start + window * needed / previous - now, 0.0))
+    # The current window alone is full: wait for it to become the previous
+    # window and slide out in proportion
+    needed = current - (limit - 1)
+    return RateLimitResult(False, 0, max(start + window * (1 + needed / current) - now, 0.0))
+
+
+class _Window:
+    __slots__ = ("start", "current", "previous")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.current = 0
+        self.previous = 0
+
+
+class SlidingWindowLimiter:
+    """At most `limit` requests per `window` seconds per key (sliding-window counter)"""
+
+    def __init__(self, limit: int = RATE_LIMIT, window: float = RATE_WINDOW,
+                 max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.limit = limit
+        self.window = window
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[str, _Window]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def check(self, key: str, now: Optional[float] = None) -> RateLimitResult:
+        """
+        Count a request for `key` if it is within the limit
+
+        Args:
+            key: Client identifier
+            now: Current time in seconds (monotonic); for tests
+
+        Returns:
+            RateLimitResult; a rejected request is not counted
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._clients.get(key)
+            if state is None:
+                state = self._clients[key] = _Window(now - now % self.window)
+            else:
+                self._clients.move_to_end(key)
+            state.start, state.current, state.previous = advance_window(
+                state.start, state.current, state.previous, now, self.window
+            )
+            result = evaluate(state.start, state.current, state.previous, now, self.limit, self.window)
+            if result.allowed:
+                state.current += 1
+            self._evict(now)
+            return result
+
+    def _evict(self, now: float):
+        """Drop least recently seen clients that are idle or over the size cap (amortized O(1))"""
+        clients = self._clients
+        while clients:
+            key, state = next(iter(clients.items()))
+            # Idle: both the current and the previous window have expired
+            if len(clients) <= self.max_clients and state.start + 2 * self.window > now:
+                break
+            del clients[key]
+            self.evicted += 1
+
+
+def client_key(request, identifiers: Iterable[str] = RATE_LIMIT_KEYS) -> str:
+    """
+    Rate-limit key for a request: the first available of user, session or ip
+
+    User and session come from request headers set by the frontend. They are
+    client-supplied, so list "ip" last as the fallback rather than relying on
+    them alone.
+    """
+    for identifier in identifiers:
+        if identifier == "user":
+            value = request.headers.get(USER_HEADER)
+        elif identifier == "session":
+            value = request.headers.get(SESSION_HEADER)
+        elif identifier == "ip":
+            value = request.client.host if request.client else None
+        else:
+            raise ValueError(f"unknown rate limit key: {identifier}")
+        if value:
+            return f"{identifier}:{value}"
+    return "anonymous"
+
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Rebuild the curriculum index from cached text
+Re-chunks and re-embeds every indexed document from the extracted-text cache
+(no PDF parsing) with the given chunker settings. Chunks whose text did not
+change keep their vectors; the embedding store serves repeated texts.
+
+Usage:
+    python rebuild_index.py --max-tokens 300 --overlap-tokens 40
+    python rebuild_index.py --max-tokens 600 --collection curriculum_experiment
+    python rebuild_index.py --document physics.pdf --max-tokens 300
+"""
+
+import argparse
+import json
+import time
+from functools import partial
+
+from document_registry import DocumentRegistry
+from rag_service import RAGService, rag_service
+from text_chunker import CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, CHUNK_OVERLAP_TOKENS, chunk_pages
+
+
+def rebuild(target: RAGService, documents: list, chunker) -> list:
+    """Re-index documents into `target` from cached text; returns per-document results"""
+    results = []
+    for document in documents:
+        cached = target.text_cache.get(document["file_hash"])
+        if cached is None:
+            print(f"✗ No cached text for {document['document_name']}; index the PDF once to cache it")
+            results.append({"document_name": document["document_name"], "status": "missing_text"})
+            continue
+
+        start = time.perf_counter()
+        result = target.index_pdf(cached["source"], document_name=document["document_name"],
+                                  file_hash=document["file_hash"], force=True, chunker=chunker)
+        results.append({
+            "document_name": document["document_name"],
+            "status": result["status"],
+            "total_chunks": result["total_chunks"],
+            "chunks_added": result["chunks_added"],
+            "chunks_unchanged": result["chunks_unchanged"],
+            "chunks_removed": result["chunks_removed"],
+            "seconds": round(time.perf_counter() - start, 2),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the index from cached text")
+    parser.add_argument("--max-tokens", type=int, default=CHUNK_MAX_TOKENS)
+    parser.add_argument("--overlap-tokens", type=int, default=CHUNK_OVERLAP_TOKENS)
+    parser.add_argument("--min-tokens", type=int, default=CHUNK_MIN_TOKENS)
+    parser.add_argument("--collection", default=None,
+                        help="Write to this collection instead of rebuilding the live one in place")
+    parser.add_argument("--document", nargs="*", default=None, help="Only these document names")
+    parser.add_argument("--output", default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    if rag_service.text_cache is None:
+        parser.error("the extracted-text cache is disabled (TEXT_CACHE_ENABLED=false)")
+
+    documents = rag_service.registry.all()
+    if args.document:
+        documents = [d for d in documents if d["document_name"] in set(args.document)]
+    if not documents:
+        print("⚠ No indexed documents to rebuild")
+        return
+
+    if args.collection:
+        # The registry describes the live collection; the new one starts empty
+        target = RAGService(collection_name=args.collection, registry=DocumentRegistry(":memory:"),
+                            text_cache=rag_service.text_cache, client=rag_service.client,
+                            dispatcher=rag_service.dispatcher)
+    else:
+        target = rag_service
+
+    chunker = partial(chunk_pages, max_tokens=args.max_tokens,
+                      overlap_tokens=args.overlap_tokens, min_tokens=args.min_tokens)
+    print(f"🔁 Rebuilding {len(documents)} document(s) into {target.collection_name} "
+          f"(max_tokens={args.max_tokens}, overlap_tokens={args.overlap_tokens})")
+    results = rebuild(target, documents, chunker)
+
+    for result in results:
+        if result["status"] == "missing_text":
+            continue
+        print(f"  {result['document_name']}: {result['total_chunks']} chunks "
+              f"(+{result['chunks_added']} ={result['chunks_unchanged']} -{result['chunks_removed']}) "
+              f"in {result['seconds']}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"collection": target.collection_name, "max_tokens": args.max_tokens,
+                       "overlap_tokens": args.overlap_tokens, "min_tokens": args.min_tokens,
+                       "documents": results}, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
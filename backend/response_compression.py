@@ -0,0 +1,139 @@
+"""
+Response Compression for Mualleem Platform
+ASGI middleware that compresses responses above a size threshold with the best
+encoding the client accepts: Brotli (the `brotli` package from
+requirements.txt) or gzip; without the package it falls back to gzip only. Arabic answers are mostly multi-byte UTF-8 and
+compress well. Streamed responses are compressed chunk by chunk and flushed,
+so streaming still works.
+"""
+
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # not installed: gzip only
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))  # 11 is too slow per request
+
+# Already compressed, or must reach the client unbuffered
+UNCOMPRESSED_TYPES = ("image/", "application/pdf", "application/zip", "text/event-stream")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick "br" or "gzip" from an Accept-Encoding header
+
+    Returns:
+        The encoding to use, or None to send the body uncompressed
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip()] = quality
+    wildcard = weights.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda name: weights.get(name, wildcard))
+    return best if weights.get(best, wildcard) > 0 else None
+
+
+class _Encoder:
+    """Incremental gzip or Brotli compressor"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._gzip = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk; non-final chunks are flushed so the client can decode them"""
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._gzip.compress(data)
+        return out + self._gzip.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    return _Encoder(encoding).compress(body, final=True)
+
+
+class CompressionMiddleware:
+    """Compress responses of at least minimum_size bytes (gzip or Brotli)"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = ("content-encoding" in headers
+                               or content_type.startswith(UNCOMPRESSED_TYPES))
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows the size
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                body = encoder.compress(body, final=not more_body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                start = None
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            await send({"type": "http.response.body", "body": encoder.compress(body, final=not more_body),
+                        "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Search Tuning Harness for Mualleem AI Tutor
+Sweeps Qdrant search parameters (hnsw_ef, exact, score_threshold) over a labeled
+question set and reports recall@k against p50/p95 search latency.
+
+Labeled question set format (JSON):
+    [
+        {
+            "question": "ما هو قانون نيوتن الثاني؟",
+            "relevant": [{"document": "physics.pdf", "chunk_index": 42}]
+        }
+    ]
+
+Usage:
+    python search_tuning.py questions.json --k 3 --output search_tuning_results.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from rag_service import rag_service
+
+DEFAULT_HNSW_EF = [16, 32, 64, 128, 256]
+DEFAULT_SCORE_THRESHOLDS = [None]
+REPEATS = 3  # timed searches per question per configuration
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def load_questions(path: str) -> List[Dict]:
+    """Load the labeled question set and normalize relevant chunk keys"""
+    with open(path, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    for item in questions:
+        item["relevant_keys"] = {
+            (rel["document"], rel["chunk_index"]) for rel in item["relevant"]
+        }
+    return questions
+
+
+def evaluate_config(questions: List[Dict], embeddings: List[List[float]], k: int,
+                    hnsw_ef: Optional[int], exact: bool,
+                    score_threshold: Optional[float]) -> Dict:
+    """Run every question against one search configuration"""
+    latencies = []
+    recalls = []
+
+    for item, vector in zip(questions, embeddings):
+        hits = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            hits = rag_service.search_by_vector(
+                vector,
+                n_results=k,
+                hnsw_ef=hnsw_ef,
+                exact=exact,
+                score_threshold=score_threshold,
+                with_payload=["document", "chunk_index"],
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        retrieved = {
+            (hit.payload.get("document"), hit.payload.get("chunk_index")) for hit in hits
+        }
+        relevant = item["relevant_keys"]
+        recalls.append(len(retrieved & relevant) / len(relevant) if relevant else 0.0)
+
+    return {
+        "hnsw_ef": hnsw_ef,
+        "exact": exact,
+        "score_threshold": score_threshold,
+        f"recall_at_{k}": round(statistics.mean(recalls), 4),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "searches": len(latencies),
+    }
+
+
+def run_sweep(questions_path: str, k: int, hnsw_ef_values: List[int],
+              score_thresholds: List[Optional[float]]) -> Dict:
+    """Sweep the parameter grid and collect recall/latency points"""
+    questions = load_questions(questions_path)
+    print(f"📋 Loaded {len(questions)} labeled questions")
+
+    # Embed once up front so only search latency is measured
+    embeddings = rag_service.generate_embeddings([item["question"] for item in questions])
+
+    configs = [(None, True, threshold) for threshold in score_thresholds]
+    configs += [
+        (ef, False, threshold)
+        for ef, threshold in itertools.product(hnsw_ef_values, score_thresholds)
+    ]
+
+    results = []
+    for hnsw_ef, exact, threshold in configs:
+        result = evaluate_config(questions, embeddings, k, hnsw_ef, exact, threshold)
+        results.append(result)
+        label = "exact" if exact else f"hnsw_ef={hnsw_ef}"
+        print(f"  {label:<14} threshold={threshold!s:<6} "
+              f"recall@{k}={result[f'recall_at_{k}']:.3f} "
+              f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms")
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "questions": len(questions),
+        "k": k,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep Qdrant search parameters")
+    parser.add_argument("questions", help="Path to the labeled question set (JSON)")
+    parser.add_argument("--k", type=int, default=3, help="Number of results per query")
+    parser.add_argument("--hnsw-ef", type=int, nargs="+", default=DEFAULT_HNSW_EF)
+    parser.add_argument("--score-threshold", type=float, nargs="*", default=[],
+                        help="Score thresholds to sweep (always includes none)")
+    parser.add_argument("--output", default="search_tuning_results.json")
+    args = parser.parse_args()
+
+    thresholds = DEFAULT_SCORE_THRESHOLDS + args.score_threshold
+    report = run_sweep(args.questions, args.k, args.hnsw_ef, thresholds)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
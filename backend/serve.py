@@ -0,0 +1,132 @@
+"""
+Production Server for Mualleem Platform
+Runs the API under gunicorn with one uvicorn worker (uvloop + httptools) per CPU
+core. Gunicorn owns the listening socket (backlog), replaces crashed workers,
+and recycles each worker after a jittered number of requests so memory growth
+stays bounded and workers do not all restart at once. On SIGTERM every worker
+stops accepting connections and lets in-flight requests, including streamed
+answers, finish for up to SERVER_GRACEFUL_TIMEOUT seconds.
+
+The app is imported after the fork in each worker (no preload): the lazy
+clients, SQLite connections and HTTP connection pools are per process. With
+more than one worker, rate limits and caches default to the shared SQLite
+backend (see shared_state.py), and one worker runs the ingestion jobs and the
+dependency prober for all of them (see background_leader.py). When that worker
+is recycled, its unfinished ingestion jobs go back to the queue without using
+up an attempt, and the next leader resumes them.
+
+Usage (from the backend directory):
+    python serve.py
+    WEB_CONCURRENCY=4 PORT=8080 python serve.py
+"""
+
+import os
+from typing import Dict
+
+from dotenv import load_dotenv
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # optional: not available on Windows; falls back to plain uvicorn
+    BaseApplication = None
+
+load_dotenv()
+
+
+def default_workers() -> int:
+    """One worker per CPU core this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+SERVER_HOST = os.getenv("HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(default_workers())))
+# Longer than the idle timeout of the proxy/load balancer in front (often 60s),
+# so the proxy, not the server, closes idle connections
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "75"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "10000"))  # 0 disables recycling
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "1000"))
+# Covers a streamed answer (upstream read timeout is 120s by default)
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "120"))
+SERVER_WORKER_TIMEOUT = int(os.getenv("SERVER_WORKER_TIMEOUT", "60"))  # heartbeat, not request time
+
+
+def gunicorn_options(workers: int = WEB_CONCURRENCY) -> Dict:
+    return {
+        "bind": f"{SERVER_HOST}:{SERVER_PORT}",
+        "workers": workers,
+        "worker_class": "serve.TunedUvicornWorker",
+        "chdir": os.path.dirname(os.path.abspath(__file__)),
+        "preload_app": False,
+        "keepalive": SERVER_KEEPALIVE_SECONDS,
+        "backlog": SERVER_BACKLOG,
+        "max_requests": SERVER_MAX_REQUESTS,
+        "max_requests_jitter": SERVER_MAX_REQUESTS_JITTER,
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT,
+        "timeout": SERVER_WORKER_TIMEOUT,
+        "accesslog": "-",
+    }
+
+
+if BaseApplication is not None:
+    class TunedUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": "uvloop",
+            "http": "httptools",
+            # Cancel requests still running just before gunicorn kills the worker
+            "timeout_graceful_shutdown": max(SERVER_GRACEFUL_TIMEOUT - 5, 1),
+        }
+
+    class MualleemServer(BaseApplication):
+        """Gunicorn arbiter configured from gunicorn_options()"""
+
+        def __init__(self, options: Dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Runs in each worker after the fork
+            from main import app
+            return app
+
+
+def run_uvicorn():
+    """Single uvicorn process with the same tuning (no worker recycling)"""
+    import uvicorn
+    uvicorn.run(
+        "main:app",
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        loop="uvloop",
+        http="httptools",
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+    )
+
+
+def main():
+    if WEB_CONCURRENCY > 1:
+        # Per-process counters would let a client make WEB_CONCURRENCY times the limit
+        os.environ.setdefault("SHARED_STATE_BACKEND", "sqlite")
+
+    if BaseApplication is None:
+        print("⚠ gunicorn is not installed: running a single uvicorn process")
+        run_uvicorn()
+        return
+
+    print(f"🚀 Starting Mualleem API on {SERVER_HOST}:{SERVER_PORT} with {WEB_CONCURRENCY} workers "
+          f"(shared state: {os.getenv('SHARED_STATE_BACKEND', 'memory')})")
+    MualleemServer(gunicorn_options()).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Lazy Service Clients for Mualleem Platform
+External clients (Qdrant, Requesty.ai, Supabase) are created on first use rather
+than at import time. A failed connection attempt is remembered and retried only
+after a short interval, so requests fail fast with ServiceUnavailable while a
+service is down instead of each waiting for its own timeout. The app's lifespan
+handler starts all of them concurrently in the background.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Generic, List, Optional, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+CLIENT_RETRY_SECONDS = float(os.getenv("CLIENT_RETRY_SECONDS", "15"))
+STARTUP_TIMEOUT_SECONDS = float(os.getenv("STARTUP_TIMEOUT_SECONDS", "10"))
+
+T = TypeVar("T")
+
+
+class ServiceUnavailable(RuntimeError):
+    """An external service could not be reached; the request can be retried later"""
+
+    def __init__(self, service: str, reason: str):
+        super().__init__(f"{service} unavailable: {reason}")
+        self.service = service
+        self.reason = reason
+
+
+class LazyClient(Generic[T]):
+    """A client created by `factory` on first use, with a retry interval after failures"""
+
+    def __init__(self, name: str, factory: Callable[[], T],
+                 retry_interval: float = CLIENT_RETRY_SECONDS):
+        self.name = name
+        self._factory = factory
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._ready = False
+        self._retry_at = 0.0
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def get(self) -> T:
+        """
+        The client, creating it if needed
+
+        Raises:
+            ServiceUnavailable: If creating it failed now or less than
+                                retry_interval seconds ago
+        """
+        if self._ready:
+            return self._value
+        with self._lock:
+            if self._ready:
+                return self._value
+            if self.error is not None and time.monotonic() < self._retry_at:
+                raise ServiceUnavailable(self.name, self.error)
+            try:
+                value = self._factory()
+            except Exception as e:
+                self.error = str(e) or type(e).__name__
+                self._retry_at = time.monotonic() + self.retry_interval
+                print(f"✗ Error: could not connect to {self.name}: {self.error} "
+                      f"(retrying in {self.retry_interval:g}s)")
+                raise ServiceUnavailable(self.name, self.error) from e
+            self._value, self._ready, self.error = value, True, None
+            return value
+
+    def status(self) -> dict:
+        return {"service": self.name, "ready": self._ready, "error": self.error}
+
+
+async def initialize_clients(clients: List[LazyClient],
+                             timeout: float = STARTUP_TIMEOUT_SECONDS) -> List[dict]:
+    """
+    Create clients concurrently, each bounded by `timeout`
+
+    Failures are logged, not raised: the app keeps running in degraded mode and
+    each client retries on a later use. A client that times out keeps connecting
+    in its worker thread.
+
+    Returns:
+        One status dictionary per client, with the time its attempt took
+    """
+    async def initialize(client: LazyClient) -> dict:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(run_in_threadpool(client.get), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠ Warning: {client.name} not ready after {timeout:g}s; continuing without it")
+        except ServiceUnavailable:
+            print(f"⚠ Warning: starting without {client.name}")
+        else:
+            print(f"✓ {client.name} ready")
+        return {**client.status(), "seconds": round(time.perf_counter() - start, 3)}
+
+    return list(await asyncio.gather(*(initialize(client) for client in clients)))
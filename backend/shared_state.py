@@ -0,0 +1,226 @@
+"""
+Shared State for Mualleem Platform
+State that must be shared by all uvicorn/gunicorn workers on one host: rate-limit
+counters and response caches. With SHARED_STATE_BACKEND=sqlite it lives in a
+SQLite database in WAL mode, which every worker process opens; readers never
+block and each write is one short transaction. With the default "memory"
+backend each process keeps its own copy, which is right for a single worker.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+from rate_limiter import (
+    RATE_LIMIT, RATE_LIMIT_MAX_CLIENTS, RATE_WINDOW, RateLimitResult, SlidingWindowLimiter,
+    advance_window, evaluate,
+)
+
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "memory")  # memory | sqlite
+SHARED_STATE_DB = os.getenv("SHARED_STATE_DB", "./data/shared_state.db")
+PRUNE_EVERY = 1000  # writes between sweeps of expired rows
+SHARED_STATE_BUSY_TIMEOUT = 30.0  # seconds a write waits for another worker's transaction
+# A rate-limit check runs on the request path: past this wait it lets the request through
+RATE_LIMIT_BUSY_TIMEOUT = float(os.getenv("RATE_LIMIT_BUSY_TIMEOUT", "0.25"))
+
+
+class SharedStateStore:
+    """Rate-limit windows and cache entries in a SQLite database shared by worker processes"""
+
+    def __init__(self, db_path: str = SHARED_STATE_DB):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(db_path, timeout=SHARED_STATE_BUSY_TIMEOUT, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Counters and caches can be rebuilt: skip the fsync on every commit
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                window_start REAL NOT NULL,
+                current INTEGER NOT NULL,
+                previous INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._writes = 0
+
+    def check_rate_limit(self, key: str, limit: int, window: float,
+                         now: Optional[float] = None) -> RateLimitResult:
+        """
+        Sliding-window check and count for `key`, atomic across processes
+
+        Fails open: if the database stays locked for RATE_LIMIT_BUSY_TIMEOUT
+        seconds, the request is allowed (and not counted) rather than held up.
+        """
+        # Wall clock: monotonic clocks are not comparable between processes
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute(f"PRAGMA busy_timeout = {int(RATE_LIMIT_BUSY_TIMEOUT * 1000)}")
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                print(f"⚠ Warning: rate limit not checked for {key} ({str(e)})")
+                return RateLimitResult(True, limit, 0.0)
+            finally:
+                self._conn.execute(f"PRAGMA busy_timeout = {int(SHARED_STATE_BUSY_TIMEOUT * 1000)}")
+            try:
+                row = self._conn.execute(
+                    "SELECT window_start, current, previous FROM rate_limits WHERE key = ?", (key,)
+                ).fetchone()
+                start, current, previous = advance_window(*row, now, window) if row else (now - now % window, 0, 0)
+                result = evaluate(start, current, previous, now, limit, window)
+                # Idle once both counted windows have passed
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (key, window_start, current, previous, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, start, current + 1 if result.allowed else current, previous, start + 2 * window),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._after_write(now)
+        return result
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value, or None if missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return orjson.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Cache a JSON-serializable value for `ttl` seconds"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, orjson.dumps(value), now + ttl),
+            )
+            self._after_write(now)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _after_write(self, now: float):
+        """Every PRUNE_EVERY writes, delete idle rate-limit windows and expired cache entries"""
+        self._writes += 1
+        if self._writes % PRUNE_EVERY:
+            return
+        self._conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+
+class SharedSlidingWindowLimiter:
+    """SlidingWindowLimiter interface over a SharedStateStore (limits hold across workers)"""
+
+    def __init__(self, store: Optional[SharedStateStore] = None, limit: int = RATE_LIMIT,
+                 window: float = RATE_WINDOW):
+        """
+        Args:
+            store: Store to use; defaults to this process's shared_store()
+            limit: Requests allowed per window
+            window: Window length in seconds
+        """
+        self.store = store
+        self.limit = limit
+        self.window = window
+
+    def check(self, key: str, now: Optional[float] = None) -> RateLimitResult:
+        return (self.store or shared_store()).check_rate_limit(key, self.limit, self.window, now)
+
+
+class SharedCache:
+    """TTL cache in this process's shared_store()"""
+
+    def get(self, key: str) -> Optional[Any]:
+        return shared_store().get(key)
+
+    def set(self, key: str, value: Any, ttl: float):
+        shared_store().set(key, value, ttl)
+
+    def delete(self, key: str):
+        shared_store().delete(key)
+
+
+class MemoryCache:
+    """Per-process TTL cache with the SharedStateStore cache interface"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            now = time.time()
+            # Few keys (one per cached endpoint); sweeping on write keeps it bounded
+            for stale in [k for k, (_, expires_at) in self._entries.items() if expires_at <= now]:
+                del self._entries[stale]
+            self._entries[key] = (value, now + ttl)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+_store: Optional[SharedStateStore] = None
+_store_pid: Optional[int] = None
+
+
+def _use_sqlite() -> bool:
+    if SHARED_STATE_BACKEND not in ("memory", "sqlite"):
+        raise ValueError(f"SHARED_STATE_BACKEND must be memory or sqlite, not {SHARED_STATE_BACKEND!r}")
+    return SHARED_STATE_BACKEND == "sqlite"
+
+
+def shared_store() -> SharedStateStore:
+    """
+    The process's connection to the shared database
+
+    Opened on first use in each process: a SQLite connection must not be
+    inherited across the fork that starts a worker.
+    """
+    global _store, _store_pid
+    if _store is None or _store_pid != os.getpid():
+        _store, _store_pid = SharedStateStore(), os.getpid()
+    return _store
+
+
+def create_rate_limiter(limit: int = RATE_LIMIT, window: float = RATE_WINDOW):
+    """Rate limiter for SHARED_STATE_BACKEND"""
+    if _use_sqlite():
+        return SharedSlidingWindowLimiter(limit=limit, window=window)
+    return SlidingWindowLimiter(limit, window, max_clients=RATE_LIMIT_MAX_CLIENTS)
+
+
+def create_cache():
+    """Response cache for SHARED_STATE_BACKEND"""
+    if _use_sqlite():
+        return SharedCache()
+    return MemoryCache()
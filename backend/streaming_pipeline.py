@@ -0,0 +1,77 @@
+"""
+Streaming Pipeline Helpers for Mualleem Platform
+Bounded-queue building blocks for the ingestion pipeline
+(page → chunk → embed → upsert). Each stage runs in its own thread and hands
+items to the next through a queue of fixed size, so memory stays constant no
+matter how large the document is.
+"""
+
+import os
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+
+_DONE = object()
+
+
+class _StageError:
+    """Carries an exception from a stage thread to the consumer"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(out: "queue.Queue", item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the consumer has stopped"""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _run_stage(produce: Iterator, out: "queue.Queue", stop: threading.Event):
+    """Feed a queue from an iterator until it is exhausted or the consumer stops"""
+    try:
+        for item in produce:
+            if not _put(out, item, stop):
+                return
+        _put(out, _DONE, stop)
+    except BaseException as e:  # surfaced to the consumer
+        _put(out, _StageError(e), stop)
+
+
+def _consume(out: "queue.Queue", stop: threading.Event, thread: threading.Thread) -> Iterator:
+    try:
+        while True:
+            item = out.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def prefetch(items: Iterable[T], maxsize: int = PIPELINE_QUEUE_SIZE,
+             name: str = "pipeline-stage") -> Iterator[T]:
+    """
+    Pull items from an iterable in a background thread
+
+    At most `maxsize` items are buffered; the producer blocks until the consumer
+    catches up. Exceptions raised by the producer are re-raised in the consumer.
+    """
+    out: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    thread = threading.Thread(target=_run_stage, args=(iter(items), out, stop), name=name, daemon=True)
+    thread.start()
+    return _consume(out, stop, thread)
+
@@ -0,0 +1,78 @@
+"""
+Property tests for the sentence-aware chunker (offline, no tokenizer download)
+"""
+import random
+
+from text_chunker import PAGE_SEPARATOR, chunk_pages
+from benchmarks.synthetic_corpus import generate_pages
+
+
+def count_words(text):
+    """Stand-in token counter: one token per whitespace-separated word"""
+    return len(text.split())
+
+
+def random_pages(rng, num_pages):
+    """Pages mixing punctuated Arabic, long unpunctuated runs, headings and blank pages"""
+    words = ["الطالب", "المعادلة", "الدرس", "١ -", "نظرية", "قانون", "x=2", "؟", ".", "!", "،", "مثال"]
+    pages = []
+    for _ in range(num_pages):
+        if rng.random() < 0.1:
+            pages.append(rng.choice(["", "   ", "\n\n"]))
+            continue
+        lines = []
+        for _ in range(rng.randint(1, 15)):
+            line = " ".join(rng.choice(words) for _ in range(rng.randint(0, 80)))
+            lines.append(" " * rng.randint(0, 2) + line)
+        pages.append(rng.choice(["\n", "\n\n", "\n \n"]).join(lines))
+    return pages
+
+
+def check_chunks(pages, max_tokens, overlap_tokens, min_tokens):
+    document = PAGE_SEPARATOR.join(pages)
+    chunks = list(chunk_pages(enumerate(pages, start=1), max_tokens=max_tokens,
+                              overlap_tokens=overlap_tokens, min_tokens=min_tokens,
+                              count_tokens=count_words))
+    covered = bytearray(len(document))
+    previous_start = -1
+    for chunk in chunks:
+        assert document[chunk.start:chunk.end] == chunk.text
+        assert chunk.text == chunk.text.strip() and chunk.text
+        assert chunk.start > previous_start, "chunks must advance"
+        assert chunk.tokens <= max_tokens or len(chunk.text.split()) == 1
+        page_offset = sum(len(page) + len(PAGE_SEPARATOR) for page in pages[:chunk.page_start - 1])
+        assert page_offset <= chunk.start
+        previous_start = chunk.start
+        covered[chunk.start:chunk.end] = b"\x01" * (chunk.end - chunk.start)
+
+    for position, character in enumerate(document):
+        assert covered[position] or character.isspace(), f"character {position} not in any chunk"
+    return chunks
+
+
+def test_synthetic_textbook_fully_covered():
+    pages = generate_pages(20, seed=7)
+    chunks = check_chunks(pages, max_tokens=80, overlap_tokens=15, min_tokens=20)
+    assert chunks[-1].page_end == len(pages)
+
+
+def test_random_text_fully_covered():
+    for seed in range(50):
+        rng = random.Random(seed)
+        max_tokens = rng.randint(5, 120)
+        check_chunks(random_pages(rng, rng.randint(1, 8)), max_tokens=max_tokens,
+                     overlap_tokens=rng.randint(0, max_tokens // 2), min_tokens=rng.randint(0, 30))
+
+
+def test_heading_starts_new_chunk():
+    pages = ["مقدمة قصيرة. " * 10 + "\n\nالدرس ٢ - الكسور\nالكسر هو جزء من الكل."]
+    chunks = check_chunks(pages, max_tokens=200, overlap_tokens=20, min_tokens=5)
+    assert len(chunks) == 2
+    assert chunks[1].text.startswith("الدرس ٢ - الكسور")
+
+
+if __name__ == "__main__":
+    test_synthetic_textbook_fully_covered()
+    test_random_text_fully_covered()
+    test_heading_starts_new_chunk()
+    print("✓ All chunker tests passed")
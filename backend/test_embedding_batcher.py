@@ -0,0 +1,65 @@
+"""
+Tests for token-aware embedding batching (offline: no tokenizer download needed)
+"""
+import embedding_batcher
+from embedding_batcher import ByteEncoding, token_batches
+
+
+class CountingEncoding(ByteEncoding):
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, text, disallowed_special=()):
+        self.encoded.append(text)
+        return super().encode(text, disallowed_special)
+
+
+def with_encoding(encoding, fn):
+    previous = embedding_batcher._encoding
+    embedding_batcher._encoding = encoding
+    try:
+        return fn()
+    finally:
+        embedding_batcher._encoding = previous
+
+
+def test_known_token_counts_are_not_reencoded():
+    encoding = CountingEncoding()
+    items = [("chunk one", 40), ("chunk two", 40), ("chunk three", 40), "plain text"]
+    batches = with_encoding(encoding, lambda: list(token_batches(items, max_tokens=100)))
+    assert batches == [["chunk one", "chunk two"], ["chunk three", "plain text"]]
+    assert encoding.encoded == ["plain text"]
+
+
+def test_oversized_input_is_truncated():
+    text = "كلمة " * 10
+    for item in (text, (text, 50)):
+        batches = with_encoding(ByteEncoding(), lambda: list(token_batches([item], max_input_tokens=7)))
+        # Seven bytes end inside the fourth Arabic letter, which is dropped
+        assert batches == [["كلم"]]
+
+
+def test_missing_tokenizer_fails_unless_fallback_enabled():
+    def unavailable(name):
+        raise OSError("no network")
+
+    previous = (embedding_batcher.tiktoken.get_encoding, embedding_batcher.EMBEDDING_TOKENIZER_FALLBACK)
+    embedding_batcher.tiktoken.get_encoding = unavailable
+    try:
+        for fallback in (False, True):
+            embedding_batcher.EMBEDDING_TOKENIZER_FALLBACK = fallback
+            try:
+                encoding = with_encoding(None, embedding_batcher.get_encoding)
+            except RuntimeError:
+                assert not fallback
+            else:
+                assert fallback and encoding.name == "utf-8-bytes"
+    finally:
+        embedding_batcher.tiktoken.get_encoding, embedding_batcher.EMBEDDING_TOKENIZER_FALLBACK = previous
+
+
+if __name__ == "__main__":
+    test_known_token_counts_are_not_reencoded()
+    test_oversized_input_is_truncated()
+    test_missing_tokenizer_fails_unless_fallback_enabled()
+    print("✓ All embedding batcher tests passed")
@@ -0,0 +1,89 @@
+"""
+Tests for the embedding store when several processes share it (one store object per process)
+"""
+import os
+import tempfile
+import threading
+
+from embedding_store import EmbeddingStore
+
+
+def vector(i, dimensions=4):
+    return [float(i)] * dimensions
+
+
+def test_reader_remaps_after_another_process_compacts():
+    with tempfile.TemporaryDirectory() as directory:
+        writer = EmbeddingStore("test/model", 4, base_dir=directory)
+        reader = EmbeddingStore("test/model", 4, base_dir=directory)
+        texts = [f"chunk {i}" for i in range(10)]
+        writer.put_many(texts, [vector(i) for i in range(10)])
+        # The reader maps the vector file, then the records it needs get renumbered
+        assert reader.get_many(texts)[9] == vector(9)
+        writer.get_many(texts[5:])
+        writer.compact(max_bytes=5 * 4 * 4)
+
+        found = reader.get_many(texts)
+        assert sorted(found) == [5, 6, 7, 8, 9]
+        assert all(found[i] == vector(i) for i in found)
+        # Appends after compaction go to the new file, whichever process makes them
+        reader.put_many(["new chunk"], [vector(42)])
+        assert writer.get_many(["new chunk"]) == {0: vector(42)}
+        assert writer.stats()["generation"] == 1
+
+
+def test_surviving_keys_keep_their_vectors_while_another_process_reads():
+    with tempfile.TemporaryDirectory() as directory:
+        writer = EmbeddingStore("test/model", 4, base_dir=directory)
+        reader = EmbeddingStore("test/model", 4, base_dir=directory)
+        texts = [f"chunk {i}" for i in range(40)]
+        writer.put_many(texts, [vector(i) for i in range(40)])
+        stop = threading.Event()
+
+        def touch():
+            # Keeps moving last_used while the writer picks what to keep
+            while not stop.is_set():
+                for i in range(0, 40, 7):
+                    reader.get_many(texts[i:i + 3])
+
+        thread = threading.Thread(target=touch)
+        thread.start()
+        try:
+            for budget in (30, 20, 10):
+                writer.compact(max_bytes=budget * 4 * 4)
+        finally:
+            stop.set()
+            thread.join()
+
+        found = writer.get_many(texts)
+        assert len(found) == 10
+        assert all(found[i] == vector(i) for i in found)
+
+
+def test_append_after_partial_record():
+    with tempfile.TemporaryDirectory() as directory:
+        store = EmbeddingStore("test/model", 4, base_dir=directory)
+        store.put_many(["first"], [vector(1)])
+        # A crash mid-append leaves part of a record behind
+        with open(store._vectors_path(0), "ab") as f:
+            f.write(b"\0" * 6)
+        store.put_many(["second", "third"], [vector(2), vector(3)])
+
+        assert store.get_many(["first", "second", "third"]) == {0: vector(1), 1: vector(2), 2: vector(3)}
+        assert os.path.getsize(store._vectors_path(0)) == 3 * store.record_size
+
+
+def test_nothing_is_created_before_first_use():
+    with tempfile.TemporaryDirectory() as directory:
+        store = EmbeddingStore("test/model", 4, base_dir=directory)
+        assert os.listdir(directory) == []
+        assert store.get_many(["chunk"]) == {}
+        assert (store.directory / "index.db").exists()
+
+
+if __name__ == "__main__":
+    test_reader_remaps_after_another_process_compacts()
+    test_surviving_keys_keep_their_vectors_while_another_process_reads()
+    test_append_after_partial_record()
+    test_nothing_is_created_before_first_use()
+    print("✓ All embedding store tests passed")
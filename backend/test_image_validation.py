@@ -0,0 +1,118 @@
+"""
+Tests for chunked image validation (hand-built headers, no image library needed)
+"""
+import asyncio
+import io
+import struct
+import zlib
+
+from fastapi import UploadFile
+
+from image_validation import (
+    IMAGE_CHUNK_SIZE, ImageDimensionsTooLarge, InvalidImage, UnsupportedImageType,
+    image_dimensions, read_image, sniff_image_type,
+)
+from upload_storage import UploadTooLarge
+
+
+def png(width, height, padding=0):
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    chunk = struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+    return b"\x89PNG\r\n\x1a\n" + chunk + b"\x00" * padding
+
+
+def jpeg(width, height, exif_bytes=0):
+    exif = b"\xff\xe1" + struct.pack(">H", exif_bytes + 2) + b"\x00" * exif_bytes
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + exif + sof + b"\xff\xda\x00\x02" + b"\x00" * 100 + b"\xff\xd9"
+
+
+def webp(chunk, payload):
+    body = b"WEBP" + chunk + struct.pack("<I", len(payload)) + payload
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def upload(data, filename="image.png"):
+    return UploadFile(io.BytesIO(data), filename=filename)
+
+
+def test_sniff_and_dimensions():
+    cases = [
+        (png(640, 480), "image/png"),
+        (jpeg(640, 480, exif_bytes=5000), "image/jpeg"),
+        (b"GIF89a" + struct.pack("<HH", 640, 480) + b"\x00" * 20, "image/gif"),
+        (webp(b"VP8 ", b"\x00\x00\x00\x9d\x01\x2a" + struct.pack("<HH", 640, 480)), "image/webp"),
+        (webp(b"VP8L", b"\x2f" + ((639) | (479 << 14)).to_bytes(4, "little")), "image/webp"),
+        (webp(b"VP8X", b"\x00" * 4 + (639).to_bytes(3, "little") + (479).to_bytes(3, "little")), "image/webp"),
+    ]
+    for data, mime_type in cases:
+        assert sniff_image_type(data[:12]) == mime_type
+        assert image_dimensions(mime_type, data) == (640, 480)
+    assert sniff_image_type(b"%PDF-1.7\n...") is None
+
+
+def test_dimensions_need_more_bytes():
+    data = jpeg(640, 480, exif_bytes=5000)
+    assert image_dimensions("image/jpeg", data[:4000]) is None
+    assert image_dimensions("image/png", png(640, 480)[:20]) is None
+
+
+def test_read_image_uses_sniffed_type():
+    # A JPEG named .png is a JPEG
+    image = asyncio.run(read_image(upload(jpeg(800, 600), filename="photo.png")))
+    assert (image.mime_type, image.width, image.height) == ("image/jpeg", 800, 600)
+
+
+def test_rejections():
+    for data, error in [
+        (b"<?php echo 'not an image'; ?>", UnsupportedImageType),
+        (b"\x89PNG", UnsupportedImageType),
+        (png(640, 480)[:20], InvalidImage),
+        (b"\xff\xd8\xff\xda\x00\x02" + b"\x00" * 64, InvalidImage),
+        (png(0, 480), InvalidImage),
+    ]:
+        try:
+            asyncio.run(read_image(upload(data)))
+        except error:
+            continue
+        raise AssertionError(f"{data[:12]!r} was not rejected with {error.__name__}")
+
+
+def test_pixel_bomb_rejected_after_first_chunk():
+    source = io.BytesIO(png(60_000, 60_000, padding=8 * IMAGE_CHUNK_SIZE))
+    try:
+        asyncio.run(read_image(UploadFile(source, filename="bomb.png"), max_pixels=50_000_000))
+    except ImageDimensionsTooLarge as e:
+        assert (e.width, e.height) == (60_000, 60_000)
+    else:
+        raise AssertionError("pixel bomb was not rejected")
+    assert source.tell() == IMAGE_CHUNK_SIZE
+
+
+def test_size_limit_stops_reading():
+    source = io.BytesIO(png(640, 480, padding=10 * IMAGE_CHUNK_SIZE))
+    try:
+        asyncio.run(read_image(UploadFile(source, filename="big.png"), max_bytes=2 * IMAGE_CHUNK_SIZE))
+    except UploadTooLarge:
+        pass
+    else:
+        raise AssertionError("oversized upload was not rejected")
+    assert source.tell() <= 3 * IMAGE_CHUNK_SIZE
+    # A declared size over the limit is rejected without reading at all
+    sized = UploadFile(io.BytesIO(png(640, 480)), size=10**9, filename="big.png")
+    try:
+        asyncio.run(read_image(sized))
+    except UploadTooLarge:
+        assert sized.file.tell() == 0
+    else:
+        raise AssertionError("declared size was ignored")
+
+
+if __name__ == "__main__":
+    test_sniff_and_dimensions()
+    test_dimensions_need_more_bytes()
+    test_read_image_uses_sniffed_type()
+    test_rejections()
+    test_pixel_bomb_rejected_after_first_chunk()
+    test_size_limit_stops_reading()
+    print("✓ All image validation tests passed")
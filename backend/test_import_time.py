@@ -0,0 +1,59 @@
+"""
+Import-time checks for the API module: importing main must not touch the network
+and must stay within a time budget (measured with `python -X importtime`)
+"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+# Generous default: the floor is the qdrant_client/openai/fastapi imports themselves
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "4.0"))
+
+PROBE = (
+    "import main; "
+    "print('READY', main.rag_service.connection.ready, main.supabase_client.ready, "
+    "main.rag_service.connection.error is None)"
+)
+
+
+def import_main():
+    """Import main in a fresh interpreter with an unreachable Qdrant; returns (stdout, module times)"""
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(BACKEND_DIR),
+        "QDRANT_URL": "http://127.0.0.1:9",  # discard port: any connection attempt fails
+        "QDRANT_API_KEY": "test",
+        "EMBEDDING_STORE_ENABLED": "false",
+        "TEXT_CACHE_ENABLED": "false",
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], cwd=workdir,
+                                env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    # "import time: self [us] | cumulative | module", nested modules are indented
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match:
+            times[match.group(3)] = int(match.group(1)) / 1e6
+    return result.stdout, times
+
+
+def test_import_main_is_offline_and_fast():
+    stdout, times = import_main()
+    # Nothing connected (or tried to) while importing
+    assert "READY False False True" in stdout
+    # The Supabase package is only imported when its client is first created
+    assert "supabase" not in times
+    print(f"import main: {times['main']:.3f}s (budget {IMPORT_TIME_BUDGET_SECONDS:g}s)")
+    assert times["main"] < IMPORT_TIME_BUDGET_SECONDS
+
+
+if __name__ == "__main__":
+    test_import_main_is_offline_and_fast()
+    print("✓ Import-time test passed")
@@ -0,0 +1,113 @@
+"""
+Tests for the sliding-window rate limiter (simulated clock)
+"""
+import os
+import sqlite3
+import tempfile
+import time
+from types import SimpleNamespace
+
+from rate_limiter import SlidingWindowLimiter, client_key
+from shared_state import PRUNE_EVERY, RATE_LIMIT_BUSY_TIMEOUT, SharedStateStore
+
+
+def test_limit_within_window():
+    limiter = SlidingWindowLimiter(limit=5, window=60, max_clients=100)
+    results = [limiter.check("a", now=120.0 + i) for i in range(6)]
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+    # Other clients are independent
+    assert limiter.check("b", now=125.0).allowed
+
+
+def test_previous_window_slides_out():
+    limiter = SlidingWindowLimiter(limit=10, window=60, max_clients=100)
+    for _ in range(10):
+        assert limiter.check("a", now=60.0).allowed
+    # 6s into the next window, 90% of the previous 10 still count: one more fits
+    assert limiter.check("a", now=126.0).allowed
+    rejected = limiter.check("a", now=126.0)
+    assert not rejected.allowed
+    # ...and retry_after points at the moment one request fits again
+    retry_at = 126.0 + rejected.retry_after
+    assert not limiter.check("a", now=retry_at - 0.5).allowed
+    assert limiter.check("a", now=retry_at + 1e-6).allowed
+    # Two windows later nothing counts any more
+    assert all(limiter.check("a", now=300.0).allowed for _ in range(10))
+
+
+def test_full_current_window_retry_after():
+    limiter = SlidingWindowLimiter(limit=3, window=10, max_clients=100)
+    for _ in range(3):
+        limiter.check("a", now=0.0)
+    rejected = limiter.check("a", now=1.0)
+    assert not rejected.allowed and rejected.retry_after > 9.0
+    assert not limiter.check("a", now=1.0 + rejected.retry_after - 0.1).allowed
+    assert limiter.check("a", now=1.0 + rejected.retry_after + 1e-6).allowed
+
+
+def test_idle_clients_are_evicted():
+    limiter = SlidingWindowLimiter(limit=5, window=60, max_clients=1000)
+    for i in range(500):
+        limiter.check(f"client-{i}", now=0.0)
+    assert len(limiter) == 500
+    limiter.check("late", now=130.0)
+    assert len(limiter) == 1
+
+
+def test_memory_is_capped():
+    limiter = SlidingWindowLimiter(limit=5, window=60, max_clients=100)
+    for i in range(10_000):
+        limiter.check(f"client-{i}", now=float(i % 60))
+    assert len(limiter) == 100
+    assert limiter.evicted == 9_900
+
+
+def test_client_key_order():
+    request = SimpleNamespace(headers={"X-Session-ID": "s1"}, client=SimpleNamespace(host="10.0.0.7"))
+    assert client_key(request, ["user", "session", "ip"]) == "session:s1"
+    assert client_key(request, ["user", "ip"]) == "ip:10.0.0.7"
+    assert client_key(SimpleNamespace(headers={}, client=None), ["ip"]) == "anonymous"
+
+
+def test_shared_store_limits_across_connections():
+    """Two workers' connections to one database share a client's limit"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "shared.db")
+        first, second = SharedStateStore(path), SharedStateStore(path)
+        allowed = [store.check_rate_limit("ip:1", 4, 3600, now=7200.0 + i).allowed
+                   for i, store in enumerate([first, second] * 4)]
+        assert allowed == [True] * 4 + [False] * 4
+        # Pruning idle short-window keys must not drop a long-window key
+        for i in range(PRUNE_EVERY):
+            first.check_rate_limit(f"ip:other-{i}", 4, 60, now=7300.0)
+        assert not second.check_rate_limit("ip:1", 4, 3600, now=7300.0).allowed
+
+
+def test_shared_store_fails_open_when_locked():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "shared.db")
+        store = SharedStateStore(path)
+        # Another worker holds the write lock
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        start = time.perf_counter()
+        assert store.check_rate_limit("ip:1", 1, 60, now=100.0).allowed
+        assert time.perf_counter() - start < RATE_LIMIT_BUSY_TIMEOUT + 1
+        other.execute("ROLLBACK")
+        # Not counted while locked; counted (and limited) again afterwards
+        assert store.check_rate_limit("ip:1", 1, 60, now=100.0).allowed
+        assert not store.check_rate_limit("ip:1", 1, 60, now=100.0).allowed
+        other.close()
+
+
+if __name__ == "__main__":
+    test_limit_within_window()
+    test_previous_window_slides_out()
+    test_full_current_window_retry_after()
+    test_idle_clients_are_evicted()
+    test_memory_is_capped()
+    test_client_key_order()
+    test_shared_store_limits_across_connections()
+    test_shared_store_fails_open_when_locked()
+    print("✓ All rate limiter tests passed")
@@ -0,0 +1,76 @@
+"""
+Extracted-Text Cache for Mualleem Platform
+Keeps the per-page text pypdf extracted from each PDF, keyed by the file's
+sha256, as gzip-compressed JSON. Re-indexing a known file (new chunker settings,
+new embedding model) reads this instead of parsing the PDF again.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR", "./data/text_cache")
+TEXT_CACHE_ENABLED = os.getenv("TEXT_CACHE_ENABLED", "true").lower() == "true"
+
+CACHE_FORMAT_VERSION = 1
+
+
+class ExtractedTextCache:
+    """One <sha256>.json.gz file per PDF, sharded by the first two hex digits"""
+
+    def __init__(self, base_dir: str = TEXT_CACHE_DIR):
+        # Directories are created by the first put, not when the service is imported
+        self.base_dir = Path(base_dir)
+
+    def _path(self, file_hash: str) -> Path:
+        return self.base_dir / file_hash[:2] / f"{file_hash}.json.gz"
+
+    def get(self, file_hash: str) -> Optional[dict]:
+        """
+        Cached extraction of a file
+
+        Returns:
+            Dictionary with file_hash, source, extracted_at and pages as a list of
+            (page_number, text) tuples, or None if the file is not cached
+        """
+        path = self._path(file_hash)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠ Warning: ignoring unreadable text cache entry {path.name}: {e}")
+            return None
+        if entry.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        entry["pages"] = [(page_num, text) for page_num, text in entry["pages"]]
+        return entry
+
+    def put(self, file_hash: str, pages: List[Tuple[int, str]], source: str = ""):
+        """Store the extracted pages of a file (written atomically)"""
+        path = self._path(file_hash)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "version": CACHE_FORMAT_VERSION,
+            "file_hash": file_hash,
+            "source": source,
+            "extracted_at": datetime.now().isoformat(),
+            "pages": pages,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as f:
+                f.write(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def __contains__(self, file_hash: str) -> bool:
+        return self._path(file_hash).exists()
@@ -0,0 +1,237 @@
+"""
+Sentence-Aware Text Chunker for Mualleem Platform
+Cuts a stream of PDF pages into chunks sized in tokens, breaking only at Arabic
+sentence, line, paragraph and heading boundaries. Every chunk records the pages
+it spans and its character offsets in the document text (pages joined with
+blank lines, as load_pdf does).
+
+Each page is scanned once into sentence-level units, each unit is tokenized
+once, and units are packed greedily, so the whole pass is linear in the length
+of the document.
+"""
+
+import os
+import re
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "60"))
+# A heading starts a new chunk unless the current one is shorter than this
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "50"))
+
+PAGE_SEPARATOR = "\n\n"
+HEADING_MAX_CHARS = 80
+
+# Boundary that precedes a unit, weakest first
+SENTENCE, LINE, PARAGRAPH, HEADING = range(4)
+
+_LINE = re.compile(r"[^\n]+")
+_WORD = re.compile(r"\S+")
+# Sentence end: terminal punctuation plus closing quotes/brackets, then whitespace or end of line
+_SENTENCE_END = re.compile(r"[.!?؟۔…]+[\"'»”)\]]*(?=\s|$)")
+_HEADING = re.compile(
+    r"^(?:(?:الفصل|الوحدة|الدرس|الباب|المبحث|الجزء|القسم|تمارين|خلاصة|ملخص)(?:\s|$)"
+    r"|[0-9٠-٩]+\s*[-.)–]\s*\S)"
+)
+_TERMINAL_PUNCTUATION = ".!?؟۔…:،,؛"
+
+
+class TextChunk(NamedTuple):
+    text: str
+    start: int  # character offset in the joined document text
+    end: int
+    page_start: int
+    page_end: int
+    tokens: int
+
+
+class _Unit(NamedTuple):
+    text: str
+    gap: str  # text between the previous unit and this one (whitespace, page separator)
+    start: int
+    page: int
+    boundary: int
+    tokens: int
+
+
+def default_count_tokens(text: str) -> int:
+    """Token count under the embedding model's tokenizer"""
+    from embedding_batcher import get_encoding
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
+def _is_heading(line: str) -> bool:
+    return (len(line) <= HEADING_MAX_CHARS
+            and not line.endswith(tuple(_TERMINAL_PUNCTUATION))
+            and _HEADING.match(line) is not None)
+
+
+def _page_units(text: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield (text, start offset in page, boundary before it) for every sentence of a page"""
+    previous_line_end = None
+    for line_match in _LINE.finditer(text):
+        raw = line_match.group()
+        line = raw.strip()
+        if not line:
+            continue
+        line_start = line_match.start() + len(raw) - len(raw.lstrip())
+
+        if previous_line_end is None or text.count("\n", previous_line_end, line_match.start()) >= 2:
+            boundary = PARAGRAPH
+        else:
+            boundary = LINE
+        previous_line_end = line_match.end()
+        if _is_heading(line):
+            yield line, line_start, HEADING
+            continue
+
+        position = 0
+        for end_match in _SENTENCE_END.finditer(line):
+            sentence = line[position:end_match.end()]
+            stripped = sentence.lstrip()
+            yield stripped, line_start + end_match.end() - len(stripped), boundary
+            boundary = SENTENCE
+            position = end_match.end()
+        rest = line[position:].lstrip()
+        if rest:
+            yield rest, line_start + len(line) - len(rest), boundary
+
+
+def _split_oversized(unit: _Unit, max_tokens: int, count_tokens: Callable[[str], int]) -> Iterator[_Unit]:
+    """Break a unit longer than max_tokens at word boundaries (e.g. text without punctuation)"""
+    piece_start = None
+    piece_end = 0
+    piece_tokens = 0
+    gap = unit.gap
+    boundary = unit.boundary
+    for word in _WORD.finditer(unit.text):
+        word_tokens = count_tokens(word.group())
+        if piece_start is not None and piece_tokens + word_tokens > max_tokens:
+            yield _Unit(unit.text[piece_start:piece_end], gap, unit.start + piece_start,
+                        unit.page, boundary, piece_tokens)
+            gap = unit.text[piece_end:word.start()]
+            boundary = SENTENCE
+            piece_start, piece_tokens = None, 0
+        if piece_start is None:
+            piece_start = word.start()
+        piece_end = word.end()
+        piece_tokens += word_tokens
+    if piece_start is not None:
+        yield _Unit(unit.text[piece_start:piece_end], gap, unit.start + piece_start,
+                    unit.page, boundary, piece_tokens)
+
+
+def _make_chunk(units: List[_Unit]) -> TextChunk:
+    first, last = units[0], units[-1]
+    text = first.text + "".join(unit.gap + unit.text for unit in units[1:])
+    return TextChunk(
+        text=text,
+        start=first.start,
+        end=first.start + len(text),
+        page_start=first.page,
+        page_end=last.page,
+        tokens=sum(unit.tokens for unit in units),
+    )
+
+
+def chunk_pages(pages: Iterable[Tuple[int, str]],
+                max_tokens: int = CHUNK_MAX_TOKENS,
+                overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+                min_tokens: int = CHUNK_MIN_TOKENS,
+                count_tokens: Optional[Callable[[str], int]] = None) -> Iterator[TextChunk]:
+    """
+    Split a stream of pages into token-sized chunks at natural boundaries
+
+    A chunk is closed when the next sentence would not fit. If the chunk holds
+    a paragraph break past its midpoint it is cut there instead, and a heading
+    always opens a new chunk once the current one has min_tokens. Consecutive
+    chunks share up to overlap_tokens of whole sentences, except across a
+    heading. Every non-whitespace character of the document lands in at least
+    one chunk, and each chunk's text is exactly the document text between its
+    offsets.
+
+    Args:
+        pages: Iterable of (page_number, text), in document order
+        max_tokens: Token ceiling per chunk (a single word longer than this is kept whole)
+        overlap_tokens: Token budget for sentences repeated from the previous chunk
+        min_tokens: Minimum chunk size before a heading forces a break
+        count_tokens: Token counter (defaults to the embedding model's tokenizer)
+
+    Yields:
+        TextChunk with text, character offsets, page span and token count
+    """
+    if count_tokens is None:
+        count_tokens = default_count_tokens
+
+    current: List[_Unit] = []
+    current_tokens = 0
+    fresh_from = 0  # units before this index were carried over as overlap
+    carried_tokens = 0
+    last_paragraph = 0  # index in `current` of the latest paragraph start past the overlap
+
+    def overlap_tail(units: List[_Unit]) -> List[_Unit]:
+        tail: List[_Unit] = []
+        tokens = 0
+        for unit in reversed(units[1:]):  # never the whole chunk, so chunks always advance
+            if tokens + unit.tokens > overlap_tokens:
+                break
+            tail.append(unit)
+            tokens += unit.tokens
+        tail.reverse()
+        return tail
+
+    def reset(units: List[_Unit], carried: int):
+        nonlocal current, current_tokens, fresh_from, carried_tokens, last_paragraph
+        current = units
+        current_tokens = sum(unit.tokens for unit in units)
+        fresh_from = carried
+        carried_tokens = sum(unit.tokens for unit in units[:carried])
+        last_paragraph = next((i for i in range(len(units) - 1, carried, -1)
+                               if units[i].boundary >= PARAGRAPH), 0)
+
+    def add(unit: _Unit) -> Iterator[TextChunk]:
+        nonlocal current_tokens, last_paragraph
+        if unit.boundary == HEADING and current_tokens - carried_tokens >= min_tokens:
+            yield _make_chunk(current)
+            reset([], 0)
+
+        while current and current_tokens + unit.tokens > max_tokens:
+            if fresh_from >= len(current):
+                # Only overlap is left and it does not fit next to the new unit
+                reset([], 0)
+                break
+            cut = len(current)
+            if last_paragraph > fresh_from and \
+                    sum(u.tokens for u in current[:last_paragraph]) * 2 >= max_tokens:
+                cut = last_paragraph
+            emitted, rest = current[:cut], current[cut:]
+            yield _make_chunk(emitted)
+            next_start = rest[0] if rest else unit
+            carried = [] if next_start.boundary == HEADING else overlap_tail(emitted)
+            reset(carried + rest, len(carried))
+
+        if unit.boundary >= PARAGRAPH and len(current) > fresh_from:
+            last_paragraph = len(current)
+        current.append(unit)
+        current_tokens += unit.tokens
+
+    offset = 0  # offset of the current page in the joined document text
+    pending_gap = ""  # whitespace after the last unit, carried across page breaks
+    for page_index, (page_num, text) in enumerate(pages):
+        if page_index:
+            offset += len(PAGE_SEPARATOR)
+            pending_gap += PAGE_SEPARATOR
+        cursor = 0  # end of the last unit within this page
+        for unit_text, start, boundary in _page_units(text):
+            unit = _Unit(unit_text, pending_gap + text[cursor:start], offset + start,
+                         page_num, boundary, count_tokens(unit_text))
+            pending_gap = ""
+            cursor = start + len(unit_text)
+            for piece in ([unit] if unit.tokens <= max_tokens
+                          else _split_oversized(unit, max_tokens, count_tokens)):
+                yield from add(piece)
+        pending_gap += text[cursor:]
+        offset += len(text)
+
+    if len(current) > fresh_from:
+        yield _make_chunk(current)
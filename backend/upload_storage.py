@@ -0,0 +1,165 @@
+"""
+Upload Storage for Mualleem Platform
+Streams uploaded files to disk in fixed-size chunks, hashing them on the way, and
+stores them under their content hash. The partially written file is only renamed
+into place once the upload is complete and within the size limit.
+
+Starlette parses (and spools) a whole multipart body before the endpoint runs,
+so size limits are enforced earlier, by BodySizeLimitMiddleware, while the body
+is being received.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+from fastapi import UploadFile
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "100"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # bytes per read/write
+# Room for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeded the size limit; nothing was stored"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"upload exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class StoredUpload(NamedTuple):
+    path: Path
+    sha256: str
+    size: int
+
+
+async def store_upload(upload: UploadFile, directory: Path, suffix: str = "",
+                       max_bytes: Optional[int] = MAX_UPLOAD_BYTES) -> StoredUpload:
+    """
+    Copy an upload to `directory`/<sha256><suffix>
+
+    The file is read and written chunk by chunk (writes run off the event loop)
+    and hashed during the copy. An upload over max_bytes is rejected as soon as
+    the limit is crossed and its partial file is removed.
+
+    Args:
+        upload: The uploaded file
+        directory: Destination directory (the temp file is created there too, so
+                   the final rename is atomic)
+        suffix: File extension for the stored file, e.g. ".pdf"
+        max_bytes: Size limit, or None for no limit
+
+    Returns:
+        StoredUpload with the final path, hex sha256 and size in bytes
+
+    Raises:
+        UploadTooLarge: If the upload is larger than max_bytes
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+        final_path = Path(directory) / f"{digest.hexdigest()}{suffix}"
+        # Same name means same content, so replacing an existing copy is harmless
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return StoredUpload(final_path, digest.hexdigest(), size)
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware capping request bodies per path
+
+    A request whose Content-Length is over the limit is answered 413 without
+    reading its body. A body that turns out larger while it streams in (chunked
+    transfer, or a false Content-Length) is cut off at the limit: the endpoint's
+    own response is dropped and 413 is sent instead.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int],
+                 overhead_bytes: int = MULTIPART_OVERHEAD_BYTES):
+        """
+        Args:
+            app: The wrapped application
+            limits: Path -> largest file (bytes) a request to that path may carry
+            overhead_bytes: Allowance on top of the file for the multipart framing
+        """
+        self.app = app
+        self.limits = limits
+        self.overhead_bytes = overhead_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_body = limit + self.overhead_bytes
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_body:
+            await self._reject(limit, scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message):
+            nonlocal response_started
+            if exceeded:
+                # The body parser's error response is replaced by the 413 below
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        if exceeded and not response_started:
+            await self._reject(limit, scope, receive, send)
+
+    @staticmethod
+    async def _reject(limit: int, scope: Scope, receive: Receive, send: Send):
+        response = ORJSONResponse(
+            status_code=413,
+            content={"detail": f"حجم الملف يتجاوز الحد المسموح ({limit / (1024 * 1024):g} ميجابايت)"},
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
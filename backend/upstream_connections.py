@@ -0,0 +1,317 @@
+"""
+Upstream Connection Management for Mualleem Platform
+Keeps the HTTP connections to Requesty.ai and Qdrant Cloud warm so requests do
+not pay TCP and TLS handshakes:
+- warm_up() pre-opens pooled connections, makes a tiny embedding call and
+  pages in the live collection at startup
+- KeepAlivePinger re-touches the pools before idle connections expire
+- ConnectionMetrics counts requests against new connections (via the httpx
+  "trace" extension) so connection reuse can be watched
+- shared_http_client() is the one tuned httpx client (pool limits, HTTP/2,
+  per-phase timeouts) behind every OpenAI-compatible client; pool_stats()
+  shows its connection pool
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import httpx
+from openai import DefaultHttpxClient
+from starlette.concurrency import run_in_threadpool
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "2"))  # per upstream
+WARMUP_EMBEDDING = os.getenv("WARMUP_EMBEDDING", "true").lower() == "true"
+WARMUP_SEARCHES = int(os.getenv("WARMUP_SEARCHES", "8"))
+# Idle pooled connections are closed after this many seconds (httpx default: 5)
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "60"))
+KEEPALIVE_INTERVAL_SECONDS = float(os.getenv("KEEPALIVE_INTERVAL_SECONDS", "25"))  # 0 disables
+
+# Shared transport for OpenAI-compatible (Requesty.ai) clients
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+# Multiplex concurrent requests over one connection (needs the h2 package)
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "true").lower() == "true"
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "120"))  # long completions
+UPSTREAM_WRITE_TIMEOUT = float(os.getenv("UPSTREAM_WRITE_TIMEOUT", "30"))  # large image uploads
+UPSTREAM_POOL_TIMEOUT = float(os.getenv("UPSTREAM_POOL_TIMEOUT", "10"))  # wait for a free connection
+
+
+class ConnectionMetrics:
+    """Per-upstream counts of requests, new connections and handshake time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, float]] = {}
+
+    def _add(self, upstream: str, **amounts: float):
+        with self._lock:
+            counters = self._counters.setdefault(upstream, {
+                "requests": 0, "new_connections": 0, "tls_handshakes": 0,
+                "connect_seconds": 0.0, "failed_connections": 0,
+            })
+            for key, amount in amounts.items():
+                counters[key] += amount
+
+    def event_hooks(self, upstream: str) -> dict:
+        """httpx event_hooks that attach a trace callback to every request"""
+        def on_request(request):
+            started = {}
+
+            def trace(event: str, info: dict):
+                step, _, phase = event.rpartition(".")
+                if phase == "started":
+                    started[step] = time.perf_counter()
+                elif step == "connection.connect_tcp" and phase == "complete":
+                    self._add(upstream, new_connections=1,
+                              connect_seconds=time.perf_counter() - started.get(step, time.perf_counter()))
+                elif step == "connection.start_tls" and phase == "complete":
+                    self._add(upstream, tls_handshakes=1,
+                              connect_seconds=time.perf_counter() - started.get(step, time.perf_counter()))
+                elif step == "connection.connect_tcp" and phase == "failed":
+                    self._add(upstream, failed_connections=1)
+
+            request.extensions["trace"] = trace
+            self._add(upstream, requests=1)
+
+        return {"request": [on_request]}
+
+    def snapshot(self) -> dict:
+        """
+        Counters per upstream
+
+        Returns:
+            Dictionary of upstream -> requests, new_connections, reused (requests
+            sent on an already open connection), reuse_ratio, tls_handshakes and
+            average handshake milliseconds
+        """
+        with self._lock:
+            counters = {upstream: dict(values) for upstream, values in self._counters.items()}
+        result = {}
+        for upstream, values in counters.items():
+            requests, new = int(values["requests"]), int(values["new_connections"])
+            result[upstream] = {
+                "requests": requests,
+                "new_connections": new,
+                "failed_connections": int(values["failed_connections"]),
+                "reused": max(requests - new, 0),
+                "reuse_ratio": round(max(requests - new, 0) / requests, 3) if requests else None,
+                "tls_handshakes": int(values["tls_handshakes"]),
+                "avg_connect_ms": round(values["connect_seconds"] * 1000 / new, 1) if new else None,
+            }
+        return result
+
+
+# Shared by every upstream client
+connection_metrics = ConnectionMetrics()
+
+
+def upstream_limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=UPSTREAM_MAX_CONNECTIONS,
+                        max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+                        keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY)
+
+
+def upstream_timeout() -> httpx.Timeout:
+    return httpx.Timeout(connect=UPSTREAM_CONNECT_TIMEOUT, read=UPSTREAM_READ_TIMEOUT,
+                         write=UPSTREAM_WRITE_TIMEOUT, pool=UPSTREAM_POOL_TIMEOUT)
+
+
+def _http2_enabled() -> bool:
+    if not UPSTREAM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        print("⚠ Warning: UPSTREAM_HTTP2 needs the h2 package (pip install h2); using HTTP/1.1")
+        return False
+    return True
+
+
+_shared_http_client: Optional[httpx.Client] = None
+_shared_http_client_lock = threading.Lock()
+
+
+def shared_http_client() -> httpx.Client:
+    """
+    The httpx client shared by every OpenAI-compatible client in the process
+
+    Created on first use. Clients built on it share one connection pool, so a
+    connection warmed for embeddings also serves chat completions.
+    """
+    global _shared_http_client
+    with _shared_http_client_lock:
+        if _shared_http_client is None:
+            _shared_http_client = DefaultHttpxClient(
+                limits=upstream_limits(),
+                timeout=upstream_timeout(),
+                http2=_http2_enabled(),
+                event_hooks=connection_metrics.event_hooks("Requesty.ai"),
+            )
+        return _shared_http_client
+
+
+def pool_stats() -> dict:
+    """
+    Connection pool state of the shared client
+
+    Returns:
+        Dictionary with the configured limits and timeouts, and the pool's
+        open, idle, in-use and HTTP/2 connections and queued requests
+    """
+    config = {
+        "max_connections": UPSTREAM_MAX_CONNECTIONS,
+        "max_keepalive_connections": UPSTREAM_MAX_KEEPALIVE,
+        "keepalive_expiry": UPSTREAM_KEEPALIVE_EXPIRY,
+        "timeouts": {"connect": UPSTREAM_CONNECT_TIMEOUT, "read": UPSTREAM_READ_TIMEOUT,
+                     "write": UPSTREAM_WRITE_TIMEOUT, "pool": UPSTREAM_POOL_TIMEOUT},
+    }
+    client = _shared_http_client
+    if client is None:
+        return {**config, "created": False}
+    # httpx does not expose its pool publicly; read the httpcore pool defensively
+    pool = getattr(client._transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    requests = list(getattr(pool, "_requests", []))
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {
+        **config,
+        "created": True,
+        "http2": getattr(pool, "_http2", False),
+        "connections": len(connections),
+        "idle": idle,
+        "in_use": len(connections) - idle,
+        "http2_connections": sum(
+            1 for connection in connections
+            if type(getattr(connection, "_connection", None)).__name__ == "HTTP2Connection"
+        ),
+        "queued_requests": sum(1 for request in requests if request.is_queued()),
+    }
+
+
+def open_connections(call: Callable[[], object], count: int = WARMUP_CONNECTIONS):
+    """
+    Make `count` concurrent cheap calls so the client's pool holds that many
+    open connections (sequential calls would reuse just one)
+    """
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        for future in [executor.submit(call) for _ in range(count)]:
+            future.result()
+
+
+def upstream_pings(rag_service) -> Dict[str, Callable[[], object]]:
+    """
+    Cheap authenticated calls per upstream (none for the in-process Qdrant)
+
+    Clients are resolved on each call, so a ping to a service that is down
+    raises ServiceUnavailable instead of failing here.
+    """
+    from rag_service import QDRANT_LOCAL, get_openai_client
+
+    pings = {}
+    if os.getenv("REQUESTY_API_KEY"):
+        pings["Requesty.ai"] = lambda: get_openai_client().with_options(max_retries=0).models.list()
+    if not QDRANT_LOCAL:
+        pings["Qdrant"] = lambda: rag_service.client.get_collections()
+    return pings
+
+
+def warm_up(rag_service, shared_steps: bool = True) -> dict:
+    """
+    Prepare upstream connections and caches before traffic arrives
+
+    Each step is independent; a failing step is logged and skipped.
+
+    Args:
+        rag_service: The service whose connections and collection to warm
+        shared_steps: Also warm what all workers share (the provider's embedding
+                      path, the live collection); connections are per process
+
+    Returns:
+        Dictionary of step -> seconds taken (or the error)
+    """
+    from collection_versions import alias_target, warm_collection
+
+    steps = {}
+
+    def step(name: str, action: Callable[[], object]):
+        start = time.perf_counter()
+        try:
+            action()
+        except Exception as e:
+            print(f"⚠ Warning: warm-up step {name} failed: {e}")
+            steps[name] = {"error": str(e)}
+            return
+        steps[name] = {"seconds": round(time.perf_counter() - start, 3)}
+
+    for upstream, ping in upstream_pings(rag_service).items():
+        step(f"connections:{upstream}", lambda: open_connections(ping))
+    if shared_steps and WARMUP_EMBEDDING and rag_service.embedder is None:
+        # Straight to the provider: the embedding store would answer from disk
+        step("embedding", lambda: rag_service._request_embeddings(["warm-up"], max_retries=0))
+    if shared_steps and WARMUP_SEARCHES:
+        def searches():
+            collection = (alias_target(rag_service.client, rag_service.collection_name)
+                          if rag_service.uses_alias else None) or rag_service.collection_name
+            warm_collection(rag_service.client, collection, queries=WARMUP_SEARCHES)
+        step("searches", searches)
+
+    summary = ", ".join(f"{name} {result['seconds']}s" if "seconds" in result else f"{name} failed"
+                        for name, result in steps.items())
+    print(f"✓ Warm-up finished: {summary or 'nothing to warm'}")
+    return steps
+
+
+class KeepAlivePinger:
+    """
+    Pings each upstream pool before its idle connections expire
+
+    Pools are per process, so every worker runs its own pinger; an upstream
+    that served other requests since the last tick is skipped, so only idle
+    workers ping.
+    """
+
+    def __init__(self, rag_service, interval: float = KEEPALIVE_INTERVAL_SECONDS,
+                 connections: int = WARMUP_CONNECTIONS):
+        self.rag_service = rag_service
+        self.interval = interval
+        self.connections = connections
+        self._task: Optional[asyncio.Task] = None
+        self._requests_seen: Dict[str, int] = {}
+
+    def start(self):
+        """Start pinging in the running event loop (no-op when the interval is 0)"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def ping(self):
+        for upstream, ping in upstream_pings(self.rag_service).items():
+            requests = self._requests(upstream)
+            if requests > self._requests_seen.get(upstream, requests):
+                # Traffic since the last tick kept the connections open
+                self._requests_seen[upstream] = requests
+                continue
+            try:
+                open_connections(ping, self.connections)
+            except Exception as e:
+                print(f"⚠ Warning: keep-alive ping to {upstream} failed: {e}")
+            self._requests_seen[upstream] = self._requests(upstream)
+
+    @staticmethod
+    def _requests(upstream: str) -> int:
+        return connection_metrics.snapshot().get(upstream, {}).get("requests", 0)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await run_in_threadpool(self.ping)
@@ -0,0 +1,158 @@
+/*
+  # Server-side Review Statistics
+
+  ## Overview
+  `GET /reviews/stats` used to select the rating of every review and aggregate in
+  the backend: transfer and CPU grew with the table, and PostgREST's row limit
+  would silently truncate the result. Per-rating counts are now kept up to date
+  by triggers, and `get_review_stats()` returns count, average and distribution
+  in one row from those five counters, in constant time however many reviews exist.
+
+  ## 1. New Tables
+
+  ### `review_rating_counts`
+  One row per rating value, maintained by triggers on `reviews`
+  - `rating` (smallint, primary key) - Rating from 1-5
+  - `review_count` (bigint, not null) - Number of reviews with this rating
+
+  ## 2. Functions
+  - `update_review_rating_counts()` - Statement-level trigger function that adjusts
+    the counters by the ratings inserted, updated or deleted (SECURITY DEFINER:
+    anonymous users insert reviews but cannot write the counters directly)
+  - `reset_review_rating_counts()` - Zeroes the counters when `reviews` is truncated
+  - `get_review_stats()` - Returns `total_reviews`, `average_rating` (2 decimals, 0
+    when there are no reviews) and `rating_distribution` ({"1": n, ..., "5": n})
+
+  ## 3. Security (RLS Policies)
+  - **Public Select**: Anyone can read the counters (the same data as the public reviews)
+  - No insert/update/delete policies: only the trigger functions write the counters
+
+  ## 4. Important Notes
+  - Counters are backfilled from the existing reviews in this migration
+  - Triggers run once per statement with transition tables, so a bulk insert updates
+    each counter once rather than once per row
+  - Each review insert updates one counter row, so concurrent inserts with the same
+    rating serialize on that row briefly; review submission rates make this negligible
+*/
+
+-- Create per-rating counters
+CREATE TABLE IF NOT EXISTS review_rating_counts (
+  rating smallint PRIMARY KEY CHECK (rating >= 1 AND rating <= 5),
+  review_count bigint NOT NULL DEFAULT 0
+);
+
+-- Hold off review writes until the triggers below are in place, so none are
+-- missed between the backfill and the first trigger firing
+LOCK TABLE reviews IN SHARE ROW EXCLUSIVE MODE;
+
+-- Backfill from existing reviews (every rating gets a row, even with no reviews)
+INSERT INTO review_rating_counts (rating, review_count)
+SELECT r.rating, count(reviews.id)
+FROM generate_series(1, 5) AS r(rating)
+LEFT JOIN reviews ON reviews.rating = r.rating
+GROUP BY r.rating
+ON CONFLICT (rating) DO UPDATE SET review_count = EXCLUDED.review_count;
+
+-- Function to keep the counters in step with reviews
+CREATE OR REPLACE FUNCTION update_review_rating_counts()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE review_rating_counts c SET review_count = c.review_count + d.delta
+    FROM (SELECT rating, count(*) AS delta FROM new_reviews GROUP BY rating) d
+    WHERE c.rating = d.rating;
+  ELSIF TG_OP = 'DELETE' THEN
+    UPDATE review_rating_counts c SET review_count = c.review_count - d.delta
+    FROM (SELECT rating, count(*) AS delta FROM old_reviews GROUP BY rating) d
+    WHERE c.rating = d.rating;
+  ELSE
+    -- Only rows whose rating changed move between counters
+    UPDATE review_rating_counts c SET review_count = c.review_count + d.delta
+    FROM (
+      SELECT rating, sum(delta) AS delta
+      FROM (
+        SELECT rating, 1 AS delta FROM new_reviews
+        UNION ALL
+        SELECT rating, -1 AS delta FROM old_reviews
+      ) changes
+      GROUP BY rating
+      HAVING sum(delta) <> 0
+    ) d
+    WHERE c.rating = d.rating;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- Function to zero the counters when reviews are truncated
+CREATE OR REPLACE FUNCTION reset_review_rating_counts()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE review_rating_counts SET review_count = 0;
+  RETURN NULL;
+END;
+$$;
+
+-- Triggers for reviews table (transition tables need one trigger per event)
+DROP TRIGGER IF EXISTS insert_review_rating_counts ON reviews;
+CREATE TRIGGER insert_review_rating_counts
+  AFTER INSERT ON reviews
+  REFERENCING NEW TABLE AS new_reviews
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION update_review_rating_counts();
+
+DROP TRIGGER IF EXISTS update_review_rating_counts ON reviews;
+CREATE TRIGGER update_review_rating_counts
+  AFTER UPDATE ON reviews
+  REFERENCING OLD TABLE AS old_reviews NEW TABLE AS new_reviews
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION update_review_rating_counts();
+
+DROP TRIGGER IF EXISTS delete_review_rating_counts ON reviews;
+CREATE TRIGGER delete_review_rating_counts
+  AFTER DELETE ON reviews
+  REFERENCING OLD TABLE AS old_reviews
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION update_review_rating_counts();
+
+DROP TRIGGER IF EXISTS reset_review_rating_counts ON reviews;
+CREATE TRIGGER reset_review_rating_counts
+  AFTER TRUNCATE ON reviews
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION reset_review_rating_counts();
+
+-- Function returning the dashboard statistics in one row
+CREATE OR REPLACE FUNCTION get_review_stats()
+RETURNS TABLE (total_reviews bigint, average_rating numeric, rating_distribution jsonb)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  SELECT
+    sum(review_count)::bigint,
+    COALESCE(round(sum(rating * review_count)::numeric / NULLIF(sum(review_count), 0), 2), 0),
+    jsonb_object_agg(rating::text, review_count ORDER BY rating)
+  FROM review_rating_counts;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_review_stats() TO anon, authenticated;
+
+-- Enable Row Level Security
+ALTER TABLE review_rating_counts ENABLE ROW LEVEL SECURITY;
+
+-- RLS Policies for review_rating_counts table
+
+-- Anyone can read the counters (public metrics, like the reviews themselves)
+CREATE POLICY "Anyone can read review rating counts"
+  ON review_rating_counts
+  FOR SELECT
+  TO anon, authenticated
+  USING (true);